@@ -3,10 +3,16 @@ from flask_cors import CORS
 from .config import get_config
 from .extensions import db, migrate, jwt, ma
 from .swagger import swagger_bp, api
+from .routes.media_routes import media_bp
+from .cli import images_cli, artworks_cli, inspect_cli
+from .utils.uploads import UploadRequest
+from .utils.traffic_capture import TrafficCapture
+from .utils.rate_limit import AdmissionControl
 
 def create_app(config_object=None):
     app = Flask(__name__)
     app.config.from_object(config_object or get_config())
+    app.request_class = UploadRequest
 
     # Enable CORS
     CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
@@ -16,9 +22,17 @@ def create_app(config_object=None):
     migrate.init_app(app, db)
     jwt.init_app(app)
     ma.init_app(app)
+    TrafficCapture(app)
+    AdmissionControl(app)
 
     # Register blueprints
     app.register_blueprint(swagger_bp, url_prefix='/api')
+    app.register_blueprint(media_bp, url_prefix='/media')
+
+    # Register CLI commands
+    app.cli.add_command(images_cli)
+    app.cli.add_command(artworks_cli)
+    app.cli.add_command(inspect_cli)
 
     # Configure JWT
     @jwt.user_identity_loader
@@ -27,18 +41,38 @@ def create_app(config_object=None):
 
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
-        from .models.user import User
-        identity = jwt_data["sub"]
+        # Role and active state come from the token and the identity cache, not a User query
+        from .utils.identity import load_identity
         try:
-            return User.query.filter_by(id=identity).one_or_none()
+            return load_identity(jwt_data)
         except Exception:
             return None
 
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(_jwt_header, jwt_data):
+        from .utils.tokens import TokenService
+        return TokenService.is_revoked(jwt_data)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(_jwt_header, _jwt_data):
+        return {"message": "Token has been revoked; please log in again"}, 401
+
+    @jwt.user_lookup_error_loader
+    def user_lookup_error_callback(_jwt_header, _jwt_data):
+        return {"message": "Account is deactivated or has changed; please log in again"}, 401
+
     # Health check endpoint
     @app.route('/health')
     def health_check():
         return {'status': 'healthy', 'service': 'ArtMarket API'}
 
+    # Per-process counters, e.g. for spotting password hashing backing up
+    @app.route('/metrics')
+    def metrics():
+        from .utils.passwords import PasswordHasher
+        from .utils.rate_limit import RateLimitStats
+        return {'password_hashing': PasswordHasher.metrics(), 'rate_limiting': RateLimitStats.metrics()}
+
     # Database connection check endpoint
     @app.route('/db-check')
     def db_check():
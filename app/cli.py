@@ -0,0 +1,128 @@
+import click
+from flask.cli import AppGroup
+
+images_cli = AppGroup('images', help='Stored image maintenance.')
+
+
+@images_cli.command('drain-deletions')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches.')
+def drain_deletions(max_batches):
+    """Delete images queued for deletion."""
+    from .utils.image_deletion import ImageDeletionService
+    deleted = ImageDeletionService.drain(max_batches=max_batches)
+    click.echo(f"Deleted {deleted} images")
+
+
+@images_cli.command('sweep-orphans')
+@click.option('--prefix', default='artworks/', show_default=True, help='Only consider images under this prefix.')
+def sweep_orphans(prefix):
+    """Queue stored images that no artwork references."""
+    from .utils.image_deletion import ImageDeletionService
+    queued = ImageDeletionService.sweep_orphans(prefix=prefix)
+    click.echo(f"Queued {queued} orphaned images for deletion")
+
+
+@images_cli.command('expire-uploads')
+def expire_uploads():
+    """Remove resumable uploads that have expired."""
+    from .utils.resumable_uploads import ResumableUploadService
+    removed = ResumableUploadService.expire()
+    click.echo(f"Removed {removed} expired uploads")
+
+
+artworks_cli = AppGroup('artworks', help='Artwork catalog tools.')
+
+
+@artworks_cli.command('import')
+@click.argument('source', type=click.File('rb'))
+@click.option('--artist', 'artist_email', required=True, help='Email of the artist the artworks belong to.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='Input format; guessed from the file extension if omitted.')
+@click.option('--batch-size', type=int, default=None, help='Rows per insert batch.')
+def import_artworks(source, artist_email, fmt, batch_size):
+    """Import artworks from a CSV or NDJSON file ('-' for stdin)."""
+    from .models.user import User
+    from .utils.artwork_import import ArtworkImportService, detect_import_format
+
+    artist = User.query.filter_by(email=artist_email, role='artist').first()
+    if not artist:
+        raise click.ClickException(f"No artist with email {artist_email}")
+
+    fmt = fmt or detect_import_format(filename=source.name)
+    if fmt is None:
+        raise click.ClickException("Could not tell the format from the file name, pass --format")
+
+    summary = ArtworkImportService.import_stream(source, fmt, artist.id, batch_size=batch_size)
+    for error in summary['errors']:
+        click.echo(f"line {error['line']}: {error['message']}", err=True)
+    click.echo(f"Imported {summary['imported']} artworks, {summary['failed']} rows failed")
+
+
+@artworks_cli.command('export')
+@click.argument('output', type=click.File('w'), default='-')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--category', default=None, help='Only export this category.')
+@click.option('--updated-since', default=None, help='Watermark of a previous export (ISO 8601).')
+def export_artworks(output, fmt, category, updated_since):
+    """Export the catalog to OUTPUT ('-' for stdout)."""
+    from .utils.artwork_export import ArtworkExportService, parse_watermark
+
+    try:
+        updated_since = parse_watermark(updated_since) if updated_since else None
+    except ValueError:
+        raise click.BadParameter('must be an ISO 8601 timestamp', param_hint='--updated-since')
+
+    until = ArtworkExportService.watermark()
+    for chunk in ArtworkExportService.generate(fmt, until, category=category, updated_since=updated_since):
+        output.write(chunk)
+    click.echo(f"Watermark: {until.isoformat()}", err=True)
+
+
+inspect_cli = AppGroup('inspect', help='Read-only database inspection.')
+
+
+@inspect_cli.command('tables')
+@click.option('--exact', is_flag=True, help='Count rows with COUNT(*) instead of using statistics.')
+def inspect_tables(exact):
+    """List tables with their estimated row counts."""
+    from .utils.db_inspect import estimated_row_counts, exact_row_count, get_table
+
+    counts = estimated_row_counts()
+    width = max(len(name) for name in counts)
+    for name in sorted(counts):
+        count = exact_row_count(get_table(name)) if exact else counts[name]
+        click.echo(f"{name:<{width}}  {'?' if count is None else count}")
+
+
+@inspect_cli.command('dump')
+@click.argument('table')
+@click.option('--columns', default=None, help='Comma separated columns to include (default all).')
+@click.option('--where', 'filters', multiple=True, help='Filter such as status=pending or price>=100; repeatable.')
+@click.option('--limit', type=int, default=None, help='Stop after this many rows.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl', 'columnar']), default='jsonl', show_default=True,
+              help='columnar writes Parquet when pyarrow is installed, otherwise the ARTCOL format.')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Rows fetched per round trip.')
+@click.option('--output', '-o', default='-', help='File to write to (default stdout).')
+def inspect_dump(table, columns, filters, limit, fmt, chunk_size, output):
+    """Stream rows of TABLE without loading the table into memory."""
+    from .utils.db_inspect import build_select, get_table, iter_chunks, write_csv, write_jsonl, write_columnar
+
+    try:
+        query = build_select(
+            get_table(table),
+            columns=[name.strip() for name in columns.split(',')] if columns else None,
+            filters=filters,
+            limit=limit
+        )
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    names = [column.name for column in query.selected_columns]
+    chunks = iter_chunks(query, chunk_size)
+    if fmt == 'columnar':
+        with click.open_file(output, 'wb') as stream:
+            written = write_columnar(chunks, query.selected_columns, stream)
+        click.echo(f"Wrote {written}", err=True)
+    else:
+        with click.open_file(output, 'w', encoding='utf-8', lazy=False) as stream:
+            (write_csv if fmt == 'csv' else write_jsonl)(chunks, names, stream)
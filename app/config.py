@@ -20,11 +20,86 @@ class Config:
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-key-change-in-production")
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 3600))  # 1 hour
+    JWT_REFRESH_TOKEN_EXPIRES = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES", 30 * 24 * 3600))  # 30 days
+    REVOCATION_SYNC_INTERVAL = int(os.getenv("REVOCATION_SYNC_INTERVAL", 5))  # seconds a revocation can take to reach other workers
+    REVOCATION_SYNC_OVERLAP = int(os.getenv("REVOCATION_SYNC_OVERLAP", 60))  # seconds re-read each sync, for clock skew
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")  # stored hashes are upgraded at login
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+    PASSWORD_HASH_TIMEOUT = int(os.getenv("PASSWORD_HASH_TIMEOUT", 10))  # seconds to wait for a free worker
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", 60))  # seconds other workers may take to see a deactivation
     
     # Cloudinary Configuration
     CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
     CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
     CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+    DIRECT_UPLOAD_TTL = int(os.getenv("DIRECT_UPLOAD_TTL", 600))  # 10 minutes
+
+    # Image Storage Configuration ("cloudinary" or "local")
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")
+    MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+    MEDIA_WIDTHS = [int(w) for w in os.getenv("MEDIA_WIDTHS", "200,400,800,1200").split(",")]
+    MEDIA_QUALITY = int(os.getenv("MEDIA_QUALITY", 85))
+    MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512 MB
+    MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", 365 * 24 * 3600))  # 1 year
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "False").lower() == "true"
+
+    # Upload Limits
+    UPLOAD_MAX_BYTES = {
+        "artist": int(os.getenv("ARTIST_UPLOAD_MAX_BYTES", 20 * 1024 * 1024)),  # 20 MB
+        "collector": int(os.getenv("COLLECTOR_UPLOAD_MAX_BYTES", 5 * 1024 * 1024)),  # 5 MB
+    }
+    MAX_CONTENT_LENGTH = max(UPLOAD_MAX_BYTES.values())
+    UPLOAD_SPOOL_THRESHOLD = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", 1024 * 1024))  # spill to disk above 1 MB
+    BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", 50))
+    BATCH_UPLOAD_MAX_BYTES = int(os.getenv("BATCH_UPLOAD_MAX_BYTES", 256 * 1024 * 1024))  # whole request, 256 MB
+    BATCH_UPLOAD_PROCESSES = int(os.getenv("BATCH_UPLOAD_PROCESSES", min(4, os.cpu_count() or 1)))
+    BATCH_UPLOAD_THREADS = int(os.getenv("BATCH_UPLOAD_THREADS", 8))
+    IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 100 * 1024 * 1024))  # 100 MB
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+    IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", 1000))
+    BULK_UPDATE_MAX_ITEMS = int(os.getenv("BULK_UPDATE_MAX_ITEMS", 1000))
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))  # rows per server-side cursor fetch
+    EXPORT_WATERMARK_LAG = int(os.getenv("EXPORT_WATERMARK_LAG", 5))  # seconds
+    RESUMABLE_UPLOAD_DIR = os.getenv("RESUMABLE_UPLOAD_DIR", os.path.join(MEDIA_ROOT, "resumable"))
+    RESUMABLE_UPLOAD_TTL = int(os.getenv("RESUMABLE_UPLOAD_TTL", 24 * 3600))  # extended by every chunk
+    GUEST_CART_TTL = int(os.getenv("GUEST_CART_TTL", 30 * 24 * 3600))  # token lifetime, and idle time before a guest cart is deleted
+    RESERVATION_TTL = int(os.getenv("RESERVATION_TTL", 15 * 60))  # seconds a started checkout holds an artwork until the order is placed
+
+    # Background Task Configuration
+    BACKGROUND_TASKS_ENABLED = os.getenv("BACKGROUND_TASKS_ENABLED", "True").lower() == "true"
+    IMAGE_DELETE_INTERVAL = int(os.getenv("IMAGE_DELETE_INTERVAL", 30))  # seconds
+    IMAGE_DELETE_BATCH_SIZE = int(os.getenv("IMAGE_DELETE_BATCH_SIZE", 100))
+    IMAGE_DELETE_RETRY_DELAY = int(os.getenv("IMAGE_DELETE_RETRY_DELAY", 60))  # doubles per attempt
+    IMAGE_DELETE_MAX_RETRY_DELAY = int(os.getenv("IMAGE_DELETE_MAX_RETRY_DELAY", 6 * 3600))
+    # Off until the a1f6c3e9d2b7 migration has backfilled image_public_id from image_url
+    ORPHAN_SWEEP_ENABLED = os.getenv("ORPHAN_SWEEP_ENABLED", "False").lower() == "true"
+    ORPHAN_SWEEP_INTERVAL = int(os.getenv("ORPHAN_SWEEP_INTERVAL", 24 * 3600))
+    ORPHAN_GRACE_PERIOD = int(os.getenv("ORPHAN_GRACE_PERIOD", 24 * 3600))
+    RESUMABLE_UPLOAD_SWEEP_INTERVAL = int(os.getenv("RESUMABLE_UPLOAD_SWEEP_INTERVAL", 3600))
+    REVOKED_TOKEN_PURGE_INTERVAL = int(os.getenv("REVOKED_TOKEN_PURGE_INTERVAL", 3600))
+    GUEST_CART_SWEEP_INTERVAL = int(os.getenv("GUEST_CART_SWEEP_INTERVAL", 3600))
+    RESERVATION_SWEEP_INTERVAL = int(os.getenv("RESERVATION_SWEEP_INTERVAL", 60))
+    ORDER_EMAIL_INTERVAL = int(os.getenv("ORDER_EMAIL_INTERVAL", 15))  # seconds
+    ORDER_EMAIL_BATCH_SIZE = int(os.getenv("ORDER_EMAIL_BATCH_SIZE", 50))
+    ORDER_EMAIL_RETRY_DELAY = int(os.getenv("ORDER_EMAIL_RETRY_DELAY", 60))  # doubles per attempt
+    ORDER_EMAIL_MAX_RETRY_DELAY = int(os.getenv("ORDER_EMAIL_MAX_RETRY_DELAY", 3600))
+    ORDER_EMAIL_MAX_ATTEMPTS = int(os.getenv("ORDER_EMAIL_MAX_ATTEMPTS", 8))
+
+    # Traffic Capture Configuration (sampled, redacted request log for replay)
+    TRAFFIC_CAPTURE_ENABLED = os.getenv("TRAFFIC_CAPTURE_ENABLED", "False").lower() == "true"
+    TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", 0.01))
+    TRAFFIC_CAPTURE_PATH = os.getenv("TRAFFIC_CAPTURE_PATH", "traffic/capture.ndjson")
+    TRAFFIC_CAPTURE_MAX_BODY_BYTES = int(os.getenv("TRAFFIC_CAPTURE_MAX_BODY_BYTES", 64 * 1024))
+    TRAFFIC_CAPTURE_EXCLUDE = os.getenv("TRAFFIC_CAPTURE_EXCLUDE", "/health,/db-check,/media/,/api/docs,/api/swagger.json").split(",")
+
+    # Rate Limiting and Admission Control (policies are declared in swagger.py)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")  # redis://... to share buckets between workers
+    RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "False").lower() == "true"  # key by X-Forwarded-For
+    RATE_LIMIT_MAX_CONCURRENT = int(os.getenv("RATE_LIMIT_MAX_CONCURRENT", 64))  # in-flight requests per process; 0 disables
+    RATE_LIMIT_MAX_QUEUE_MS = int(os.getenv("RATE_LIMIT_MAX_QUEUE_MS", 5000))  # by X-Request-Start; 0 disables
+    RATE_LIMIT_EXEMPT = os.getenv("RATE_LIMIT_EXEMPT", "/health,/metrics").split(",")
     
     # SendGrid Configuration
     SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
@@ -1,14 +1,18 @@
-from .artwork import Artwork, ArtworkSchema
+from .artwork import Artwork, ArtworkReservation, ArtworkSchema
 from .user import User, UserSchema
 from .cart import Cart, CartItem, CartSchema, CartItemSchema
 from .wishlist import Wishlist, WishlistItem, WishlistSchema, WishlistItemSchema
 from .payment import Payment, PaymentSchema
 from .delivery import Delivery, DeliverySchema
 from .notification import Notification, NotificationSchema
-from .order import Order, OrderItem, OrderSchema, OrderItemSchema
+from .order import Order, OrderItem, OrderSchema, OrderItemSchema, PendingOrderEmail
+from .image_asset import ImageAsset, ImageAssetSchema, PendingImageDeletion
+from .upload import ResumableUpload
+from .token import RevokedToken
 
 __all__ = [
     "Artwork",
+    "ArtworkReservation",
     "ArtworkSchema",
     "User",
     "UserSchema",
@@ -21,7 +25,12 @@ __all__ = [
     "Order",
     "OrderItem",
     "OrderSchema",
+    "PendingOrderEmail",
     "Payment",
     "Delivery",
     "Notification",
+    "ImageAsset",
+    "PendingImageDeletion",
+    "ResumableUpload",
+    "RevokedToken",
 ]
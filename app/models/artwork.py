@@ -15,11 +15,34 @@ class Artwork(db.Model):
     category = db.Column(db.String(50), nullable=False)
     image_url = db.Column(db.String(1024))
     image_public_id = db.Column(db.String(255))  # Cloudinary public ID
+    # Precomputed at upload so clients can lay out and paint the image before it loads
+    placeholder = db.Column(db.Text)  # ~20px base64 JPEG data URI
+    dominant_color = db.Column(db.String(7))  # "#rrggbb"
+    aspect_ratio = db.Column(db.Float)  # width / height
     artist_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id"), nullable=False)
     is_available = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Exports stream in (updated_at, id) order straight off this index, without a sort
+    __table_args__ = (
+        db.Index('ix_artworks_updated_at_id', 'updated_at', 'id'),
+    )
+
+
+class ArtworkReservation(db.Model):
+    """A collector's hold on an artwork while they check out and pay
+
+    At most one row per artwork. A hold past expires_at no longer counts and
+    can be taken over; the background sweeper deletes such rows later.
+    """
+    __tablename__ = "artwork_reservations"
+
+    artwork_id = db.Column(UUID(as_uuid=True), db.ForeignKey("artworks.id"), primary_key=True)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id"), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 
 class ArtworkSchema(ma.SQLAlchemyAutoSchema):
     created_at = ma.DateTime(format='%Y-%m-%dT%H:%M:%S')
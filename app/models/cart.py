@@ -1,18 +1,31 @@
 from datetime import datetime
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import UniqueConstraint
 from ..extensions import db, ma
 
 class Cart(db.Model):
     __tablename__ = "carts"
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id"), nullable=True)  # None for guest carts
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")  # Bumped by every change to the items or totals
+    # Totals kept up to date by CartTotals whenever the items or their artworks change
+    item_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # Total quantity
+    subtotal = db.Column(db.Numeric(10, 2), nullable=False, default=0, server_default="0")  # Available items at current prices
+    unavailable_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    price_changed_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # Priced differently than when added
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     items = db.relationship("CartItem", backref="cart", lazy=True, cascade="all, delete-orphan")
 
+    # One per user, so concurrent first adds upsert the same row
+    __table_args__ = (
+        UniqueConstraint('user_id', name='uq_carts_user_id'),
+        db.Index('ix_carts_guest_updated_at', 'updated_at', postgresql_where=db.text('user_id IS NULL')),
+    )
+
 class CartItem(db.Model):
     __tablename__ = "cart_items"
 
@@ -20,12 +33,18 @@ class CartItem(db.Model):
     cart_id = db.Column(UUID(as_uuid=True), db.ForeignKey("carts.id"), nullable=False)
     artwork_id = db.Column(UUID(as_uuid=True), db.ForeignKey("artworks.id"), nullable=False)
     quantity = db.Column(db.Integer, default=1)
+    price_at_add = db.Column(db.Numeric(10, 2))  # The artwork's price when it was added
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     artwork = db.relationship("Artwork")
 
+    __table_args__ = (
+        UniqueConstraint('cart_id', 'artwork_id', name='uq_cart_items_cart_id_artwork_id'),
+    )
+
 class CartItemSchema(ma.SQLAlchemyAutoSchema):
-    artwork = ma.Nested('ArtworkSchema', exclude=('artist',), dump_only=True)
+    artwork = ma.Nested('ArtworkSchema', dump_only=True)
+    price_at_add = ma.Float(dump_only=True)
 
     class Meta:
         model = CartItem
@@ -34,6 +53,7 @@ class CartItemSchema(ma.SQLAlchemyAutoSchema):
 
 class CartSchema(ma.SQLAlchemyAutoSchema):
     items = ma.Nested(CartItemSchema, many=True)
+    subtotal = ma.Float(dump_only=True)
     created_at = ma.DateTime(format='%Y-%m-%dT%H:%M:%S')
     updated_at = ma.DateTime(format='%Y-%m-%dT%H:%M:%S')
 
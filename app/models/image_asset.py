@@ -0,0 +1,48 @@
+from datetime import datetime
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+from ..extensions import db, ma
+
+
+class ImageAsset(db.Model):
+    """An uploaded image, keyed by its uploader and the SHA-256 of the bytes they sent."""
+    __tablename__ = "image_assets"
+    __table_args__ = (
+        db.UniqueConstraint('uploaded_by', 'content_hash', name='uq_image_assets_uploaded_by_content_hash'),
+    )
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    uploaded_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), index=True)  # Only they may attach it to artworks
+    content_hash = db.Column(db.String(64))  # SHA-256 of the original upload
+    perceptual_hash = db.Column(db.String(16), index=True)  # 64-bit dHash, hex encoded
+    etag = db.Column(db.String(64), index=True)  # Storage-provided checksum of the stored file
+    public_id = db.Column(db.String(255), unique=True, nullable=False)
+    url = db.Column(db.String(1024), nullable=False)
+    format = db.Column(db.String(20))
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    placeholder = db.Column(db.Text)  # ~20px base64 JPEG data URI
+    dominant_color = db.Column(db.String(7))  # "#rrggbb"
+    aspect_ratio = db.Column(db.Float)  # width / height
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class PendingImageDeletion(db.Model):
+    """A stored image waiting to be deleted by the background worker"""
+    __tablename__ = "pending_image_deletions"
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    public_id = db.Column(db.String(255), unique=True, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ImageAssetSchema(ma.SQLAlchemyAutoSchema):
+    created_at = ma.DateTime(format='%Y-%m-%dT%H:%M:%S')
+
+    class Meta:
+        model = ImageAsset
+        load_instance = True
@@ -40,9 +40,23 @@ class OrderItem(db.Model):
     artwork = db.relationship("Artwork")
 
 
+class PendingOrderEmail(db.Model):
+    """An order confirmation waiting to be sent by the background worker"""
+    __tablename__ = "pending_order_emails"
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    order_id = db.Column(UUID(as_uuid=True), db.ForeignKey("orders.id"), unique=True, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    order = db.relationship("Order")
+
+
 class OrderItemSchema(ma.SQLAlchemyAutoSchema):
     price = ma.Method("get_price")
-    artwork = ma.Nested(lambda: ArtworkSchema(exclude=('artist',)), dump_only=True)
+    artwork = ma.Nested('ArtworkSchema', dump_only=True)
 
     def get_price(self, obj):
         return float(obj.price) if obj.price is not None else None
@@ -55,8 +69,8 @@ class OrderItemSchema(ma.SQLAlchemyAutoSchema):
 
 class OrderSchema(ma.SQLAlchemyAutoSchema):
     items = ma.Nested(OrderItemSchema, many=True)
-    payments = ma.Nested(lambda: PaymentSchema(many=True, exclude=('order',)), dump_only=True)
-    deliveries = ma.Nested(lambda: DeliverySchema(many=True, exclude=('order',)), dump_only=True)
+    payments = ma.Nested('PaymentSchema', many=True, dump_only=True)
+    deliveries = ma.Nested('DeliverySchema', many=True, dump_only=True)
     created_at = ma.DateTime(format='%Y-%m-%dT%H:%M:%S')
     updated_at = ma.DateTime(format='%Y-%m-%dT%H:%M:%S')
     total_amount = ma.Method("get_total_amount")
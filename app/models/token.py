@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+from ..extensions import db
+
+
+class RevokedToken(db.Model):
+    """A revoked JWT (by jti) or a whole refresh token family (by family id)
+
+    Rows are only needed until the token would have expired anyway.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti = db.Column(db.String(64), primary_key=True)  # Token jti, or the family id when kind is "family"
+    kind = db.Column(db.String(10), nullable=False)  # access, refresh or family
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id", ondelete="CASCADE"))
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
\ No newline at end of file
@@ -0,0 +1,19 @@
+from datetime import datetime
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+from ..extensions import db
+
+
+class ResumableUpload(db.Model):
+    """An image upload received in chunks (tus-style) and assembled on local disk"""
+    __tablename__ = "resumable_uploads"
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id"), nullable=False)
+    filename = db.Column(db.String(255))
+    upload_length = db.Column(db.BigInteger, nullable=False)
+    upload_offset = db.Column(db.BigInteger, default=0, nullable=False)
+    public_id = db.Column(db.String(255))  # Set once the assembled file has been uploaded
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    completed_at = db.Column(db.DateTime)
@@ -1,8 +1,8 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from ..extensions import db, ma
+from ..utils.passwords import PasswordHasher
 
 
 class User(db.Model):
@@ -24,10 +24,10 @@ class User(db.Model):
     artworks = db.relationship("Artwork", backref="artist", lazy=True)
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = PasswordHasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return PasswordHasher.verify(self.password_hash, password)
 
 
 class UserSchema(ma.SQLAlchemyAutoSchema):
@@ -1,6 +1,7 @@
 from datetime import datetime
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import UniqueConstraint
 from ..extensions import db, ma
 
 class Wishlist(db.Model):
@@ -8,11 +9,16 @@ class Wishlist(db.Model):
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey("users.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")  # Bumped by every change to the items
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     items = db.relationship("WishlistItem", backref="wishlist", lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        UniqueConstraint('user_id', name='uq_wishlists_user_id'),
+    )
+
 class WishlistItem(db.Model):
     __tablename__ = "wishlist_items"
 
@@ -23,8 +29,12 @@ class WishlistItem(db.Model):
 
     artwork = db.relationship("Artwork")
 
+    __table_args__ = (
+        UniqueConstraint('wishlist_id', 'artwork_id', name='uq_wishlist_items_wishlist_id_artwork_id'),
+    )
+
 class WishlistItemSchema(ma.SQLAlchemyAutoSchema):
-    artwork = ma.Nested('ArtworkSchema', exclude=('artist',), dump_only=True)
+    artwork = ma.Nested('ArtworkSchema', dump_only=True)
 
     class Meta:
         model = WishlistItem
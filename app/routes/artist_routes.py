@@ -1,18 +1,61 @@
-from flask import request
+from flask import current_app, request
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
 from marshmallow import ValidationError
 from ..extensions import db
 from ..models.artwork import Artwork, ArtworkSchema
 from ..models.order import Order, OrderItem
 from ..models.user import User
 from ..utils.decorators import role_required, handle_api_errors
+from ..signals import notify_artworks_changed
+from ..utils.artwork_bulk import ArtworkBulkService
+from ..utils.artwork_import import ArtworkImportService, IMPORT_FORMATS, detect_import_format
+from ..utils.batch_upload import BatchUploadService
 from ..utils.cloudinary_service import CloudinaryService
+from ..utils.image_deletion import ImageDeletionService
 from ..utils.helpers import paginate_query
+from ..utils.resumable_uploads import ResumableUploadService, TUS_VERSION, parse_upload_metadata
+from ..utils.uploads import apply_upload_limit, upload_limit
 
 artwork_schema = ArtworkSchema()
 artworks_schema = ArtworkSchema(many=True)
 
+
+def apply_image_preview(artwork, preview):
+    """Copy an image's precomputed placeholder fields onto the artwork"""
+    preview = preview or {}
+    artwork.placeholder = preview.get('placeholder')
+    artwork.dominant_color = preview.get('dominant_color')
+    artwork.aspect_ratio = preview.get('aspect_ratio')
+
+
+def upload_response(upload_result):
+    return {
+        'image_url': upload_result['url'],
+        'public_id': upload_result['public_id'],
+        'placeholder': upload_result['placeholder'],
+        'dominant_color': upload_result['dominant_color'],
+        'aspect_ratio': upload_result['aspect_ratio'],
+        'deduplicated': upload_result['deduplicated'],
+        'message': 'Image uploaded successfully'
+    }
+
+
+def replace_artwork_image(artwork, public_id):
+    """Point an artwork at another image, moving its asset reference
+
+    The previous image is queued for deletion if nothing references it any more.
+    Raises PermissionError if the artwork's artist didn't upload the new image.
+    """
+    old_public_id = artwork.image_public_id
+    if public_id == old_public_id:
+        return
+
+    apply_image_preview(artwork, CloudinaryService.retain_image(public_id, artwork.artist_id))
+    artwork.image_public_id = public_id
+    if CloudinaryService.release_image(old_public_id):
+        ImageDeletionService.enqueue([old_public_id])
+
 class ArtistArtworkResource(Resource):
     @jwt_required()
     @role_required(['artist'])
@@ -57,14 +100,76 @@ class ArtistArtworkResource(Resource):
             price=data['price'],
             category=data['category'],
             image_url=data.get('image_url'),
+            image_public_id=data.get('image_public_id'),
             artist_id=artist_id
         )
 
         db.session.add(artwork)
+        apply_image_preview(artwork, CloudinaryService.retain_image(artwork.image_public_id, artist_id))
         db.session.commit()
+        notify_artworks_changed(artist_id, [artwork.id])
 
         return artwork_schema.dump(artwork), 201
 
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def patch(self):
+        """Update many artworks at once
+
+        Send either ``updates``, a list of {"id", <field>: <value>} objects,
+        or a ``filter`` plus one set of ``changes`` applied to every match
+        (``changes`` may use ``price_multiplier``, e.g. 0.9 for 10% off).
+        """
+        artist_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        try:
+            if 'updates' in data:
+                result = ArtworkBulkService.update_many(artist_id, data['updates'])
+            elif 'changes' in data:
+                result = ArtworkBulkService.update_matching(artist_id, data.get('filter'), data['changes'])
+            else:
+                return {'message': 'Either updates or changes is required'}, 400
+        except ValidationError as e:
+            return {'message': ' '.join(e.messages)}, 400
+
+        return result, 200
+
+class ArtworkImportResource(Resource):
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def post(self):
+        """Import artworks in bulk from a CSV or NDJSON file
+
+        The file can be sent as the multipart field ``file`` or as the raw
+        request body with a text/csv or application/x-ndjson content type.
+        """
+        artist_id = get_jwt_identity()
+
+        # Must run before the body is read
+        max_bytes = current_app.config['IMPORT_MAX_BYTES']
+        if request.content_length is not None and request.content_length > max_bytes:
+            return {'message': f'Import exceeds the limit of {max_bytes} bytes'}, 413
+        request.max_content_length = max_bytes
+
+        if request.mimetype == 'multipart/form-data':
+            file = request.files.get('file')
+            if not file or file.filename == '':
+                return {'message': 'No file provided'}, 400
+            file.stream.seek(0)
+            stream, detected = file.stream, detect_import_format(file.mimetype, file.filename)
+        else:
+            stream, detected = request.stream, detect_import_format(request.mimetype)
+
+        fmt = request.args.get('format') or detected
+        if fmt not in IMPORT_FORMATS:
+            return {'message': f'format must be one of: {", ".join(IMPORT_FORMATS)}'}, 400
+
+        summary = ArtworkImportService.import_stream(stream, fmt, artist_id)
+        return summary, 207 if summary['failed'] else 200
+
 class ArtistArtworkDetailResource(Resource):
     @jwt_required()
     @role_required(['artist'])
@@ -92,6 +197,9 @@ class ArtistArtworkDetailResource(Resource):
 
         data = request.get_json()
         
+        if 'image_public_id' in data:
+            replace_artwork_image(artwork, data['image_public_id'])
+
         # Update fields
         updatable_fields = ['title', 'description', 'price', 'category', 'image_url', 'is_available']
         for field in updatable_fields:
@@ -99,6 +207,7 @@ class ArtistArtworkDetailResource(Resource):
                 setattr(artwork, field, data[field])
 
         db.session.commit()
+        notify_artworks_changed(artist_id, [artwork.id])
         return artwork_schema.dump(artwork), 200
 
     @jwt_required()
@@ -112,12 +221,15 @@ class ArtistArtworkDetailResource(Resource):
         if not artwork:
             return {'message': 'Artwork not found'}, 404
 
-        # Delete image from Cloudinary if exists
-        if artwork.image_public_id:
-            CloudinaryService.delete_image(artwork.image_public_id)
-
+        public_id = artwork.image_public_id
         db.session.delete(artwork)
+        db.session.flush()
+
+        # Queue the image for deletion once no other artwork uses it
+        if CloudinaryService.release_image(public_id):
+            ImageDeletionService.enqueue([public_id])
         db.session.commit()
+        notify_artworks_changed(artist_id, [artwork_id])
 
         return {'message': 'Artwork deleted successfully'}, 200
 
@@ -127,6 +239,11 @@ class UploadImageResource(Resource):
     @handle_api_errors
     def post(self):
         """Upload artwork image to Cloudinary"""
+        # Must run before request.files streams the body in
+        limit_error = apply_upload_limit(get_current_user().role)
+        if limit_error:
+            return limit_error
+
         if 'file' not in request.files:
             return {'message': 'No file provided'}, 400
 
@@ -134,16 +251,199 @@ class UploadImageResource(Resource):
         if file.filename == '':
             return {'message': 'No file selected'}, 400
 
+        if getattr(file.stream, 'sniffed_type', None) is None:
+            return {'message': 'File is not a supported image (JPEG, PNG, GIF or WebP)'}, 415
+
         try:
-            upload_result = CloudinaryService.upload_image(file)
-            return {
-                'image_url': upload_result['url'],
-                'public_id': upload_result['public_id'],
-                'message': 'Image uploaded successfully'
-            }, 200
+            upload_result = CloudinaryService.upload_image(file, get_jwt_identity())
+            return upload_response(upload_result), 200
         except Exception as e:
             return {'message': f'Image upload failed: {str(e)}'}, 500
 
+class BatchUploadImagesResource(Resource):
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def post(self):
+        """Upload several artwork images in one request"""
+        # Must run before request.files streams the body in
+        max_bytes = current_app.config['BATCH_UPLOAD_MAX_BYTES']
+        if request.content_length is not None and request.content_length > max_bytes:
+            return {'message': f'Upload exceeds the limit of {max_bytes} bytes'}, 413
+        request.max_content_length = max_bytes
+
+        files = [file for file in request.files.getlist('files') if file.filename]
+        if not files:
+            return {'message': 'No files provided'}, 400
+
+        max_files = current_app.config['BATCH_UPLOAD_MAX_FILES']
+        if len(files) > max_files:
+            return {'message': f'At most {max_files} files can be uploaded at once'}, 400
+
+        results = BatchUploadService.upload_many(files, get_jwt_identity(), upload_limit(get_current_user().role))
+        failed = sum(1 for result in results if not result['ok'])
+
+        # 207 tells the client to check each result
+        return {
+            'results': results,
+            'uploaded': len(results) - failed,
+            'failed': failed
+        }, 207 if failed else 200
+
+class DirectUploadResource(Resource):
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def post(self):
+        """Issue signed parameters for uploading an image directly to Cloudinary"""
+        artist_id = get_jwt_identity()
+        return CloudinaryService.create_signed_upload(artist_id), 200
+
+class DirectUploadCompleteResource(Resource):
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def post(self):
+        """Verify a direct upload and optionally attach it to an artwork"""
+        artist_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        if not data.get('upload_token'):
+            return {'message': 'upload_token is required'}, 400
+
+        artwork = None
+        if data.get('artwork_id'):
+            artwork = Artwork.query.filter_by(id=data['artwork_id'], artist_id=artist_id).first()
+            if not artwork:
+                return {'message': 'Artwork not found'}, 404
+
+        upload_result = CloudinaryService.complete_signed_upload(data['upload_token'], artist_id)
+        response = upload_response(upload_result)
+
+        if artwork:
+            replace_artwork_image(artwork, upload_result['public_id'])
+            artwork.image_url = upload_result['url']
+            db.session.commit()
+            response['artwork'] = artwork_schema.dump(artwork)
+
+        return response, 200
+
+class ResumableUploadsResource(Resource):
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def post(self):
+        """Start a resumable upload of Upload-Length bytes"""
+        artist_id = get_jwt_identity()
+        headers = {'Tus-Resumable': TUS_VERSION}
+
+        try:
+            upload_length = int(request.headers['Upload-Length'])
+        except (KeyError, ValueError):
+            return {'message': 'Upload-Length header is required'}, 400, headers
+        if upload_length <= 0:
+            return {'message': 'Upload-Length must be positive'}, 400, headers
+
+        limit = upload_limit(get_current_user().role)
+        if upload_length > limit:
+            return {'message': f'Upload exceeds the limit of {limit} bytes'}, 413, headers
+
+        metadata = parse_upload_metadata(request.headers.get('Upload-Metadata'))
+        upload = ResumableUploadService.create(artist_id, upload_length, filename=metadata.get('filename'))
+
+        upload_url = f"{request.base_url.rstrip('/')}/{upload.id}"
+        headers.update({'Location': upload_url, 'Upload-Offset': '0'})
+        return {
+            'id': str(upload.id),
+            'upload_url': upload_url,
+            'upload_offset': 0,
+            'upload_length': upload_length,
+            'expires_at': upload.expires_at.isoformat()
+        }, 201, headers
+
+class ResumableUploadResource(Resource):
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def head(self, upload_id):
+        """Report how many bytes of an upload have been received"""
+        headers = {'Tus-Resumable': TUS_VERSION, 'Cache-Control': 'no-store'}
+        upload = ResumableUploadService.get(upload_id, get_jwt_identity())
+        if not upload:
+            return '', 404, headers
+
+        headers.update({
+            'Upload-Offset': str(upload.upload_offset),
+            'Upload-Length': str(upload.upload_length),
+            'Upload-Expires': upload.expires_at.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        })
+        return '', 200, headers
+
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def patch(self, upload_id):
+        """Append a chunk at Upload-Offset; the last chunk completes the upload"""
+        headers = {'Tus-Resumable': TUS_VERSION}
+        upload = ResumableUploadService.get(upload_id, get_jwt_identity())
+        if not upload:
+            return {'message': 'Upload not found'}, 404, headers
+        if upload.completed_at:
+            return ResumableUploadResource._already_complete(upload, headers)
+
+        if request.mimetype != 'application/offset+octet-stream':
+            return {'message': 'Content-Type must be application/offset+octet-stream'}, 415, headers
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return {'message': 'Upload-Offset header is required'}, 400, headers
+
+        with ResumableUploadService.locked(upload) as part:
+            if upload.completed_at:  # Finished by a request that got the lock first
+                return ResumableUploadResource._already_complete(upload, headers)
+            if part is None:
+                return {'message': 'Another chunk is being written to this upload'}, 409, headers
+            if offset != upload.upload_offset:
+                headers['Upload-Offset'] = str(upload.upload_offset)
+                return {'message': f'Upload-Offset does not match, expected {upload.upload_offset}'}, 409, headers
+
+            # Cap the body at the bytes still missing before it is read
+            remaining = upload.upload_length - upload.upload_offset
+            if request.content_length is not None and request.content_length > remaining:
+                return {'message': f'Chunk exceeds the remaining {remaining} bytes'}, 413, headers
+            request.max_content_length = remaining
+
+            headers['Upload-Offset'] = str(ResumableUploadService.append(upload, part, request.stream))
+            if upload.upload_offset < upload.upload_length:
+                return '', 204, headers
+
+            try:
+                upload_result = ResumableUploadService.complete(upload, part)
+            except ValueError as e:
+                ResumableUploadService.terminate(upload)
+                return {'message': str(e)}, 415, headers
+
+        return upload_response(upload_result), 200, headers
+
+    @staticmethod
+    def _already_complete(upload, headers):
+        # A retried final chunk; HEAD reports the finished upload
+        headers['Upload-Offset'] = str(upload.upload_offset)
+        return {'message': 'Upload is already complete'}, 409, headers
+
+    @jwt_required()
+    @role_required(['artist'])
+    @handle_api_errors
+    def delete(self, upload_id):
+        """Abandon an upload"""
+        headers = {'Tus-Resumable': TUS_VERSION}
+        upload = ResumableUploadService.get(upload_id, get_jwt_identity())
+        if not upload:
+            return {'message': 'Upload not found'}, 404, headers
+
+        ResumableUploadService.terminate(upload)
+        return '', 204, headers
+
 class ArtistStatsResource(Resource):
     @jwt_required()
     @role_required(['artist'])
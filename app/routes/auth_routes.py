@@ -1,16 +1,34 @@
 from flask import request
 from flask_restful import Resource
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import get_current_user, get_jwt, jwt_required
 from marshmallow import ValidationError
 from ..extensions import db
 from ..models.user import User, UserSchema
+from ..utils.carts import GUEST_CART_HEADER, CartService
 from ..utils.decorators import handle_api_errors
+from ..utils.passwords import PasswordHasher, PasswordHasherBusy
+from ..utils.tokens import TokenReuseError, TokenService
 from ..utils.validators import validate_email, validate_password
 
 
 user_schema = UserSchema()
 
 
+def merge_guest_cart(data, user):
+    """Merge the caller's guest cart, if they sent one, into the user's; never fails the login"""
+    token = data.get('guestCartToken') or request.headers.get(GUEST_CART_HEADER)
+    if not token:
+        return {}
+    try:
+        return {"cart_merge": CartService.merge_guest_cart(token, user.id)}
+    except ValueError as e:
+        return {"cart_merge": {"error": str(e)}}
+    except Exception as e:
+        db.session.rollback()
+        print(f"Guest cart merge error: {str(e)}")  # Debug log
+        return {"cart_merge": {"error": "Guest cart could not be merged"}}
+
+
 class RegisterResource(Resource):
     def post(self):
         try:
@@ -44,18 +62,22 @@ class RegisterResource(Resource):
                 full_name=data['fullName'],
                 role=data['role']
             )
-            user.set_password(data['password'])
+            try:
+                user.set_password(data['password'])
+            except PasswordHasherBusy as e:
+                return {"message": str(e)}, 503, {"Retry-After": "1"}
 
             db.session.add(user)
             db.session.commit()
             print(f"User created: {user.id}")  # Debug log
 
-            # Create access token
-            access_token = create_access_token(identity=str(user.id))
+            # Create access and refresh tokens
+            tokens = TokenService.issue(user)
 
             return {
                 "user": user_schema.dump(user),
-                "access_token": access_token,
+                **tokens,
+                **merge_guest_cart(data, user),
                 "message": "Account created successfully"
             }, 201
             
@@ -76,17 +98,49 @@ class LoginResource(Resource):
 
             user = User.query.filter_by(email=data['email'], is_active=True).first()
             
-            if not user or not user.check_password(data['password']):
-                return {"message": "Invalid email or password"}, 401
-
-            access_token = create_access_token(identity=str(user.id))
+            try:
+                if not user or not user.check_password(data['password']):
+                    return {"message": "Invalid email or password"}, 401
+            except PasswordHasherBusy as e:
+                return {"message": str(e)}, 503, {"Retry-After": "1"}
+
+            if PasswordHasher.needs_rehash(user.password_hash):
+                # PASSWORD_HASH_METHOD changed since this hash was made; upgrade it now we have the password
+                try:
+                    user.set_password(data['password'])
+                    db.session.commit()
+                except PasswordHasherBusy:
+                    pass  # Next login will try again
+
+            tokens = TokenService.issue(user)
             
             return {
                 "user": user_schema.dump(user),
-                "access_token": access_token,
+                **tokens,
+                **merge_guest_cart(data, user),
                 "message": "Login successful"
             }, 200
             
         except Exception as e:
             print(f"Login error: {str(e)}")  # Debug log
-            return {"message": f"Login failed: {str(e)}"}, 500
\ No newline at end of file
+            return {"message": f"Login failed: {str(e)}"}, 500
+
+
+class RefreshResource(Resource):
+    @jwt_required(refresh=True)
+    @handle_api_errors
+    def post(self):
+        """Exchange a refresh token for a new access and refresh token"""
+        try:
+            return TokenService.rotate(get_jwt(), get_current_user()), 200
+        except TokenReuseError as e:
+            return {"message": str(e)}, 401
+
+
+class LogoutResource(Resource):
+    @jwt_required(verify_type=False)
+    @handle_api_errors
+    def post(self):
+        """Revoke the session the presented access or refresh token belongs to"""
+        TokenService.revoke(get_jwt())
+        return {"message": "Logged out"}, 200
\ No newline at end of file
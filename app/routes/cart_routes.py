@@ -1,33 +1,62 @@
+import uuid
+from datetime import datetime
 from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from werkzeug.exceptions import Unauthorized
+from sqlalchemy import delete, literal, select, update
 from ..extensions import db
-from ..models.cart import Cart, CartItem, CartSchema
+from ..models.cart import Cart, CartItem, CartItemSchema, CartSchema
 from ..models.artwork import Artwork
 from ..models.user import User
+from ..utils.cart_totals import CartTotals
+from ..utils.carts import GUEST_CART_HEADER, CartService
 from ..utils.decorators import handle_api_errors
+from ..utils.helpers import delta_response, upsert_insert, wants_delta
 
 cart_schema = CartSchema()
+cart_item_delta_schema = CartItemSchema(exclude=('artwork',))
+
+def cart_owner():
+    """The caller's cart: the signed-in user's, or else the guest cart named by X-Guest-Cart"""
+    user_id = get_jwt_identity()
+    if user_id:
+        return {'user_id': user_id}
+    token = request.headers.get(GUEST_CART_HEADER)
+    if not token:
+        raise Unauthorized(f"Log in or send a guest cart token in {GUEST_CART_HEADER}")
+    return {'id': CartService.guest_cart_id(token)}
+
+def cart_response(cart_id, artwork_id, status, item=None):
+    """Recompute the cart's totals and commit a change to one item
+
+    Returns the whole cart, or if asked just the item (None if removed),
+    the cart's new version and its totals.
+    """
+    totals = CartTotals.refresh(cart_id)
+    db.session.commit()
+    if wants_delta():
+        return delta_response({
+            'cart_id': str(cart_id),
+            'version': totals.version,
+            'artwork_id': str(artwork_id),
+            'item': cart_item_delta_schema.dump(item) if item is not None else None,
+            'summary': CartTotals.summary(totals)
+        }, status)
+    return cart_schema.dump(db.session.get(Cart, cart_id)), status
 
 class CartResource(Resource):
-    @jwt_required()
+    @jwt_required(optional=True)
     @handle_api_errors
     def get(self):
-        user_id = get_jwt_identity()
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        
-        if not cart:
-            cart = Cart(user_id=user_id)
-            db.session.add(cart)
-            db.session.commit()
-        
+        cart = CartService.get_or_create(cart_owner())
         return cart_schema.dump(cart), 200
 
-    @jwt_required()
+    @jwt_required(optional=True)
     @handle_api_errors
     def post(self):
-        user_id = get_jwt_identity()
+        owner = cart_owner()
         data = request.get_json()
         
         artwork_id = data.get('artworkId')
@@ -35,70 +64,102 @@ class CartResource(Resource):
         
         if not artwork_id:
             return {"message": "artworkId is required"}, 400
+        if not isinstance(quantity, int) or quantity < 1:
+            return {"message": "Valid quantity is required"}, 400
         
-        # Verify artwork exists and is available
-        artwork = Artwork.query.filter_by(id=artwork_id, is_available=True).first()
-        if not artwork:
+        # Get or create the cart, then add the artwork if it is available or
+        # add to the quantity already there, then refresh the totals; safe when concurrent
+        cart_id, _version = CartService.upsert(owner)
+        available = select(
+            literal(uuid.uuid4(), CartItem.id.type), literal(cart_id, CartItem.cart_id.type), Artwork.id,
+            literal(quantity), Artwork.price, literal(datetime.utcnow())
+        ).where(Artwork.id == artwork_id, Artwork.is_available.is_(True))
+        statement = upsert_insert(CartItem).from_select(
+            ['id', 'cart_id', 'artwork_id', 'quantity', 'price_at_add', 'added_at'], available
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.artwork_id],
+            set_={'quantity': CartItem.quantity + statement.excluded.quantity, 'price_at_add': statement.excluded.price_at_add}
+        )
+        item = db.session.execute(statement.returning(*CartItem.__table__.c)).first()
+        if item is None:
+            db.session.rollback()
             return {"message": "Artwork not found or unavailable"}, 404
         
-        # Get or create cart
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        if not cart:
-            cart = Cart(user_id=user_id)
-            db.session.add(cart)
-            db.session.flush()
-        
-        # Check if item already in cart
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, artwork_id=artwork_id).first()
-        if cart_item:
-            cart_item.quantity += quantity
-        else:
-            cart_item = CartItem(cart_id=cart.id, artwork_id=artwork_id, quantity=quantity)
-            db.session.add(cart_item)
-        
-        db.session.commit()
-        return cart_schema.dump(cart), 201
+        return cart_response(cart_id, artwork_id, 201, item)
 
 class CartItemResource(Resource):
-    @jwt_required()
+    @jwt_required(optional=True)
     @handle_api_errors
     def patch(self, artwork_id):
-        user_id = get_jwt_identity()
+        owner = cart_owner()
         data = request.get_json()
         quantity = data.get('quantity')
         
         if quantity is None or quantity < 0:
             return {"message": "Valid quantity is required"}, 400
         
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        if not cart:
+        cart = CartService.bump(owner)
+        if cart is None:
             return {"message": "Cart not found"}, 404
         
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, artwork_id=artwork_id).first()
-        if not cart_item:
-            return {"message": "Item not found in cart"}, 404
-        
+        item_filter = (CartItem.cart_id == cart.id) & (CartItem.artwork_id == artwork_id)
         if quantity == 0:
-            db.session.delete(cart_item)
+            item = None
+            changed = db.session.execute(delete(CartItem).where(item_filter)).rowcount
         else:
-            cart_item.quantity = quantity
+            item = db.session.execute(
+                update(CartItem).where(item_filter).values(quantity=quantity).returning(*CartItem.__table__.c)
+            ).first()
+            changed = item is not None
+        if not changed:
+            db.session.rollback()
+            return {"message": "Item not found in cart"}, 404
         
-        db.session.commit()
-        return cart_schema.dump(cart), 200
+        return cart_response(cart.id, artwork_id, 200, item)
 
-    @jwt_required()
+    @jwt_required(optional=True)
     @handle_api_errors
     def delete(self, artwork_id):
-        user_id = get_jwt_identity()
+        owner = cart_owner()
         
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        if not cart:
+        cart = CartService.bump(owner)
+        if cart is None:
             return {"message": "Cart not found"}, 404
         
-        cart_item = CartItem.query.filter_by(cart_id=cart.id, artwork_id=artwork_id).first()
-        if not cart_item:
+        statement = delete(CartItem).where(CartItem.cart_id == cart.id, CartItem.artwork_id == artwork_id)
+        if db.session.execute(statement).rowcount == 0:
+            db.session.rollback()
             return {"message": "Item not found in cart"}, 404
         
-        db.session.delete(cart_item)
-        db.session.commit()
-        return cart_schema.dump(cart), 200
\ No newline at end of file
+        return cart_response(cart.id, artwork_id, 200)
+
+class CartSummaryResource(Resource):
+    @jwt_required(optional=True)
+    @handle_api_errors
+    def get(self):
+        """Cached totals, plus the items whose price or availability changed since being added"""
+        cart = db.session.execute(select(*CartTotals.columns()).where(CartService.owner_filter(cart_owner()))).first()
+        if cart is None:
+            return {'cart_id': None, 'version': 0, 'item_count': 0, 'subtotal': 0.0,
+                    'unavailable_count': 0, 'price_changed_count': 0, 'changed_items': []}, 200
+
+        changed = CartTotals.changed_items(cart.id) if cart.unavailable_count or cart.price_changed_count else []
+        return dict(
+            CartTotals.summary(cart), cart_id=str(cart.id), version=cart.version, changed_items=changed
+        ), 200, {'ETag': f'W/"{cart.version}"'}
+
+class GuestCartResource(Resource):
+    def post(self):
+        """Start a guest cart; send the token in X-Guest-Cart to use it"""
+        return {'guest_token': CartService.issue_guest_token(), 'header': GUEST_CART_HEADER}, 201
+
+class CartMergeResource(Resource):
+    @jwt_required()
+    @handle_api_errors
+    def post(self):
+        """Merge the guest cart named by X-Guest-Cart (or guestCartToken) into the user's cart"""
+        token = (request.get_json(silent=True) or {}).get('guestCartToken') or request.headers.get(GUEST_CART_HEADER)
+        if not token:
+            return {"message": "guestCartToken is required"}, 400
+        return CartService.merge_guest_cart(token, get_jwt_identity()), 200
\ No newline at end of file
@@ -7,6 +7,7 @@ from ..models.order import Order
 from ..models.user import User
 from ..utils.decorators import role_required, handle_api_errors
 from ..utils.helpers import paginate_query
+from ..utils.reservations import ReservationService
 
 artwork_schema = ArtworkSchema()
 artworks_schema = ArtworkSchema(many=True)
@@ -19,7 +20,9 @@ class CustomerArtworksResource(Resource):
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 12, type=int)
 
-        query = Artwork.query.filter_by(is_available=True).order_by(Artwork.created_at.desc())
+        query = Artwork.query.filter_by(is_available=True).\
+            filter(ReservationService.unreserved(get_jwt_identity())).\
+            order_by(Artwork.created_at.desc())
         pagination = paginate_query(query, page, per_page)
 
         artworks = artworks_schema.dump(pagination.items)
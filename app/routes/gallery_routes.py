@@ -1,11 +1,13 @@
-from flask import request
+from flask import Response, request, stream_with_context
 from flask_restful import Resource
 from sqlalchemy import or_
 from ..extensions import db
 from ..models.artwork import Artwork, ArtworkSchema
 from ..models.user import User
 from ..utils.helpers import paginate_query
+from ..utils.reservations import ReservationService
 from ..utils.decorators import handle_api_errors
+from ..utils.artwork_export import ArtworkExportService, EXPORT_FORMATS, parse_watermark
 
 artwork_schema = ArtworkSchema()
 artworks_schema = ArtworkSchema(many=True)
@@ -37,7 +39,7 @@ class GalleryResource(Resource):
         min_price = request.args.get('minPrice', type=float)
         max_price = request.args.get('maxPrice', type=float)
 
-        query = Artwork.query.filter_by(is_available=True)
+        query = Artwork.query.filter_by(is_available=True).filter(ReservationService.unreserved())
 
         # Apply filters
         if category and category != 'All Categories':
@@ -94,4 +96,37 @@ class CategoriesResource(Resource):
         ).all()
         
         category_list = [cat[0] for cat in categories]
-        return {"categories": category_list}, 200
\ No newline at end of file
+        return {"categories": category_list}, 200
+
+class ArtworkExportResource(Resource):
+    @handle_api_errors
+    def get(self):
+        """Stream the catalog as NDJSON or CSV
+
+        Pass the X-Export-Watermark of one export as ``updated_since`` to the
+        next to get only what changed in between.
+        """
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return {"message": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400
+
+        updated_since = request.args.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = parse_watermark(updated_since)
+            except ValueError:
+                return {"message": "updated_since must be an ISO 8601 timestamp"}, 400
+
+        until = ArtworkExportService.watermark()
+        chunks = ArtworkExportService.generate(
+            fmt, until, category=request.args.get('category'), updated_since=updated_since or None
+        )
+        return Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={
+                'X-Export-Watermark': until.isoformat(),
+                'Content-Disposition': f'attachment; filename=artworks.{fmt}',
+                'Cache-Control': 'no-store'
+            }
+        )
\ No newline at end of file
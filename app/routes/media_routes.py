@@ -0,0 +1,64 @@
+import os
+from flask import Blueprint, request, send_file, abort, current_app
+from ..utils.storage import get_storage, LocalStorage
+from ..utils.cloudinary_service import CloudinaryService
+
+media_bp = Blueprint('media', __name__)
+
+
+def _local_storage():
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        abort(404)
+    return storage
+
+
+@media_bp.route('/<path:public_id>')
+def serve_image(public_id):
+    """Serve a stored image, resized on demand with ?w=<width>"""
+    storage = _local_storage()
+    width = request.args.get('w', type=int)
+
+    try:
+        if width:
+            path = storage.rendition_path(public_id, storage.rendition_width(width))
+        else:
+            path = storage.original_path(public_id)
+    except (ValueError, FileNotFoundError):
+        abort(404)
+
+    if not path or not os.path.exists(path):
+        abort(404)
+
+    # send_file hands the open file to the server's wsgi.file_wrapper (sendfile)
+    # or to the front-end proxy when USE_X_SENDFILE is enabled
+    response = send_file(
+        path,
+        mimetype='image/jpeg',
+        conditional=True,
+        max_age=current_app.config['MEDIA_CACHE_MAX_AGE']
+    )
+    # Public IDs are never reused, so every URL is immutable
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@media_bp.route('/upload', methods=['POST'])
+def direct_upload():
+    """Accept a direct upload signed by LocalStorage.create_signed_upload"""
+    storage = _local_storage()
+    public_id = request.form.get('public_id', '')
+    expires_at = request.form.get('expires_at', '0')
+
+    try:
+        storage.verify_signed_upload(public_id, expires_at, request.form.get('signature', ''))
+    except ValueError as e:
+        return {'message': str(e)}, 400
+
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        return {'message': 'No file provided'}, 400
+
+    optimized_image = CloudinaryService.optimize_image(file.stream)
+    return storage.save(optimized_image, public_id), 201
@@ -1,6 +1,6 @@
 from flask import request
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
 from marshmallow import ValidationError
 import stripe
 import os
@@ -14,6 +14,8 @@ from ..models.user import User
 from ..utils.decorators import handle_api_errors
 from ..utils.helpers import paginate_query
 from ..utils.email_service import EmailService
+from ..utils.orders import CartUnavailableError, OrderService
+from ..utils.reservations import ReservationService
 
 order_schema = OrderSchema()
 orders_schema = OrderSchema(many=True)
@@ -21,13 +23,17 @@ payment_schema = PaymentSchema()
 delivery_schema = DeliverySchema()
 notification_schema = NotificationSchema()
 
+# Once an order is processing its artworks are on their way; they can't go back on sale
+CANCELLABLE_STATUSES = {'pending', 'confirmed'}
+CANCELLING_ROLES = {'collector', 'admin'}
+
 class OrdersResource(Resource):
     @jwt_required()
     @handle_api_errors
     def get(self):
         """Get orders based on user role"""
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
 
@@ -66,11 +72,10 @@ class OrdersResource(Resource):
             return {'message': 'Order items are required'}, 400
 
         # Validate shipping details
-        shipping_required = ['fullName', 'address', 'city', 'country', 'postalCode']
         shipping_details = data.get('shipping_details', {})
-        for field in shipping_required:
-            if not shipping_details.get(field):
-                return {'message': f'Shipping {field} is required'}, 400
+        shipping_error = OrderService.shipping_error(shipping_details)
+        if shipping_error:
+            return {'message': shipping_error}, 400
 
         # Calculate total and validate artworks
         total_amount = 0
@@ -80,7 +85,8 @@ class OrdersResource(Resource):
             artwork_id = item.get('artwork_id')
             quantity = item.get('quantity', 1)
 
-            artwork = Artwork.query.filter_by(id=artwork_id, is_available=True).first()
+            artwork = Artwork.query.filter_by(id=artwork_id, is_available=True).\
+                filter(ReservationService.unreserved(user_id)).first()
             if not artwork:
                 return {'message': f'Artwork {artwork_id} not found or unavailable'}, 404
 
@@ -106,7 +112,14 @@ class OrdersResource(Resource):
         )
 
         db.session.add(order)
+        db.session.flush()
+        sold = ReservationService.mark_sold(user_id, order.id)
+        if sold is None:
+            # Sold or held for checkout since it was looked up above
+            db.session.rollback()
+            return {'message': 'Some artworks are no longer available'}, 409
         db.session.commit()
+        ReservationService.notify(sold)
 
         # Send order confirmation email
         try:
@@ -117,25 +130,55 @@ class OrdersResource(Resource):
 
         return order_schema.dump(order), 201
 
+class CheckoutResource(Resource):
+    @jwt_required()
+    @handle_api_errors
+    def post(self):
+        """Place an order for everything in the user's cart, emptying the cart"""
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+
+        shipping_details = data.get('shipping_details') or {}
+        shipping_error = OrderService.shipping_error(shipping_details)
+        if shipping_error:
+            return {'message': shipping_error}, 400
+
+        try:
+            order_id = OrderService.checkout(user_id, shipping_details)
+        except CartUnavailableError as e:
+            return {'message': str(e), 'unavailable_items': e.items}, 409
+
+        return order_schema.dump(OrderService.get(order_id)), 201
+
+class CheckoutHoldResource(Resource):
+    @jwt_required()
+    @handle_api_errors
+    def post(self):
+        """Hold the artworks in the user's cart while they enter shipping and payment details"""
+        try:
+            return OrderService.hold_cart(get_jwt_identity()), 200
+        except CartUnavailableError as e:
+            return {'message': str(e), 'unavailable_items': e.items}, 409
+
 class OrderDetailResource(Resource):
     @jwt_required()
     @handle_api_errors
     def get(self, order_id):
         """Get specific order details"""
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         order = Order.query.get(order_id)
         if not order:
             return {'message': 'Order not found'}, 404
 
         # Check permissions
-        if user.role == 'collector' and order.customer_id != user_id:
+        if user.role == 'collector' and str(order.customer_id) != user_id:
             return {'message': 'Access denied'}, 403
 
         if user.role == 'artist':
             # Check if artist has artworks in this order
-            has_artwork = any(item.artwork.artist_id == user_id for item in order.items)
+            has_artwork = any(str(item.artwork.artist_id) == user_id for item in order.items)
             if not has_artwork:
                 return {'message': 'Access denied'}, 403
 
@@ -146,7 +189,7 @@ class OrderDetailResource(Resource):
     def put(self, order_id):
         """Update order status"""
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         order = Order.query.get(order_id)
         if not order:
@@ -154,18 +197,30 @@ class OrderDetailResource(Resource):
 
         # Check permissions
         if user.role == 'artist':
-            has_artwork = any(item.artwork.artist_id == user_id for item in order.items)
+            has_artwork = any(str(item.artwork.artist_id) == user_id for item in order.items)
             if not has_artwork:
                 return {'message': 'Access denied'}, 403
-        elif user.role == 'collector' and order.customer_id != user_id:
+        elif user.role == 'collector' and str(order.customer_id) != user_id:
             return {'message': 'Access denied'}, 403
 
         data = request.get_json()
         new_status = data.get('status')
 
         if new_status and new_status in ['pending', 'confirmed', 'processing', 'shipped', 'delivered', 'cancelled']:
+            unsold = []
+            if order.status == 'cancelled' and new_status != 'cancelled':
+                # Its artworks went back on sale and may have been sold again
+                return {'message': 'A cancelled order cannot be reopened'}, 409
+            if new_status == 'cancelled' and order.status != 'cancelled':
+                if user.role not in CANCELLING_ROLES:
+                    return {'message': 'Only the customer or an admin can cancel an order'}, 403
+                if order.status not in CANCELLABLE_STATUSES:
+                    return {'message': f'An order that is {order.status} can no longer be cancelled'}, 409
+                # Put the artworks back on sale for other collectors
+                unsold = ReservationService.mark_unsold(order.id)
             order.status = new_status
             db.session.commit()
+            ReservationService.notify(unsold)
 
             # Create notification for customer
             notification = Notification(
@@ -1,12 +1,43 @@
+import uuid
+from datetime import datetime
 from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import delete, func, literal, select, update
 from ..extensions import db
-from ..models.wishlist import Wishlist, WishlistItem, WishlistSchema
+from ..models.wishlist import Wishlist, WishlistItem, WishlistItemSchema, WishlistSchema
 from ..models.artwork import Artwork
 from ..utils.decorators import handle_api_errors
+from ..utils.helpers import delta_response, upsert_insert, wants_delta
 
 wishlist_schema = WishlistSchema()
+wishlist_item_delta_schema = WishlistItemSchema(exclude=('artwork',))
+
+def upsert_wishlist(user_id):
+    """Create the user's wishlist or bump its version, in one statement; returns (id, version)"""
+    now = datetime.utcnow()
+    statement = upsert_insert(Wishlist).values(id=uuid.uuid4(), user_id=user_id, created_at=now, updated_at=now)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Wishlist.user_id], set_={'version': Wishlist.version + 1, 'updated_at': now}
+    )
+    return db.session.execute(statement.returning(Wishlist.id, Wishlist.version)).one()
+
+def wishlist_response(wishlist_id, version, artwork_id, status, item=None):
+    """Commit a change to one item and return the whole wishlist, or just the change if asked"""
+    if wants_delta():
+        item_count = db.session.execute(
+            select(func.count(WishlistItem.id)).where(WishlistItem.wishlist_id == wishlist_id)
+        ).scalar_one()
+        db.session.commit()
+        return delta_response({
+            'wishlist_id': str(wishlist_id),
+            'version': version,
+            'artwork_id': str(artwork_id),
+            'item': wishlist_item_delta_schema.dump(item) if item is not None else None,
+            'summary': {'item_count': item_count}
+        }, status)
+    db.session.commit()
+    return wishlist_schema.dump(db.session.get(Wishlist, wishlist_id)), status
 
 class WishlistResource(Resource):
     @jwt_required()
@@ -16,9 +47,9 @@ class WishlistResource(Resource):
         wishlist = Wishlist.query.filter_by(user_id=user_id).first()
         
         if not wishlist:
-            wishlist = Wishlist(user_id=user_id)
-            db.session.add(wishlist)
+            db.session.execute(upsert_insert(Wishlist).values(id=uuid.uuid4(), user_id=user_id).on_conflict_do_nothing())
             db.session.commit()
+            wishlist = Wishlist.query.filter_by(user_id=user_id).one()
         
         return wishlist_schema.dump(wishlist), 200
 
@@ -32,32 +63,22 @@ class WishlistResource(Resource):
         if not artwork_id:
             return {"message": "artworkId is required"}, 400
 
-        artwork = Artwork.query.filter_by(id=artwork_id, is_available=True).first()
-        if not artwork:
-            return {"message": "Artwork not found or unavailable"}, 404
-
-        wishlist = Wishlist.query.filter_by(user_id=user_id).first()
-        if not wishlist:
-            wishlist = Wishlist(user_id=user_id)
-            db.session.add(wishlist)
-            db.session.flush()
-
-        existing_item = WishlistItem.query.filter_by(
-            wishlist_id=wishlist.id, 
-            artwork_id=artwork_id
-        ).first()
-
-        if existing_item:
+        wishlist_id, version = upsert_wishlist(user_id)
+        available = select(
+            literal(uuid.uuid4(), WishlistItem.id.type), literal(wishlist_id, WishlistItem.wishlist_id.type), Artwork.id,
+            literal(datetime.utcnow())
+        ).where(Artwork.id == artwork_id, Artwork.is_available.is_(True))
+        statement = upsert_insert(WishlistItem).from_select(['id', 'wishlist_id', 'artwork_id', 'added_at'], available)
+        statement = statement.on_conflict_do_nothing(index_elements=[WishlistItem.wishlist_id, WishlistItem.artwork_id])
+        item = db.session.execute(statement.returning(*WishlistItem.__table__.c)).first()
+        if item is None:
+            # Nothing inserted: find out which of the two reasons it was
+            db.session.rollback()
+            if not Artwork.query.filter_by(id=artwork_id, is_available=True).first():
+                return {"message": "Artwork not found or unavailable"}, 404
             return {"message": "Item already in wishlist"}, 400
 
-        wishlist_item = WishlistItem(
-            wishlist_id=wishlist.id,
-            artwork_id=artwork_id
-        )
-        db.session.add(wishlist_item)
-        db.session.commit()
-
-        return wishlist_schema.dump(wishlist), 201
+        return wishlist_response(wishlist_id, version, artwork_id, 201, item)
 
 class WishlistItemResource(Resource):
     @jwt_required()
@@ -65,19 +86,14 @@ class WishlistItemResource(Resource):
     def delete(self, artwork_id):
         user_id = get_jwt_identity()
         
-        wishlist = Wishlist.query.filter_by(user_id=user_id).first()
-        if not wishlist:
+        statement = update(Wishlist).where(Wishlist.user_id == user_id).values(version=Wishlist.version + 1)
+        wishlist = db.session.execute(statement.returning(Wishlist.id, Wishlist.version)).first()
+        if wishlist is None:
             return {"message": "Wishlist not found"}, 404
 
-        wishlist_item = WishlistItem.query.filter_by(
-            wishlist_id=wishlist.id, 
-            artwork_id=artwork_id
-        ).first()
-
-        if not wishlist_item:
+        statement = delete(WishlistItem).where(WishlistItem.wishlist_id == wishlist.id, WishlistItem.artwork_id == artwork_id)
+        if db.session.execute(statement).rowcount == 0:
+            db.session.rollback()
             return {"message": "Item not found in wishlist"}, 404
 
-        db.session.delete(wishlist_item)
-        db.session.commit()
-
-        return wishlist_schema.dump(wishlist), 200
\ No newline at end of file
+        return wishlist_response(wishlist.id, wishlist.version, artwork_id, 200)
\ No newline at end of file
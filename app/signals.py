@@ -0,0 +1,17 @@
+from blinker import Namespace
+from flask import current_app
+
+_signals = Namespace()
+
+# Sent once per write (a single edit, a bulk update or an import batch) with
+# artist_id and artwork_ids, so caches can drop what they hold for them.
+artworks_changed = _signals.signal('artworks-changed')
+
+
+def notify_artworks_changed(artist_id, artwork_ids):
+    if artwork_ids:
+        artworks_changed.send(
+            current_app._get_current_object(),
+            artist_id=str(artist_id),
+            artwork_ids=[str(artwork_id) for artwork_id in artwork_ids]
+        )
\ No newline at end of file
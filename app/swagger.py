@@ -1,5 +1,6 @@
 from flask_restx import Api, Resource, fields
-from flask import Blueprint
+from flask import Blueprint, request
+from .utils.rate_limit import RatePolicy, rate_limited
 
 # Create blueprint for Swagger
 swagger_bp = Blueprint('swagger', __name__)
@@ -32,6 +33,12 @@ payments_ns = api.namespace('payments', description='Payment processing operatio
 cart_ns = api.namespace('cart', description='Cart operations')
 wishlist_ns = api.namespace('wishlist', description='Wishlist operations')
 
+# Rate limits, per client; applied to resources below with @rate_limited
+login_limit = RatePolicy('login', '10/minute', burst=5, key='ip')
+signup_limit = RatePolicy('signup', '5/hour', burst=3, key='ip')
+refresh_limit = RatePolicy('refresh', '30/minute', key='ip')
+search_limit = RatePolicy('search', '60/minute', burst=20, key='user', applies=lambda: bool(request.args.get('search')))
+
 # Common Models
 pagination_model = api.model('Pagination', {
     'page': fields.Integer(description='Current page number'),
@@ -43,22 +50,31 @@ pagination_model = api.model('Pagination', {
 # Auth Models
 login_model = api.model('Login', {
     'email': fields.String(required=True, description='User email'),
-    'password': fields.String(required=True, description='User password')
+    'password': fields.String(required=True, description='User password'),
+    'guestCartToken': fields.String(description='Guest cart to merge into the user\'s cart (or send X-Guest-Cart)')
 })
 
 register_model = api.model('Register', {
     'fullName': fields.String(required=True, description='User full name'),
     'email': fields.String(required=True, description='User email'),
     'password': fields.String(required=True, description='User password'),
-    'role': fields.String(required=True, description='User role (artist or collector)', enum=['artist', 'collector'])
+    'role': fields.String(required=True, description='User role (artist or collector)', enum=['artist', 'collector']),
+    'guestCartToken': fields.String(description='Guest cart to merge into the user\'s cart (or send X-Guest-Cart)')
 })
 
 auth_response_model = api.model('AuthResponse', {
     'user': fields.Raw(description='User object'),
     'access_token': fields.String(description='JWT access token'),
+    'refresh_token': fields.String(description='JWT refresh token; exchange at /auth/refresh'),
+    'cart_merge': fields.Raw(description='When a guest cart was sent: merged count and skipped artwork ids, or error'),
     'message': fields.String(description='Response message')
 })
 
+token_pair_model = api.model('TokenPair', {
+    'access_token': fields.String(description='New JWT access token'),
+    'refresh_token': fields.String(description='New JWT refresh token; the one sent is no longer valid')
+})
+
 # Artwork Models
 artwork_model = api.model('Artwork', {
     'id': fields.String(description='Artwork UUID'),
@@ -68,6 +84,10 @@ artwork_model = api.model('Artwork', {
     'category': fields.String(required=True, description='Artwork category', 
                              enum=['painting', 'sculpture', 'photography', 'digital', 'mixed-media', 'textile']),
     'image_url': fields.String(description='Artwork image URL'),
+    'image_public_id': fields.String(description='Public ID returned by the image upload'),
+    'placeholder': fields.String(description='Tiny base64 JPEG preview to show while the image loads'),
+    'dominant_color': fields.String(description='Dominant image colour as #rrggbb'),
+    'aspect_ratio': fields.Float(description='Image width divided by height'),
     'artist_id': fields.String(description='Artist UUID'),
     'is_available': fields.Boolean(description='Artwork availability status'),
     'created_at': fields.String(description='Creation timestamp'),
@@ -83,9 +103,75 @@ artwork_list_model = api.model('ArtworkList', {
 upload_response_model = api.model('UploadResponse', {
     'image_url': fields.String(description='Uploaded image URL'),
     'public_id': fields.String(description='Cloudinary public ID'),
+    'placeholder': fields.String(description='Tiny base64 JPEG preview to show while the image loads'),
+    'dominant_color': fields.String(description='Dominant image colour as #rrggbb'),
+    'aspect_ratio': fields.Float(description='Image width divided by height'),
+    'deduplicated': fields.Boolean(description='True if an identical image was already uploaded and reused'),
     'message': fields.String(description='Response message')
 })
 
+batch_upload_result_model = api.model('BatchUploadResult', {
+    'filename': fields.String(description='Name of the uploaded file'),
+    'ok': fields.Boolean(description='Whether this file was uploaded'),
+    'image_url': fields.String(description='Uploaded image URL'),
+    'public_id': fields.String(description='Image public ID'),
+    'placeholder': fields.String(description='Tiny base64 JPEG preview to show while the image loads'),
+    'dominant_color': fields.String(description='Dominant colour as #rrggbb'),
+    'aspect_ratio': fields.Float(description='Width divided by height'),
+    'deduplicated': fields.Boolean(description='True if an identical image was already uploaded and reused'),
+    'message': fields.String(description='Why the file failed')
+})
+
+batch_upload_response_model = api.model('BatchUploadResponse', {
+    'results': fields.List(fields.Nested(batch_upload_result_model), description='One result per file, in order'),
+    'uploaded': fields.Integer(description='Files uploaded'),
+    'failed': fields.Integer(description='Files that failed')
+})
+
+direct_upload_model = api.model('DirectUpload', {
+    'upload_url': fields.String(description='URL the client posts the file to'),
+    'fields': fields.Raw(description='Signed form fields to send along with the file'),
+    'public_id': fields.String(description='Public ID the image will be stored under'),
+    'upload_token': fields.String(description='Token to present when completing the upload'),
+    'expires_at': fields.Integer(description='Unix time after which the token is rejected')
+})
+
+complete_upload_model = api.model('CompleteUpload', {
+    'upload_token': fields.String(required=True, description='Token issued with the signed upload'),
+    'artwork_id': fields.String(description='Artwork UUID to attach the image to')
+})
+
+resumable_upload_model = api.model('ResumableUpload', {
+    'id': fields.String(description='Upload UUID'),
+    'upload_url': fields.String(description='URL to PATCH chunks to and HEAD for the current offset'),
+    'upload_offset': fields.Integer(description='Bytes received so far'),
+    'upload_length': fields.Integer(description='Total size of the upload in bytes'),
+    'expires_at': fields.String(description='When the upload is discarded if not continued')
+})
+
+bulk_update_model = api.model('BulkArtworkUpdate', {
+    'updates': fields.List(fields.Raw, description='Objects with an artwork id and the fields to change'),
+    'filter': fields.Raw(description='ids, category, is_available, price_min and/or price_max to match'),
+    'changes': fields.Raw(description='Fields to set on every match; price_multiplier scales the price')
+})
+
+bulk_update_result_model = api.model('BulkArtworkUpdateResult', {
+    'updated': fields.List(fields.String, description='IDs of the updated artworks'),
+    'count': fields.Integer(description='Number of artworks updated'),
+    'not_found': fields.List(fields.String, description='Requested IDs that are not this artist\'s artworks')
+})
+
+import_error_model = api.model('ImportError', {
+    'line': fields.Integer(description='Line of the input file the row starts on'),
+    'message': fields.String(description='Why the row was rejected')
+})
+
+import_summary_model = api.model('ImportSummary', {
+    'imported': fields.Integer(description='Artworks created'),
+    'failed': fields.Integer(description='Rows rejected'),
+    'errors': fields.List(fields.Nested(import_error_model), description='Rejected rows (capped)')
+})
+
 artist_stats_model = api.model('ArtistStats', {
     'total_artworks': fields.Integer(description='Total artworks'),
     'total_sales': fields.Float(description='Total sales'),
@@ -100,6 +186,9 @@ customer_artwork_model = api.model('CustomerArtwork', {
     'price': fields.Float(description='Artwork price'),
     'category': fields.String(description='Artwork category'),
     'image_url': fields.String(description='Artwork image URL'),
+    'placeholder': fields.String(description='Tiny base64 JPEG preview to show while the image loads'),
+    'dominant_color': fields.String(description='Dominant image colour as #rrggbb'),
+    'aspect_ratio': fields.Float(description='Image width divided by height'),
     'artist_id': fields.String(description='Artist UUID'),
     'artist': fields.String(description='Artist username'),
     'is_available': fields.Boolean(description='Artwork availability status'),
@@ -156,6 +245,15 @@ create_order_model = api.model('CreateOrder', {
     'shipping_details': fields.Raw(description='Shipping details')
 })
 
+checkout_model = api.model('Checkout', {
+    'shipping_details': fields.Raw(required=True, description='fullName, address, city, country and postalCode')
+})
+
+checkout_hold_model = api.model('CheckoutHold', {
+    'held': fields.List(fields.String, description='Artwork UUIDs held for this user'),
+    'expires_at': fields.String(description='When the holds lapse unless the order is placed')
+})
+
 update_order_status_model = api.model('UpdateOrderStatus', {
     'status': fields.String(description='New order status', enum=['pending', 'confirmed', 'processing', 'shipped', 'delivered', 'cancelled'])
 })
@@ -183,11 +281,48 @@ cart_item_model = api.model('CartItem', {
 cart_model = api.model('Cart', {
     'id': fields.String(description='Cart UUID'),
     'user_id': fields.String(description='User UUID'),
+    'version': fields.Integer(description='Incremented by every change to the items'),
     'created_at': fields.String(description='Creation timestamp'),
     'updated_at': fields.String(description='Last update timestamp'),
     'items': fields.List(fields.Nested(cart_item_model))
 })
 
+cart_summary_model = api.model('CartSummary', {
+    'cart_id': fields.String(description='Cart UUID, null if the user has no cart yet'),
+    'version': fields.Integer(description='Cart version, also sent as the ETag'),
+    'item_count': fields.Integer(description='Total quantity'),
+    'subtotal': fields.Float(description='Available items at current prices'),
+    'unavailable_count': fields.Integer(description='Items no longer available'),
+    'price_changed_count': fields.Integer(description='Items whose price changed since being added'),
+    'changed_items': fields.List(fields.Raw, description='Those items, with price_at_add, price and is_available')
+})
+
+# Carts can be used without logging in by sending a guest cart token
+guest_params = {
+    'X-Guest-Cart': {'in': 'header', 'description': 'Guest cart token from /cart/guest, when not logged in'}
+}
+
+guest_cart_model = api.model('GuestCart', {
+    'guest_token': fields.String(description='Signed guest cart token'),
+    'header': fields.String(description='Header to send it in')
+})
+
+merge_cart_model = api.model('MergeCart', {
+    'guestCartToken': fields.String(description='Guest cart token (or send X-Guest-Cart)')
+})
+
+cart_merge_model = api.model('CartMerge', {
+    'merged': fields.Integer(description='Items moved into the user\'s cart'),
+    'skipped': fields.List(fields.String, description='Artwork UUIDs no longer available')
+})
+
+# Cart and wishlist changes answer with just the changed item, the new
+# version (also the ETag) and a summary of the totals when asked to
+delta_params = {
+    'response': {'in': 'query', 'description': '"delta" for a minimal response'},
+    'Prefer': {'in': 'header', 'description': '"return=minimal" for a minimal response'}
+}
+
 add_to_cart_model = api.model('AddToCart', {
     'artworkId': fields.String(required=True, description='Artwork UUID'),
     'quantity': fields.Integer(description='Quantity', default=1)
@@ -209,6 +344,7 @@ wishlist_item_model = api.model('WishlistItem', {
 wishlist_model = api.model('Wishlist', {
     'id': fields.String(description='Wishlist UUID'),
     'user_id': fields.String(description='User UUID'),
+    'version': fields.Integer(description='Incremented by every change to the items'),
     'created_at': fields.String(description='Creation timestamp'),
     'updated_at': fields.String(description='Last update timestamp'),
     'items': fields.List(fields.Nested(wishlist_item_model))
@@ -228,6 +364,8 @@ class LoginResource(Resource):
     @auth_ns.response(200, 'Success', auth_response_model)
     @auth_ns.response(400, 'Validation error')
     @auth_ns.response(401, 'Invalid credentials')
+    @auth_ns.response(429, 'Too many requests')
+    @rate_limited(login_limit)
     def post(self):
         """User login"""
         return auth_routes.LoginResource().post()
@@ -238,10 +376,31 @@ class RegisterResource(Resource):
     @auth_ns.response(201, 'Created', auth_response_model)
     @auth_ns.response(400, 'Validation error')
     @auth_ns.response(409, 'User already exists')
+    @auth_ns.response(429, 'Too many requests')
+    @rate_limited(signup_limit)
     def post(self):
         """User registration"""
         return auth_routes.RegisterResource().post()
 
+@auth_ns.route('/refresh')
+class RefreshResource(Resource):
+    @auth_ns.doc(security='Bearer Auth')
+    @auth_ns.response(200, 'Success', token_pair_model)
+    @auth_ns.response(401, 'Refresh token expired, revoked or already used')
+    @auth_ns.response(429, 'Too many requests')
+    @rate_limited(refresh_limit)
+    def post(self):
+        """Rotate a refresh token (send it as the Bearer token)"""
+        return auth_routes.RefreshResource().post()
+
+@auth_ns.route('/logout')
+class LogoutResource(Resource):
+    @auth_ns.doc(security='Bearer Auth')
+    @auth_ns.response(200, 'Logged out')
+    def post(self):
+        """Revoke the current session's access and refresh tokens"""
+        return auth_routes.LogoutResource().post()
+
 # Artworks routes
 @artworks_ns.route('/')
 class GalleryResource(Resource):
@@ -253,10 +412,26 @@ class GalleryResource(Resource):
         'sort': 'Sort field'
     })
     @artworks_ns.response(200, 'Success', artwork_list_model)
+    @artworks_ns.response(429, 'Too many searches')
+    @rate_limited(search_limit)
     def get(self):
         """Get paginated artwork gallery"""
         return gallery_routes.GalleryResource().get()
 
+@artworks_ns.route('/export')
+class ArtworkExportResource(Resource):
+    @artworks_ns.doc(params={
+        'format': 'ndjson (default) or csv',
+        'category': 'Filter by category',
+        'updated_since': 'ISO 8601 timestamp; only artworks changed after it, including withdrawn ones. '
+                         'Deleted artworks are not reported; run a full export to reconcile them'
+    })
+    @artworks_ns.response(200, 'Export stream; X-Export-Watermark header holds the next updated_since')
+    @artworks_ns.response(400, 'Validation error')
+    def get(self):
+        """Export all available artworks as NDJSON or CSV"""
+        return gallery_routes.ArtworkExportResource().get()
+
 @artworks_ns.route('/<uuid:artwork_id>')
 class ArtworkDetailResource(Resource):
     @artworks_ns.response(200, 'Success', artwork_model)
@@ -290,6 +465,31 @@ class ArtistArtworkResource(Resource):
         """Create new artwork"""
         return artist_routes.ArtistArtworkResource().post()
 
+    @artists_ns.doc(security='Bearer Auth')
+    @artists_ns.expect(bulk_update_model)
+    @artists_ns.response(200, 'Success', bulk_update_result_model)
+    @artists_ns.response(400, 'Validation error')
+    @artists_ns.response(401, 'Unauthorized')
+    @artists_ns.response(403, 'Forbidden')
+    def patch(self):
+        """Update many artworks: per-artwork updates, or a filter plus one set of changes"""
+        return artist_routes.ArtistArtworkResource().patch()
+
+@artists_ns.route('/artworks/import')
+class ArtworkImportResource(Resource):
+    @artists_ns.doc(security='Bearer Auth', params={
+        'format': {'in': 'query', 'description': 'csv or ndjson; guessed from the content type or file name if omitted'}
+    })
+    @artists_ns.response(200, 'All rows imported', import_summary_model)
+    @artists_ns.response(207, 'Some rows were rejected', import_summary_model)
+    @artists_ns.response(400, 'Validation error')
+    @artists_ns.response(401, 'Unauthorized')
+    @artists_ns.response(403, 'Forbidden')
+    @artists_ns.response(413, 'File too large')
+    def post(self):
+        """Import artworks from CSV or NDJSON (multipart field "file" or raw body)"""
+        return artist_routes.ArtworkImportResource().post()
+
 @artists_ns.route('/artworks/<uuid:artwork_id>')
 class ArtistArtworkDetailResource(Resource):
     @artists_ns.doc(security='Bearer Auth')
@@ -332,6 +532,86 @@ class UploadImageResource(Resource):
         """Upload artwork image to Cloudinary"""
         return artist_routes.UploadImageResource().post()
 
+@artists_ns.route('/upload-images')
+class BatchUploadImagesResource(Resource):
+    @artists_ns.doc(security='Bearer Auth')
+    @artists_ns.response(200, 'All files uploaded', batch_upload_response_model)
+    @artists_ns.response(207, 'Some files failed, see each result', batch_upload_response_model)
+    @artists_ns.response(400, 'Validation error')
+    @artists_ns.response(401, 'Unauthorized')
+    @artists_ns.response(403, 'Forbidden')
+    @artists_ns.response(413, 'Upload too large')
+    def post(self):
+        """Upload several artwork images (multipart field "files", repeated)"""
+        return artist_routes.BatchUploadImagesResource().post()
+
+@artists_ns.route('/upload-image/sign')
+class DirectUploadResource(Resource):
+    @artists_ns.doc(security='Bearer Auth')
+    @artists_ns.response(200, 'Success', direct_upload_model)
+    @artists_ns.response(401, 'Unauthorized')
+    @artists_ns.response(403, 'Forbidden')
+    def post(self):
+        """Get signed parameters to upload an image directly to storage"""
+        return artist_routes.DirectUploadResource().post()
+
+@artists_ns.route('/upload-image/complete')
+class DirectUploadCompleteResource(Resource):
+    @artists_ns.doc(security='Bearer Auth')
+    @artists_ns.expect(complete_upload_model)
+    @artists_ns.response(200, 'Success', upload_response_model)
+    @artists_ns.response(400, 'Invalid or expired upload token')
+    @artists_ns.response(401, 'Unauthorized')
+    @artists_ns.response(403, 'Forbidden')
+    @artists_ns.response(404, 'Artwork not found')
+    def post(self):
+        """Confirm a direct upload and attach it to an artwork"""
+        return artist_routes.DirectUploadCompleteResource().post()
+
+@artists_ns.route('/uploads')
+class ResumableUploadsResource(Resource):
+    @artists_ns.doc(security='Bearer Auth', params={
+        'Upload-Length': {'in': 'header', 'description': 'Total size of the file in bytes', 'required': True},
+        'Upload-Metadata': {'in': 'header', 'description': 'tus metadata, e.g. "filename <base64>"'}
+    })
+    @artists_ns.response(201, 'Upload created', resumable_upload_model)
+    @artists_ns.response(400, 'Missing or invalid Upload-Length')
+    @artists_ns.response(401, 'Unauthorized')
+    @artists_ns.response(403, 'Forbidden')
+    @artists_ns.response(413, 'Upload too large')
+    def post(self):
+        """Start a resumable (tus-style) image upload"""
+        return artist_routes.ResumableUploadsResource().post()
+
+@artists_ns.route('/uploads/<string:upload_id>')
+class ResumableUploadResource(Resource):
+    @artists_ns.doc(security='Bearer Auth')
+    @artists_ns.response(200, 'Offset in the Upload-Offset header; equal to Upload-Length once complete')
+    @artists_ns.response(404, 'Upload not found or expired')
+    def head(self, upload_id):
+        """Get the offset to resume an upload from"""
+        return artist_routes.ResumableUploadResource().head(upload_id)
+
+    @artists_ns.doc(security='Bearer Auth', params={
+        'Upload-Offset': {'in': 'header', 'description': 'Offset the chunk starts at', 'required': True}
+    })
+    @artists_ns.response(200, 'Upload complete', upload_response_model)
+    @artists_ns.response(204, 'Chunk stored')
+    @artists_ns.response(404, 'Upload not found or expired')
+    @artists_ns.response(409, 'Offset mismatch, chunk already in progress, or upload already complete')
+    @artists_ns.response(413, 'Chunk larger than the remaining bytes')
+    @artists_ns.response(415, 'Wrong Content-Type or not a supported image')
+    def patch(self, upload_id):
+        """Upload a chunk (Content-Type: application/offset+octet-stream)"""
+        return artist_routes.ResumableUploadResource().patch(upload_id)
+
+    @artists_ns.doc(security='Bearer Auth')
+    @artists_ns.response(204, 'Upload discarded')
+    @artists_ns.response(404, 'Upload not found or expired')
+    def delete(self, upload_id):
+        """Abandon a resumable upload"""
+        return artist_routes.ResumableUploadResource().delete(upload_id)
+
 @artists_ns.route('/stats')
 class ArtistStatsResource(Resource):
     @artists_ns.doc(security='Bearer Auth')
@@ -386,10 +666,34 @@ class OrdersResource(Resource):
     @orders_ns.response(201, 'Created', order_model)
     @orders_ns.response(400, 'Validation error')
     @orders_ns.response(401, 'Unauthorized')
+    @orders_ns.response(409, 'Artworks were sold or reserved by another collector')
     def post(self):
         """Create new order"""
         return order_routes.OrdersResource().post()
 
+@orders_ns.route('/checkout')
+class CheckoutResource(Resource):
+    @orders_ns.doc(security='Bearer Auth')
+    @orders_ns.expect(checkout_model)
+    @orders_ns.response(201, 'Created', order_model)
+    @orders_ns.response(400, 'Validation error or empty cart')
+    @orders_ns.response(401, 'Unauthorized')
+    @orders_ns.response(409, 'Artworks in the cart are unavailable or reserved by another collector')
+    def post(self):
+        """Place an order for the user's cart"""
+        return order_routes.CheckoutResource().post()
+
+@orders_ns.route('/checkout/hold')
+class CheckoutHoldResource(Resource):
+    @orders_ns.doc(security='Bearer Auth')
+    @orders_ns.response(200, 'Success', checkout_hold_model)
+    @orders_ns.response(400, 'Empty cart')
+    @orders_ns.response(401, 'Unauthorized')
+    @orders_ns.response(409, 'Artworks in the cart are reserved by another collector')
+    def post(self):
+        """Hold the cart's artworks while checking out"""
+        return order_routes.CheckoutHoldResource().post()
+
 @orders_ns.route('/<uuid:order_id>')
 class OrderDetailResource(Resource):
     @orders_ns.doc(security='Bearer Auth')
@@ -407,6 +711,7 @@ class OrderDetailResource(Resource):
     @orders_ns.response(401, 'Unauthorized')
     @orders_ns.response(403, 'Forbidden')
     @orders_ns.response(404, 'Order not found')
+    @orders_ns.response(409, 'Order can no longer be cancelled, or is cancelled')
     def put(self, order_id):
         """Update order status"""
         return order_routes.OrderDetailResource().put(order_id)
@@ -434,14 +739,14 @@ class StripeWebhookResource(Resource):
 # Cart routes
 @cart_ns.route('/')
 class CartResource(Resource):
-    @cart_ns.doc(security='Bearer Auth')
+    @cart_ns.doc(security='Bearer Auth', params=guest_params)
     @cart_ns.response(200, 'Success', cart_model)
     @cart_ns.response(401, 'Unauthorized')
     def get(self):
         """Get user's cart"""
         return cart_routes.CartResource().get()
 
-    @cart_ns.doc(security='Bearer Auth')
+    @cart_ns.doc(security='Bearer Auth', params=dict(guest_params, **delta_params))
     @cart_ns.expect(add_to_cart_model)
     @cart_ns.response(201, 'Created', cart_model)
     @cart_ns.response(400, 'Validation error')
@@ -451,9 +756,36 @@ class CartResource(Resource):
         """Add item to cart"""
         return cart_routes.CartResource().post()
 
+@cart_ns.route('/guest')
+class GuestCartResource(Resource):
+    @cart_ns.response(201, 'Created', guest_cart_model)
+    def post(self):
+        """Start a guest cart"""
+        return cart_routes.GuestCartResource().post()
+
+@cart_ns.route('/merge')
+class CartMergeResource(Resource):
+    @cart_ns.doc(security='Bearer Auth', params=guest_params)
+    @cart_ns.expect(merge_cart_model)
+    @cart_ns.response(200, 'Success', cart_merge_model)
+    @cart_ns.response(400, 'Missing, invalid or expired guest cart token')
+    @cart_ns.response(401, 'Unauthorized')
+    def post(self):
+        """Merge a guest cart into the user's cart"""
+        return cart_routes.CartMergeResource().post()
+
+@cart_ns.route('/summary')
+class CartSummaryResource(Resource):
+    @cart_ns.doc(security='Bearer Auth', params=guest_params)
+    @cart_ns.response(200, 'Success', cart_summary_model)
+    @cart_ns.response(401, 'Unauthorized')
+    def get(self):
+        """Get cart totals and items whose price or availability changed"""
+        return cart_routes.CartSummaryResource().get()
+
 @cart_ns.route('/<uuid:artwork_id>')
 class CartItemResource(Resource):
-    @cart_ns.doc(security='Bearer Auth')
+    @cart_ns.doc(security='Bearer Auth', params=dict(guest_params, **delta_params))
     @cart_ns.expect(update_cart_item_model)
     @cart_ns.response(200, 'Success', cart_model)
     @cart_ns.response(400, 'Validation error')
@@ -463,7 +795,7 @@ class CartItemResource(Resource):
         """Update cart item quantity"""
         return cart_routes.CartItemResource().patch(artwork_id)
 
-    @cart_ns.doc(security='Bearer Auth')
+    @cart_ns.doc(security='Bearer Auth', params=dict(guest_params, **delta_params))
     @cart_ns.response(200, 'Success', cart_model)
     @cart_ns.response(401, 'Unauthorized')
     @cart_ns.response(404, 'Cart or item not found')
@@ -481,7 +813,7 @@ class WishlistResource(Resource):
         """Get user's wishlist"""
         return wishlist_routes.WishlistResource().get()
 
-    @wishlist_ns.doc(security='Bearer Auth')
+    @wishlist_ns.doc(security='Bearer Auth', params=delta_params)
     @wishlist_ns.expect(add_to_wishlist_model)
     @wishlist_ns.response(201, 'Created', wishlist_model)
     @wishlist_ns.response(400, 'Validation error')
@@ -493,7 +825,7 @@ class WishlistResource(Resource):
 
 @wishlist_ns.route('/<uuid:artwork_id>')
 class WishlistItemResource(Resource):
-    @wishlist_ns.doc(security='Bearer Auth')
+    @wishlist_ns.doc(security='Bearer Auth', params=delta_params)
     @wishlist_ns.response(200, 'Success', wishlist_model)
     @wishlist_ns.response(401, 'Unauthorized')
     @wishlist_ns.response(404, 'Wishlist or item not found')
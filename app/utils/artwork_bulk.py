@@ -0,0 +1,170 @@
+import uuid
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import func, update
+from ..extensions import db
+from ..models.artwork import Artwork
+from ..signals import notify_artworks_changed
+from .artwork_import import MAX_DESCRIPTION_LENGTH, MAX_PRICE
+from .validators import validate_price, validate_category
+
+UPDATABLE_FIELDS = ('title', 'description', 'price', 'category', 'image_url', 'is_available')
+FILTER_FIELDS = ('ids', 'category', 'is_available', 'price_min', 'price_max')
+MAX_PRICE_MULTIPLIER = 10
+
+
+def _parse_decimal(value, field):
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise ValidationError(f'{field} must be a number')
+    if not number.is_finite():
+        raise ValidationError(f'{field} must be a number')
+    return number
+
+
+def _parse_price(value, field='price'):
+    return _parse_decimal(value, field).quantize(Decimal('0.01'))
+
+
+def _parse_ids(ids):
+    if not isinstance(ids, list):
+        raise ValidationError('ids must be a list')
+    try:
+        return [uuid.UUID(str(artwork_id)) for artwork_id in ids]
+    except ValueError:
+        raise ValidationError('ids must be artwork UUIDs')
+
+
+class ArtworkBulkService:
+    """Set-based updates to many of an artist's artworks at once
+
+    Every statement is scoped to the artist, and artworks_changed is sent
+    once per call rather than once per artwork.
+    """
+
+    @staticmethod
+    def validate_changes(changes, allow_multiplier=False):
+        """Return the column values for a change set, raising ValidationError"""
+        if not isinstance(changes, dict) or not changes:
+            raise ValidationError('changes must be a non-empty object')
+
+        allowed = UPDATABLE_FIELDS + (('price_multiplier',) if allow_multiplier else ())
+        unknown = set(changes) - set(allowed)
+        if unknown:
+            raise ValidationError(f'Cannot change: {", ".join(sorted(unknown))}')
+        if 'price' in changes and 'price_multiplier' in changes:
+            raise ValidationError('Give either price or price_multiplier, not both')
+
+        values = dict(changes)
+        if 'title' in values and (not isinstance(values['title'], str) or not values['title'] or len(values['title']) > 200):
+            raise ValidationError('title must be a string of 1 to 200 characters')
+        if values.get('description') is not None and (
+                not isinstance(values['description'], str) or len(values['description']) > MAX_DESCRIPTION_LENGTH):
+            raise ValidationError(f'description must be a string of at most {MAX_DESCRIPTION_LENGTH} characters')
+        if values.get('image_url') is not None and (not isinstance(values['image_url'], str) or len(values['image_url']) > 1024):
+            raise ValidationError('image_url must be a string of at most 1024 characters')
+        if 'price' in values:
+            values['price'] = _parse_price(values['price'])
+            validate_price(values['price'])
+            if values['price'] >= MAX_PRICE:
+                raise ValidationError(f'Price must be less than {MAX_PRICE}')
+        if 'category' in values:
+            validate_category(str(values['category']))
+            values['category'] = str(values['category']).lower()
+        if 'is_available' in values and not isinstance(values['is_available'], bool):
+            raise ValidationError('is_available must be true or false')
+        if 'price_multiplier' in values:
+            factor = _parse_decimal(values.pop('price_multiplier'), 'price_multiplier')
+            if not 0 < factor <= MAX_PRICE_MULTIPLIER:
+                raise ValidationError(f'price_multiplier must be greater than 0 and at most {MAX_PRICE_MULTIPLIER}')
+            values['price'] = func.round(Artwork.price * factor, 2)
+        return values
+
+    @staticmethod
+    def update_many(artist_id, updates):
+        """Apply per-artwork change sets given as [{'id': ..., <field>: <value>}, ...]
+
+        Artworks that don't exist or belong to another artist are reported
+        in ``not_found``. Everything else is written in one executemany.
+        """
+        if not isinstance(updates, list) or not updates:
+            raise ValidationError('updates must be a non-empty list')
+        if len(updates) > current_app.config['BULK_UPDATE_MAX_ITEMS']:
+            raise ValidationError(f'At most {current_app.config["BULK_UPDATE_MAX_ITEMS"]} artworks can be updated at once')
+
+        rows = {}
+        for index, item in enumerate(updates):
+            if not isinstance(item, dict) or 'id' not in item:
+                raise ValidationError(f'updates[{index}] must be an object with an id')
+            changes = {key: value for key, value in item.items() if key != 'id'}
+            try:
+                artwork_id = _parse_ids([item['id']])[0]
+                rows[artwork_id] = dict(ArtworkBulkService.validate_changes(changes), id=artwork_id)
+            except ValidationError as e:
+                raise ValidationError(f'updates[{index}]: {" ".join(e.messages)}')
+
+        owned = {
+            row.id for row in
+            db.session.query(Artwork.id).filter(Artwork.id.in_(list(rows)), Artwork.artist_id == artist_id)
+        }
+        if owned:
+            # ORM bulk UPDATE by primary key: one executemany for all rows
+            db.session.execute(
+                update(Artwork).where(Artwork.artist_id == artist_id),
+                [rows[artwork_id] for artwork_id in owned],
+                execution_options={'synchronize_session': None}
+            )
+        db.session.commit()
+
+        updated = [str(artwork_id) for artwork_id in rows if artwork_id in owned]
+        notify_artworks_changed(artist_id, updated)
+        return {
+            'updated': updated,
+            'count': len(updated),
+            'not_found': [str(artwork_id) for artwork_id in rows if artwork_id not in owned]
+        }
+
+    @staticmethod
+    def update_matching(artist_id, filters, changes):
+        """Apply one change set to every artwork of the artist matching ``filters``
+
+        ``changes`` may use ``price_multiplier`` to scale prices in place.
+        Rows whose scaled price would fall outside the column's range are
+        left unchanged. Returns the ids of the updated artworks.
+        """
+        filters = filters or {}
+        if not isinstance(filters, dict):
+            raise ValidationError('filter must be an object')
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValidationError(f'Cannot filter on: {", ".join(sorted(unknown))}')
+
+        values = ArtworkBulkService.validate_changes(changes, allow_multiplier=True)
+
+        statement = update(Artwork).where(Artwork.artist_id == artist_id)
+        if 'ids' in filters:
+            statement = statement.where(Artwork.id.in_(_parse_ids(filters['ids'])))
+        if 'category' in filters:
+            statement = statement.where(Artwork.category == str(filters['category']).lower())
+        if 'is_available' in filters:
+            if not isinstance(filters['is_available'], bool):
+                raise ValidationError('is_available must be true or false')
+            statement = statement.where(Artwork.is_available.is_(filters['is_available']))
+        if 'price_min' in filters:
+            statement = statement.where(Artwork.price >= _parse_price(filters['price_min'], 'price_min'))
+        if 'price_max' in filters:
+            statement = statement.where(Artwork.price <= _parse_price(filters['price_max'], 'price_max'))
+        if 'price' in values and not isinstance(values['price'], Decimal):
+            statement = statement.where(values['price'] > 0, values['price'] < MAX_PRICE)
+
+        result = db.session.execute(
+            statement.values(**values).returning(Artwork.id),
+            execution_options={'synchronize_session': False}
+        )
+        updated = [str(row.id) for row in result]
+        db.session.commit()
+
+        notify_artworks_changed(artist_id, updated)
+        return {'updated': updated, 'count': len(updated)}
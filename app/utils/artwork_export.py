@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import select
+from ..extensions import db
+from ..models.artwork import Artwork
+from ..models.user import User
+
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_COLUMNS = (
+    Artwork.id,
+    Artwork.title,
+    Artwork.description,
+    Artwork.price,
+    Artwork.category,
+    Artwork.image_url,
+    Artwork.dominant_color,
+    Artwork.aspect_ratio,
+    Artwork.is_available,
+    Artwork.artist_id,
+    User.username.label('artist'),
+    Artwork.created_at,
+    Artwork.updated_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+
+def parse_watermark(value):
+    """Parse an ISO 8601 timestamp into naive UTC, raising ValueError"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # Prices are served as floats everywhere else in the API
+        return float(value)
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    return str(value)
+
+
+class ArtworkExportService:
+    """Streams the catalog as NDJSON or CSV straight from a server-side cursor
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time (``yield_per``) and each
+    batch is written out as soon as it arrives, so memory stays flat and
+    the first rows leave before the query has finished.
+    """
+
+    @staticmethod
+    def watermark():
+        """Upper bound on updated_at for an export starting now
+
+        Lagging slightly behind the clock leaves time for writes stamped
+        just before now to commit, so an incremental export from this
+        watermark won't skip them.
+        """
+        return datetime.utcnow() - timedelta(seconds=current_app.config['EXPORT_WATERMARK_LAG'])
+
+    @staticmethod
+    def build_query(until, category=None, updated_since=None):
+        """Select the artworks to export, oldest change first
+
+        A full export has only available artworks. An incremental one
+        (``updated_since``) also includes artworks withdrawn since then, with
+        is_available false, so consumers can take them down. Deleted
+        artworks leave no row, so they never appear in an incremental export;
+        consumers must reconcile against a full export to drop them.
+
+        The (updated_at, id) order is served by ix_artworks_updated_at_id,
+        so rows stream from the first batch instead of after a full sort.
+        """
+        query = select(*EXPORT_COLUMNS).\
+            join(User, User.id == Artwork.artist_id).\
+            where(Artwork.updated_at <= until).\
+            order_by(Artwork.updated_at, Artwork.id)
+
+        if updated_since is None:
+            query = query.where(Artwork.is_available.is_(True))
+        else:
+            query = query.where(Artwork.updated_at > updated_since)
+        if category:
+            query = query.where(Artwork.category == category.lower())
+        return query
+
+    @staticmethod
+    def generate(fmt, until, category=None, updated_since=None):
+        """Yield the export as text chunks, one per fetched batch"""
+        query = ArtworkExportService.build_query(until, category=category, updated_since=updated_since)
+        result = db.session.execute(query.execution_options(yield_per=current_app.config['EXPORT_BATCH_SIZE']))
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_FIELDS)
+            yield buffer.getvalue()
+
+            for rows in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_plain(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield ''.join(
+                    json.dumps(dict(zip(EXPORT_FIELDS, map(_plain, row))), separators=(',', ':')) + '\n'
+                    for row in rows
+                )
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import insert
+from ..extensions import db
+from ..models.artwork import Artwork
+from ..signals import notify_artworks_changed
+from .validators import validate_price, validate_category
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+REQUIRED_FIELDS = ('title', 'description', 'price', 'category')
+MAX_PRICE = Decimal('100000000')  # Artwork.price is Numeric(10, 2)
+MAX_DESCRIPTION_LENGTH = 10000
+TRUE_VALUES = {'true', '1', 'yes', 'y'}
+FALSE_VALUES = {'false', '0', 'no', 'n', ''}
+
+
+def detect_import_format(mimetype=None, filename=None):
+    """Guess the import format from a content type or file name, or None"""
+    if mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    if mimetype in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return 'ndjson'
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return None
+
+
+class ArtworkImportService:
+    """Bulk artwork import from CSV or NDJSON
+
+    The input is parsed one record at a time and valid rows are inserted in
+    batches of IMPORT_BATCH_SIZE with a single executemany each, so memory
+    stays flat however large the catalog is. Invalid rows are reported and
+    skipped; they don't stop the rest of the import. If the database still
+    refuses a batch, it is split in halves until the rows at fault are found,
+    so only those are reported.
+    """
+
+    @staticmethod
+    def iter_records(stream, fmt):
+        """Yield (line number, record dict or ValidationError) from a binary stream"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            start = 2  # after the header
+            for record in reader:
+                yield start, record
+                start = reader.line_num + 1
+        else:
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield line_number, ValidationError('Invalid JSON')
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, ValidationError('Each line must be a JSON object')
+                    continue
+                yield line_number, record
+
+    @staticmethod
+    def validate_record(record):
+        """Return the artwork column values for a record, raising ValidationError"""
+        values = {}
+        for field in REQUIRED_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == '':
+                raise ValidationError(f'{field} is required')
+            values[field] = value
+
+        if not isinstance(values['title'], str) or len(values['title']) > 200:
+            raise ValidationError('title must be a string of at most 200 characters')
+        if not isinstance(values['description'], str) or len(values['description']) > MAX_DESCRIPTION_LENGTH:
+            raise ValidationError(f'description must be a string of at most {MAX_DESCRIPTION_LENGTH} characters')
+
+        try:
+            price = Decimal(str(values['price'])).quantize(Decimal('0.01'))
+            validate_price(price)
+        except InvalidOperation:
+            raise ValidationError('Price must be a number')
+        if price >= MAX_PRICE:
+            raise ValidationError(f'Price must be less than {MAX_PRICE}')
+        values['price'] = price
+
+        category = str(values['category'])
+        validate_category(category)
+        values['category'] = category.lower()
+
+        image_url = record.get('image_url') or None
+        if image_url is not None and (not isinstance(image_url, str) or len(image_url) > 1024):
+            raise ValidationError('image_url must be a string of at most 1024 characters')
+        values['image_url'] = image_url
+
+        is_available = record.get('is_available', True)
+        if isinstance(is_available, str):
+            flag = is_available.strip().lower()
+            if flag not in TRUE_VALUES | FALSE_VALUES:
+                raise ValidationError('is_available must be true or false')
+            is_available = flag in TRUE_VALUES
+        values['is_available'] = bool(is_available)
+
+        return values
+
+    @staticmethod
+    def import_stream(stream, fmt, artist_id, batch_size=None):
+        """Import artworks for ``artist_id`` from a CSV or NDJSON stream
+
+        Returns counts of imported and failed rows and the first
+        IMPORT_MAX_REPORTED_ERRORS errors as {'line', 'message'}.
+        """
+        batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+        max_errors = current_app.config['IMPORT_MAX_REPORTED_ERRORS']
+        summary = {'imported': 0, 'failed': 0, 'errors': []}
+        batch = []
+
+        def report(line, message):
+            summary['failed'] += 1
+            if len(summary['errors']) < max_errors:
+                summary['errors'].append({'line': line, 'message': message})
+
+        def save(rows):
+            try:
+                db.session.execute(insert(Artwork), [row for _line, row in rows])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                if len(rows) == 1:
+                    line = rows[0][0]
+                    current_app.logger.error(f"Artwork import failed for line {line}: {str(e)}")
+                    report(line, 'Could not be saved')
+                    return
+                # Bisect to find the rows the database refuses, saving the rest
+                middle = len(rows) // 2
+                save(rows[:middle])
+                save(rows[middle:])
+                return
+            summary['imported'] += len(rows)
+            notify_artworks_changed(artist_id, [row['id'] for _line, row in rows])
+
+        def flush():
+            save(list(batch))
+            batch.clear()
+
+        for line, record in ArtworkImportService.iter_records(stream, fmt):
+            try:
+                if isinstance(record, ValidationError):
+                    raise record
+                values = ArtworkImportService.validate_record(record)
+            except ValidationError as e:
+                report(line, ' '.join(e.messages) if isinstance(e.messages, list) else str(e.messages))
+                continue
+
+            now = datetime.utcnow()
+            batch.append((line, dict(values, id=uuid.uuid4(), artist_id=artist_id, created_at=now, updated_at=now)))
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+        return summary
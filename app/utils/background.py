@@ -0,0 +1,68 @@
+import random
+import threading
+from ..extensions import db
+
+
+class PeriodicTask:
+    """Runs a function every ``interval`` seconds on a daemon thread, inside an app context"""
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, app):
+        self._thread = threading.Thread(
+            target=self._run, args=(app,), name=f"periodic-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, app):
+        # Jitter the first run so several workers don't wake in lockstep
+        delay = random.uniform(0, self.interval)
+        while not self._stop.wait(delay):
+            with app.app_context():
+                try:
+                    self.func()
+                except Exception:
+                    app.logger.exception(f"Background task {self.name} failed")
+                finally:
+                    db.session.remove()
+            delay = self.interval
+
+
+def start_background_tasks(app):
+    """Start the periodic maintenance tasks for a serving process
+
+    Disable with BACKGROUND_TASKS_ENABLED=false when the same work is run by
+    cron through the ``flask images`` commands instead. The orphan sweep
+    deletes stored images, so it only runs with ORPHAN_SWEEP_ENABLED=true.
+    """
+    if not app.config['BACKGROUND_TASKS_ENABLED']:
+        return []
+
+    from .carts import CartService
+    from .image_deletion import ImageDeletionService
+    from .orders import OrderService
+    from .reservations import ReservationService
+    from .resumable_uploads import ResumableUploadService
+    from .tokens import TokenService
+
+    tasks = [
+        PeriodicTask('image-deletions', app.config['IMAGE_DELETE_INTERVAL'], ImageDeletionService.drain),
+        PeriodicTask('resumable-upload-expiry', app.config['RESUMABLE_UPLOAD_SWEEP_INTERVAL'], ResumableUploadService.expire),
+        PeriodicTask('revoked-token-purge', app.config['REVOKED_TOKEN_PURGE_INTERVAL'], TokenService.purge_expired),
+        PeriodicTask('guest-cart-expiry', app.config['GUEST_CART_SWEEP_INTERVAL'], CartService.expire_guest_carts),
+        PeriodicTask('reservation-expiry', app.config['RESERVATION_SWEEP_INTERVAL'], ReservationService.release_expired),
+        PeriodicTask('order-emails', app.config['ORDER_EMAIL_INTERVAL'], OrderService.send_confirmations),
+    ]
+    if app.config['ORPHAN_SWEEP_ENABLED']:
+        tasks.append(PeriodicTask('orphan-sweep', app.config['ORPHAN_SWEEP_INTERVAL'], ImageDeletionService.sweep_orphans))
+    for task in tasks:
+        task.start(app)
+    return tasks
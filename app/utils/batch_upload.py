@@ -0,0 +1,174 @@
+import io
+import multiprocessing
+import secrets
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from flask import current_app, request
+from ..extensions import db
+from ..models.image_asset import ImageAsset
+from .cloudinary_service import CloudinaryService
+from .storage import get_storage
+
+
+def _optimize_in_worker(data, max_size, quality):
+    """Process pool entry point: returns the optimized JPEG bytes and image metadata"""
+    metadata = {}
+    output = CloudinaryService.render_optimized(io.BytesIO(data), max_size, quality, metadata)
+    return output.getvalue(), metadata
+
+
+def get_batch_pools():
+    """Return the app's (process pool, thread pool) pair, creating it on first use
+
+    Resizing is CPU-bound and goes to processes; storage uploads are I/O-bound
+    and go to threads. Both are bounded so one batch can't swamp the worker.
+    The processes come from a forkserver rather than being forked from the
+    worker, which runs background threads and holds open database
+    connections that a fork would copy mid-use.
+    """
+    pools = current_app.extensions.get('batch_upload_pools')
+    if pools is None:
+        pools = (
+            ProcessPoolExecutor(
+                max_workers=current_app.config['BATCH_UPLOAD_PROCESSES'],
+                mp_context=multiprocessing.get_context('forkserver')
+            ),
+            ThreadPoolExecutor(
+                max_workers=current_app.config['BATCH_UPLOAD_THREADS'], thread_name_prefix='batch-upload'
+            )
+        )
+        current_app.extensions['batch_upload_pools'] = pools
+    return pools
+
+
+class BatchUploadService:
+    """Uploads many images from one request concurrently, with a result per file"""
+
+    MAX_SIZE = (1200, 1200)
+    QUALITY = 85
+
+    @staticmethod
+    def upload_many(files, owner_id, max_file_bytes, folder="artworks"):
+        """Optimize and store ``files`` (FileStorage objects parsed into SpooledUploads) for ``owner_id``
+
+        Returns one result per file, in order: the upload result plus
+        ``filename`` and ``ok: True``, or ``filename``, ``ok: False`` and a
+        ``message``. One file failing doesn't affect the others.
+        """
+        results = [None] * len(files)
+        jobs = {}  # content_hash -> indexes of the files with those bytes
+
+        for index, file in enumerate(files):
+            stream = file.stream
+            stream.seek(0, io.SEEK_END)
+            if stream.tell() > max_file_bytes:
+                results[index] = BatchUploadService._error(file, f'File exceeds the limit of {max_file_bytes} bytes')
+            elif getattr(stream, 'sniffed_type', None) is None:
+                results[index] = BatchUploadService._error(file, 'File is not a supported image (JPEG, PNG, GIF or WebP)')
+            else:
+                jobs.setdefault(stream.content_hash, []).append(index)
+
+        # Anything this user already uploaded is reused without being processed again
+        if jobs:
+            existing = ImageAsset.query.filter(
+                ImageAsset.uploaded_by == owner_id, ImageAsset.content_hash.in_(list(jobs))
+            ).all()
+            for asset in existing:
+                for index in jobs.pop(asset.content_hash):
+                    results[index] = BatchUploadService._ok(
+                        files[index], CloudinaryService._asset_result(asset, deduplicated=True)
+                    )
+
+        for content_hash, upload_result in BatchUploadService._process(files, jobs, owner_id, folder):
+            indexes = jobs[content_hash]
+            for position, index in enumerate(indexes):
+                if isinstance(upload_result, Exception):
+                    results[index] = BatchUploadService._error(files[index], 'Image upload failed')
+                else:
+                    # Repeats of a file within the batch share its asset
+                    results[index] = BatchUploadService._ok(
+                        files[index], dict(upload_result, deduplicated=upload_result['deduplicated'] or position > 0)
+                    )
+
+        return results
+
+    @staticmethod
+    def _process(files, jobs, owner_id, folder):
+        """Resize in processes and upload in threads as each resize finishes
+
+        Yields (content_hash, upload result or exception). Only a bounded
+        number of files are read into memory for the process pool at a time.
+        """
+        process_pool, thread_pool = get_batch_pools()
+        storage = get_storage()
+        pending = iter(jobs.items())
+        resizing = {}
+        uploading = {}
+        max_resizing = current_app.config['BATCH_UPLOAD_PROCESSES'] * 2
+
+        def queue_resizes():
+            while len(resizing) < max_resizing:
+                content_hash, indexes = next(pending, (None, None))
+                if content_hash is None:
+                    return
+                stream = files[indexes[0]].stream
+                stream.seek(0)
+                future = process_pool.submit(
+                    _optimize_in_worker, stream.read(), BatchUploadService.MAX_SIZE, BatchUploadService.QUALITY
+                )
+                resizing[future] = (content_hash, stream)
+
+        app = current_app._get_current_object()
+        environ = dict(request.environ)
+
+        def store(optimized, public_id):
+            # A fresh context for building URLs; popping a copy of the
+            # current one would close the request's uploaded files
+            with app.request_context(environ):
+                return storage.save(io.BytesIO(optimized), public_id, folder=folder)
+
+        queue_resizes()
+        while resizing or uploading:
+            done, _ = wait(list(resizing) + list(uploading), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in resizing:
+                    content_hash, stream = resizing.pop(future)
+                    try:
+                        optimized, metadata = future.result()
+                    except Exception as e:
+                        # Same fallback as a single upload: store the original
+                        current_app.logger.error(f"Image optimization failed: {str(e)}")
+                        stream.seek(0)
+                        optimized, metadata = stream.read(), {}
+
+                    public_id = f"{folder}/{secrets.token_urlsafe(16)}"
+                    upload = thread_pool.submit(store, optimized, public_id)
+                    uploading[upload] = (content_hash, metadata)
+                else:
+                    content_hash, metadata = uploading.pop(future)
+                    try:
+                        # Registered here, on the request's own database session
+                        yield content_hash, CloudinaryService.register_upload(
+                            owner_id, content_hash, metadata, future.result()
+                        )
+                    except Exception as e:
+                        db.session.rollback()
+                        current_app.logger.error(f"Image upload failed: {str(e)}")
+                        yield content_hash, e
+            queue_resizes()
+
+    @staticmethod
+    def _ok(file, upload_result):
+        return {
+            'filename': file.filename,
+            'ok': True,
+            'image_url': upload_result['url'],
+            'public_id': upload_result['public_id'],
+            'placeholder': upload_result['placeholder'],
+            'dominant_color': upload_result['dominant_color'],
+            'aspect_ratio': upload_result['aspect_ratio'],
+            'deduplicated': upload_result['deduplicated']
+        }
+
+    @staticmethod
+    def _error(file, message):
+        return {'filename': file.filename, 'ok': False, 'message': message}
@@ -0,0 +1,85 @@
+import uuid
+from sqlalchemy import func, or_, select, update
+from ..extensions import db
+from ..models.artwork import Artwork
+from ..models.cart import Cart, CartItem
+from ..signals import artworks_changed
+
+
+class CartTotals:
+    """Keeps each cart's cached totals in step with its items and their artworks
+
+    Totals are recomputed for just the affected carts, in the same
+    transaction as the change, so reading them is a single-row lookup.
+    """
+
+    @staticmethod
+    def values():
+        """SET clause recomputing a cart's totals from its items, for an UPDATE of carts"""
+        return {
+            'item_count': select(func.coalesce(func.sum(CartItem.quantity), 0)).
+                where(CartItem.cart_id == Cart.id).scalar_subquery(),
+            'subtotal': select(func.coalesce(func.sum(CartItem.quantity * Artwork.price), 0)).
+                join(Artwork, Artwork.id == CartItem.artwork_id).
+                where(CartItem.cart_id == Cart.id, Artwork.is_available.is_(True)).scalar_subquery(),
+            'unavailable_count': select(func.count()).select_from(CartItem).
+                join(Artwork, Artwork.id == CartItem.artwork_id).
+                where(CartItem.cart_id == Cart.id, Artwork.is_available.is_(False)).scalar_subquery(),
+            'price_changed_count': select(func.count()).select_from(CartItem).
+                join(Artwork, Artwork.id == CartItem.artwork_id).
+                where(CartItem.cart_id == Cart.id, CartItem.price_at_add != Artwork.price).scalar_subquery(),
+        }
+
+    @staticmethod
+    def refresh(cart_id):
+        """Recompute one cart's totals after changing its items; returns the cart's summary row"""
+        statement = update(Cart).where(Cart.id == cart_id).values(**CartTotals.values())
+        return db.session.execute(statement.returning(*CartTotals.columns())).one()
+
+    @staticmethod
+    def refresh_for_artworks(artwork_ids):
+        """Recompute, and bump the version of, every cart holding one of ``artwork_ids``"""
+        carts = select(CartItem.cart_id).where(CartItem.artwork_id.in_([uuid.UUID(str(artwork_id)) for artwork_id in artwork_ids]))
+        statement = update(Cart).where(Cart.id.in_(carts)).\
+            values(version=Cart.version + 1, **CartTotals.values())
+        result = db.session.execute(statement, execution_options={'synchronize_session': False})
+        db.session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def columns():
+        return Cart.id, Cart.version, Cart.item_count, Cart.subtotal, Cart.unavailable_count, Cart.price_changed_count
+
+    @staticmethod
+    def summary(row):
+        """Totals of a row with the columns(), as returned by the API"""
+        return {
+            'item_count': row.item_count,
+            'subtotal': float(row.subtotal),
+            'unavailable_count': row.unavailable_count,
+            'price_changed_count': row.price_changed_count
+        }
+
+    @staticmethod
+    def changed_items(cart_id):
+        """Items whose artwork has become unavailable or changed price since being added"""
+        rows = db.session.execute(
+            select(CartItem.artwork_id, CartItem.quantity, CartItem.price_at_add, Artwork.title, Artwork.price, Artwork.is_available).
+            join(Artwork, Artwork.id == CartItem.artwork_id).
+            where(CartItem.cart_id == cart_id, or_(Artwork.is_available.is_(False), CartItem.price_at_add != Artwork.price)).
+            order_by(CartItem.added_at)
+        )
+        return [{
+            'artwork_id': str(row.artwork_id),
+            'title': row.title,
+            'quantity': row.quantity,
+            'price_at_add': float(row.price_at_add) if row.price_at_add is not None else None,
+            'price': float(row.price),
+            'is_available': row.is_available,
+            'price_changed': row.price_at_add is not None and row.price_at_add != row.price,
+        } for row in rows]
+
+
+@artworks_changed.connect
+def _artworks_changed(_app, artist_id, artwork_ids):
+    CartTotals.refresh_for_artworks(artwork_ids)
@@ -0,0 +1,156 @@
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import case, delete, select, update
+from ..extensions import db
+from ..models.artwork import Artwork
+from ..models.cart import Cart, CartItem
+from .cart_totals import CartTotals
+from .helpers import upsert_insert
+
+GUEST_CART_HEADER = 'X-Guest-Cart'
+
+
+class CartService:
+    """Finds, creates and merges carts
+
+    A cart's owner is given as ``{'user_id': ...}`` for a signed-in user or
+    ``{'id': ...}`` for a guest cart, which has no user and is reached with
+    a signed token naming its id. Issuing a token writes nothing; the
+    guest cart row is created on first use.
+    """
+
+    @staticmethod
+    def owner_filter(owner):
+        if 'user_id' in owner:
+            return Cart.user_id == owner['user_id']
+        return (Cart.id == owner['id']) & Cart.user_id.is_(None)
+
+    @staticmethod
+    def get(owner):
+        return Cart.query.filter(CartService.owner_filter(owner)).first()
+
+    @staticmethod
+    def get_or_create(owner):
+        cart = CartService.get(owner)
+        if cart is None:
+            values = dict({'id': uuid.uuid4(), 'user_id': None}, **owner)
+            db.session.execute(upsert_insert(Cart).values(**values).on_conflict_do_nothing())
+            db.session.commit()
+            cart = Cart.query.filter(CartService.owner_filter(owner)).one()
+        return cart
+
+    @staticmethod
+    def upsert(owner):
+        """Create the owner's cart or bump its version, in one statement; returns (id, version)"""
+        now = datetime.utcnow()
+        values = dict({'id': uuid.uuid4(), 'user_id': None, 'created_at': now, 'updated_at': now}, **owner)
+        statement = upsert_insert(Cart).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Cart.user_id if 'user_id' in owner else Cart.id],
+            set_={'version': Cart.version + 1, 'updated_at': now}
+        )
+        return db.session.execute(statement.returning(Cart.id, Cart.version)).one()
+
+    @staticmethod
+    def bump(owner):
+        """Bump the owner's cart version, locking it until commit; returns (id, version) or None
+
+        Lock the cart before its items, in the same order as adding does.
+        """
+        statement = update(Cart).where(CartService.owner_filter(owner)).values(version=Cart.version + 1)
+        return db.session.execute(statement.returning(Cart.id, Cart.version)).first()
+
+    @staticmethod
+    def issue_guest_token():
+        """A token for a new, empty guest cart"""
+        return CartService._serializer().dumps(uuid.uuid4().hex)
+
+    @staticmethod
+    def guest_cart_id(token):
+        """The guest cart id a token names; raises ValueError if it's forged or expired"""
+        try:
+            return uuid.UUID(CartService._serializer().loads(token, max_age=current_app.config['GUEST_CART_TTL']))
+        except SignatureExpired:
+            raise ValueError("Guest cart has expired")
+        except (BadSignature, ValueError, TypeError):
+            raise ValueError("Invalid guest cart token")
+
+    @staticmethod
+    def merge_guest_cart(token, user_id):
+        """Move a guest cart's items into the user's cart, then delete the guest cart
+
+        The guest items and their artworks are read in one query; those still
+        available are upserted in one statement, keeping the larger quantity
+        where the user's cart already has the artwork. Returns the number of
+        items merged and the artwork ids skipped as no longer available.
+        """
+        guest_id = CartService.guest_cart_id(token)
+        rows = db.session.execute(
+            select(CartItem.artwork_id, CartItem.quantity, CartItem.price_at_add, CartItem.added_at, Artwork.is_available).
+            join(Artwork, Artwork.id == CartItem.artwork_id).
+            join(Cart, Cart.id == CartItem.cart_id).
+            where(CartItem.cart_id == guest_id, Cart.user_id.is_(None))
+        ).all()
+        available = [row for row in rows if row.is_available]
+
+        if available:
+            cart_id, _version = CartService.upsert({'user_id': user_id})
+            statement = upsert_insert(CartItem).values([{
+                'id': uuid.uuid4(),
+                'cart_id': cart_id,
+                'artwork_id': row.artwork_id,
+                'quantity': row.quantity or 1,
+                'price_at_add': row.price_at_add,
+                'added_at': row.added_at
+            } for row in available])
+            statement = statement.on_conflict_do_update(
+                index_elements=[CartItem.cart_id, CartItem.artwork_id],
+                set_={'quantity': case(
+                    (statement.excluded.quantity > CartItem.quantity, statement.excluded.quantity),
+                    else_=CartItem.quantity
+                )}
+            )
+            db.session.execute(statement)
+            CartTotals.refresh(cart_id)
+
+        CartService._delete_guest_carts([guest_id])
+        db.session.commit()
+        return {
+            'merged': len(available),
+            'skipped': [str(row.artwork_id) for row in rows if not row.is_available]
+        }
+
+    @staticmethod
+    def expire_guest_carts(batch_size=500):
+        """Delete guest carts untouched for GUEST_CART_TTL; returns the number removed"""
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['GUEST_CART_TTL'])
+        removed = 0
+        while True:
+            expired = db.session.execute(
+                select(Cart.id).
+                where(Cart.user_id.is_(None), Cart.updated_at <= cutoff).
+                limit(batch_size).
+                with_for_update(skip_locked=True)
+            ).scalars().all()
+            if expired:
+                CartService._delete_guest_carts(expired)
+            db.session.commit()
+            removed += len(expired)
+            if len(expired) < batch_size:
+                break
+
+        if removed:
+            current_app.logger.info(f"Expired {removed} guest carts")
+        return removed
+
+    @staticmethod
+    def _delete_guest_carts(cart_ids):
+        guest_carts = select(Cart.id).where(Cart.id.in_(cart_ids), Cart.user_id.is_(None))
+        db.session.execute(delete(CartItem).where(CartItem.cart_id.in_(guest_carts)))
+        db.session.execute(delete(Cart).where(Cart.id.in_(cart_ids), Cart.user_id.is_(None)))
+
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='guest-cart')
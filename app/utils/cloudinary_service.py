@@ -1,44 +1,85 @@
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+import base64
+import hashlib
 import secrets
+import time
 from PIL import Image
 import io
-import os
+from ..extensions import db
+from ..models.image_asset import ImageAsset
+from .storage import get_storage
+from .image_deletion import ImageDeletionService
 
 
 class CloudinaryService:
+    """Image upload pipeline: optimization, deduplication and reference counting
+
+    Files themselves are kept by the configured storage backend (Cloudinary
+    by default, see app/utils/storage.py).
+    """
+
     @staticmethod
-    def configure_cloudinary():
-        """Configure Cloudinary with environment variables"""
-        cloudinary.config(
-            cloud_name=current_app.config.get('CLOUDINARY_CLOUD_NAME'),
-            api_key=current_app.config.get('CLOUDINARY_API_KEY'),
-            api_secret=current_app.config.get('CLOUDINARY_API_SECRET'),
-            secure=True
-        )
+    def hash_stream(image_file, chunk_size=64 * 1024):
+        """Return the SHA-256 hex digest of a file object and rewind it"""
+        digest = hashlib.sha256()
+        image_file.seek(0)
+        for chunk in iter(lambda: image_file.read(chunk_size), b''):
+            digest.update(chunk)
+        image_file.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def perceptual_hash(image, hash_size=8):
+        """Return a 64-bit difference hash (dHash) of a decoded image as hex"""
+        grey = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+        pixels = list(grey.getdata())
+        bits = 0
+        for row in range(hash_size):
+            offset = row * (hash_size + 1)
+            for col in range(hash_size):
+                bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+        return f"{bits:0{hash_size * hash_size // 4}x}"
 
     @staticmethod
-    def optimize_image(image_file, max_size=(1200, 1200), quality=85):
-        """Optimize image before upload"""
+    def preview_metadata(image, placeholder_size=20):
+        """Compute what a client needs to lay out and paint an image before it loads
+
+        Returns a tiny base64 JPEG placeholder, the dominant colour and the
+        aspect ratio of a decoded image.
+        """
+        rgb = image.convert('RGB')
+
+        placeholder = rgb.copy()
+        placeholder.thumbnail((placeholder_size, placeholder_size), Image.Resampling.BILINEAR)
+        output = io.BytesIO()
+        placeholder.save(output, format='JPEG', quality=50)
+        encoded = base64.b64encode(output.getvalue()).decode('ascii')
+
+        # Most frequent colour of a small palette-reduced copy
+        sample = rgb.copy()
+        sample.thumbnail((64, 64), Image.Resampling.BILINEAR)
+        quantized = sample.quantize(colors=5)
+        _count, index = max(quantized.getcolors())
+        red, green, blue = quantized.getpalette()[index * 3:index * 3 + 3]
+
+        return {
+            'placeholder': f"data:image/jpeg;base64,{encoded}",
+            'dominant_color': f"#{red:02x}{green:02x}{blue:02x}",
+            'aspect_ratio': round(image.width / image.height, 4) if image.height else None
+        }
+
+    @staticmethod
+    def optimize_image(image_file, max_size=(1200, 1200), quality=85, metadata=None):
+        """Optimize image before upload
+
+        If a ``metadata`` dict is given it is filled with values computed from
+        the decoded image, so callers don't have to decode it a second time.
+        """
         try:
-            # Open image
-            image = Image.open(image_file)
-            
-            # Convert to RGB if necessary
-            if image.mode in ('RGBA', 'P'):
-                image = image.convert('RGB')
-            
-            # Resize if too large
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # Save optimized image to bytes
-            output = io.BytesIO()
-            image.save(output, format='JPEG', quality=quality, optimize=True)
-            output.seek(0)
-            
-            return output
+            return CloudinaryService.render_optimized(image_file, max_size, quality, metadata)
         except Exception as e:
             current_app.logger.error(f"Image optimization failed: {str(e)}")
             # Return original file if optimization fails
@@ -46,47 +87,245 @@ class CloudinaryService:
             return image_file
 
     @staticmethod
-    def upload_image(image_file, folder="artworks"):
-        """Upload image to Cloudinary with optimization"""
+    def render_optimized(image_file, max_size=(1200, 1200), quality=85, metadata=None):
+        """Resize and re-encode an image as JPEG, raising if it can't be decoded
+
+        Doesn't need an app context, so it can run in a worker process.
+        """
+        # Open image, letting JPEGs decode at a reduced scale so memory
+        # doesn't grow with the size of the original
+        image = Image.open(image_file)
+        image.draft('RGB', max_size)
+
+        # Convert to RGB if necessary
+        if image.mode in ('RGBA', 'P'):
+            image = image.convert('RGB')
+
+        # Resize if too large
+        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+        if metadata is not None:
+            metadata['perceptual_hash'] = CloudinaryService.perceptual_hash(image)
+            metadata.update(CloudinaryService.preview_metadata(image))
+
+        # Save optimized image to bytes
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=quality, optimize=True)
+        output.seek(0)
+
+        return output
+
+    @staticmethod
+    def upload_image(image_file, owner_id, folder="artworks"):
+        """Upload image to the storage backend with optimization
+
+        Identical bytes are only uploaded once per uploader: if ``owner_id``
+        already has an asset with the same content hash it is returned instead.
+        """
+        # Streamed uploads are hashed while they're received (see app/utils/uploads.py)
+        content_hash = getattr(image_file, 'content_hash', None) or CloudinaryService.hash_stream(image_file)
+        existing = ImageAsset.query.filter_by(uploaded_by=owner_id, content_hash=content_hash).first()
+        if existing:
+            return CloudinaryService._asset_result(existing, deduplicated=True)
+
         try:
-            CloudinaryService.configure_cloudinary()
-            
             # Generate unique public ID
             public_id = f"{folder}/{secrets.token_urlsafe(16)}"
-            
+
             # Optimize image
-            optimized_image = CloudinaryService.optimize_image(image_file)
-            
-            # Upload to Cloudinary
-            upload_result = cloudinary.uploader.upload(
-                optimized_image,
-                public_id=public_id,
-                folder=folder,
-                transformation=[
-                    {"width": 1200, "height": 1200, "crop": "limit"},
-                    {"quality": "auto:good"},
-                    {"format": "jpg"}
-                ]
-            )
-            
-            return {
-                "public_id": upload_result["public_id"],
-                "url": upload_result["secure_url"],
-                "format": upload_result["format"],
-                "width": upload_result["width"],
-                "height": upload_result["height"]
-            }
+            metadata = {}
+            optimized_image = CloudinaryService.optimize_image(image_file, metadata=metadata)
+
+            upload_result = get_storage().save(optimized_image, public_id, folder=folder)
         except Exception as e:
-            current_app.logger.error(f"Cloudinary upload failed: {str(e)}")
+            current_app.logger.error(f"Image upload failed: {str(e)}")
             raise Exception("Image upload failed")
 
+        return CloudinaryService.register_upload(owner_id, content_hash, metadata, upload_result)
+
+    @staticmethod
+    def register_upload(owner_id, content_hash, metadata, upload_result):
+        """Record a stored image as ``owner_id``'s asset and return its upload result
+
+        If a concurrent upload of the same bytes by the same user registered
+        first, that asset is returned and the newly stored copy is queued for
+        deletion.
+        """
+        asset = ImageAsset(uploaded_by=owner_id, content_hash=content_hash, **metadata, **upload_result)
+        db.session.add(asset)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent upload of the same file registered first; keep that one
+            db.session.rollback()
+            ImageDeletionService.enqueue([upload_result["public_id"]])
+            db.session.commit()
+            existing = ImageAsset.query.filter_by(uploaded_by=owner_id, content_hash=content_hash).one()
+            return CloudinaryService._asset_result(existing, deduplicated=True)
+
+        return CloudinaryService._asset_result(asset)
+
+    @staticmethod
+    def _upload_serializer():
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='direct-upload')
+
+    @staticmethod
+    def create_signed_upload(owner_id, folder="artworks"):
+        """Issue signed parameters for uploading one image straight to storage
+
+        The returned ``upload_token`` ties the public ID to ``owner_id`` and must
+        be presented to :meth:`complete_signed_upload` within DIRECT_UPLOAD_TTL.
+        """
+        public_id = f"{folder}/{secrets.token_urlsafe(16)}"
+        expires_at = int(time.time()) + current_app.config['DIRECT_UPLOAD_TTL']
+        token = CloudinaryService._upload_serializer().dumps({"public_id": public_id, "owner_id": str(owner_id)})
+
+        return dict(
+            get_storage().create_signed_upload(public_id, expires_at),
+            public_id=public_id,
+            upload_token=token,
+            expires_at=expires_at
+        )
+
+    @staticmethod
+    def complete_signed_upload(upload_token, owner_id):
+        """Verify a direct upload finished and register it as an asset
+
+        Raises ValueError if the token is invalid, expired, issued to someone
+        else, or the file never arrived.
+        """
+        try:
+            payload = CloudinaryService._upload_serializer().loads(
+                upload_token, max_age=current_app.config['DIRECT_UPLOAD_TTL']
+            )
+        except SignatureExpired:
+            raise ValueError("Upload token has expired")
+        except BadSignature:
+            raise ValueError("Invalid upload token")
+        if payload.get("owner_id") != str(owner_id):
+            raise ValueError("Upload token was issued to another user")
+
+        public_id = payload["public_id"]
+        existing = ImageAsset.query.filter_by(public_id=public_id).first()
+        if existing:
+            return CloudinaryService._asset_result(existing)
+
+        resource = get_storage().describe(public_id)
+        if resource is None:
+            raise ValueError("Uploaded image not found")
+
+        # The same user may have uploaded the same file before; keep the older copy
+        etag = resource["etag"]
+        duplicate = ImageAsset.query.filter_by(uploaded_by=owner_id, etag=etag).first() if etag else None
+        if duplicate:
+            ImageDeletionService.enqueue([public_id])
+            db.session.commit()
+            return CloudinaryService._asset_result(duplicate, deduplicated=True)
+
+        asset = ImageAsset(uploaded_by=owner_id, **resource, **CloudinaryService._stored_image_metadata(public_id))
+        if asset.width and asset.height:
+            # The preview is too small to give an accurate ratio
+            asset.aspect_ratio = round(asset.width / asset.height, 4)
+        db.session.add(asset)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The completion callback was retried concurrently
+            db.session.rollback()
+            asset = ImageAsset.query.filter_by(public_id=public_id).one()
+
+        return CloudinaryService._asset_result(asset)
+
+    @staticmethod
+    def _stored_image_metadata(public_id):
+        """Compute hash and preview metadata from a small rendition of a stored image"""
+        try:
+            with get_storage().open_preview(public_id) as preview, Image.open(preview) as image:
+                image.load()
+                return dict(
+                    CloudinaryService.preview_metadata(image),
+                    perceptual_hash=CloudinaryService.perceptual_hash(image)
+                )
+        except Exception as e:
+            current_app.logger.warning(f"Could not compute preview for {public_id}: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _asset_result(asset, deduplicated=False):
+        return {
+            "public_id": asset.public_id,
+            "url": asset.url,
+            "format": asset.format,
+            "width": asset.width,
+            "height": asset.height,
+            "placeholder": asset.placeholder,
+            "dominant_color": asset.dominant_color,
+            "aspect_ratio": asset.aspect_ratio,
+            "deduplicated": deduplicated
+        }
+
+    @staticmethod
+    def retain_image(public_id, owner_id):
+        """Record that one more of ``owner_id``'s artworks references the image
+
+        Returns the image's preview metadata (placeholder, dominant_color,
+        aspect_ratio) so it can be copied onto the artwork, or None if no
+        image is given. Raises PermissionError unless ``owner_id`` uploaded
+        the image, so nobody can take over another artist's asset.
+        """
+        if not public_id:
+            return None
+        row = db.session.execute(
+            update(ImageAsset)
+            .where(ImageAsset.public_id == public_id, ImageAsset.uploaded_by == owner_id)
+            .values(ref_count=ImageAsset.ref_count + 1)
+            .returning(ImageAsset.placeholder, ImageAsset.dominant_color, ImageAsset.aspect_ratio)
+        ).first()
+        if row is None:
+            raise PermissionError("You can only use images you uploaded")
+        return row._asdict()
+
+    @staticmethod
+    def release_image(public_id):
+        """Drop one artwork reference to the image
+
+        Returns True when nothing references the image any more, in which case
+        its asset record is removed and the caller should queue the stored file
+        for deletion.
+        """
+        if not public_id:
+            return False
+
+        remaining = db.session.execute(
+            update(ImageAsset)
+            .where(ImageAsset.public_id == public_id, ImageAsset.ref_count > 0)
+            .values(ref_count=ImageAsset.ref_count - 1)
+            .returning(ImageAsset.ref_count)
+        ).scalar_one_or_none()
+
+        if remaining is None:
+            if db.session.query(ImageAsset.id).filter_by(public_id=public_id).first():
+                # Tracked but already unreferenced; leave it to whoever released it last
+                return False
+            # Uploaded before assets were tracked: destroy it unless another artwork uses it
+            from ..models.artwork import Artwork
+            return not db.session.query(Artwork.id).filter_by(image_public_id=public_id).first()
+
+        if remaining > 0:
+            return False
+
+        # Only the transaction that removes the unreferenced record owns the deletion,
+        # so a concurrent retain_image() can't lose its image
+        result = db.session.execute(
+            delete(ImageAsset).where(ImageAsset.public_id == public_id, ImageAsset.ref_count == 0)
+        )
+        return result.rowcount == 1
+
     @staticmethod
     def delete_image(public_id):
-        """Delete image from Cloudinary"""
+        """Delete image from the storage backend"""
         try:
-            CloudinaryService.configure_cloudinary()
-            result = cloudinary.uploader.destroy(public_id)
-            return result.get("result") == "ok"
+            return get_storage().delete(public_id)
         except Exception as e:
-            current_app.logger.error(f"Cloudinary delete failed: {str(e)}")
+            current_app.logger.error(f"Image delete failed: {str(e)}")
             return False
\ No newline at end of file
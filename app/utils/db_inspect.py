@@ -0,0 +1,196 @@
+import csv
+import json
+import re
+import struct
+import uuid
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import func, select, text
+from ..extensions import db
+from .. import models  # noqa: F401  registers every table on db.metadata
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FILTER_PATTERN = re.compile(r'^(\w+)(<=|>=|!=|=|<|>)(.*)$')
+FILTER_OPERATORS = {
+    '=': lambda column, value: column.is_(None) if value is None else column == value,
+    '!=': lambda column, value: column.isnot(None) if value is None else column != value,
+    '<': lambda column, value: column < value,
+    '<=': lambda column, value: column <= value,
+    '>': lambda column, value: column > value,
+    '>=': lambda column, value: column >= value,
+}
+COLUMNAR_MAGIC = b'ARTCOL1\n'
+
+
+def get_table(name):
+    """Return a mapped table by name, raising ValueError for unknown ones"""
+    table = db.metadata.tables.get(name)
+    if table is None:
+        raise ValueError(f"Unknown table {name}; choose from: {', '.join(sorted(db.metadata.tables))}")
+    return table
+
+
+def _coerce(column, raw):
+    """Turn a filter value typed on the command line into the column's Python type"""
+    if raw.lower() == 'null':
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    if python_type is bool:
+        if raw.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError(f"{column.name} takes true or false")
+        return raw.lower() in ('true', '1')
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type in (int, float, Decimal, uuid.UUID):
+            return python_type(raw)
+    except (ValueError, ArithmeticError):
+        raise ValueError(f"{raw!r} is not a valid value for {column.name}")
+    return raw
+
+
+def build_select(table, columns=None, filters=(), limit=None):
+    """Select columns from a table with ``col<op>value`` filters, in primary key order"""
+    try:
+        selected = [table.c[name] for name in columns] if columns else list(table.c)
+    except KeyError as e:
+        raise ValueError(f"Unknown column {e.args[0]} in {table.name}")
+
+    query = select(*selected).order_by(*table.primary_key.columns)
+    for expression in filters:
+        match = FILTER_PATTERN.match(expression)
+        if not match or match.group(1) not in table.c:
+            raise ValueError(f"Can't filter on {expression!r}; use column<op>value with =, !=, <, <=, > or >=")
+        name, operator, raw = match.groups()
+        column = table.c[name]
+        value = _coerce(column, raw)
+        if value is None and operator not in ('=', '!='):
+            raise ValueError("null can only be compared with = or !=")
+        query = query.where(FILTER_OPERATORS[operator](column, value))
+
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def iter_chunks(query, chunk_size):
+    """Run a query on a server-side cursor, yielding lists of rows"""
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    yield from result.partitions()
+
+
+def estimated_row_counts():
+    """Return {table: estimated rows} from the planner's statistics
+
+    Postgres keeps an estimate in pg_class.reltuples, refreshed by
+    (auto)vacuum and ANALYZE, so this doesn't scan anything. Tables that
+    have never been analyzed, and databases other than Postgres, map to None.
+    """
+    counts = dict.fromkeys(db.metadata.tables)
+    if db.engine.dialect.name != 'postgresql':
+        return counts
+
+    rows = db.session.execute(text(
+        "SELECT c.relname, c.reltuples::bigint AS estimate "
+        "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+    ))
+    for name, estimate in rows:
+        if name in counts:
+            counts[name] = estimate if estimate >= 0 else None
+    return counts
+
+
+def exact_row_count(table):
+    return db.session.execute(select(func.count()).select_from(table)).scalar()
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def write_csv(chunks, names, output):
+    writer = csv.writer(output)
+    writer.writerow(names)
+    for rows in chunks:
+        writer.writerows(rows)
+
+
+def write_jsonl(chunks, names, output):
+    for rows in chunks:
+        output.write(''.join(
+            json.dumps(dict(zip(names, map(_plain, row))), separators=(',', ':')) + '\n' for row in rows
+        ))
+
+
+def _arrow_type(column):
+    """The Arrow type of a column's values once _plain() has converted them"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pyarrow.string()
+    if python_type is bool:
+        return pyarrow.bool_()
+    if python_type is int:
+        return pyarrow.int64()
+    if python_type is float:
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def write_columnar(chunks, columns, output):
+    """Write chunks of the selected ``columns`` column by column: Parquet if pyarrow is installed, else ARTCOL
+
+    The Parquet schema comes from the columns' SQLAlchemy types rather than
+    the data, so a chunk where a column happens to be all null still
+    matches the others. ARTCOL is the fallback: the magic line, a JSON list
+    of column names, then per chunk a 4-byte big-endian length and a
+    zlib-compressed JSON object of column name to values. Read it back with
+    iter_columnar(). Returns the format written ('parquet' or 'artcol').
+    """
+    names = [column.name for column in columns]
+    if pyarrow is not None:
+        schema = pyarrow.schema([(column.name, _arrow_type(column)) for column in columns])
+        with pyarrow.parquet.ParquetWriter(output, schema) as writer:
+            for rows in chunks:
+                writer.write_table(pyarrow.Table.from_pydict(
+                    {name: [_plain(row[i]) for row in rows] for i, name in enumerate(names)}, schema=schema
+                ))
+        return 'parquet'
+
+    output.write(COLUMNAR_MAGIC)
+    output.write(json.dumps(names).encode() + b'\n')
+    for rows in chunks:
+        columns = {name: [_plain(row[i]) for row in rows] for i, name in enumerate(names)}
+        block = zlib.compress(json.dumps(columns, separators=(',', ':')).encode())
+        output.write(struct.pack('>I', len(block)))
+        output.write(block)
+    return 'artcol'
+
+
+def iter_columnar(input_file):
+    """Yield {column: [values]} chunks from an ARTCOL file written by write_columnar"""
+    if input_file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("Not an ARTCOL file")
+    input_file.readline()  # column names, repeated as each chunk's keys
+    while True:
+        header = input_file.read(4)
+        if not header:
+            return
+        (length,) = struct.unpack('>I', header)
+        yield json.loads(zlib.decompress(input_file.read(length)))
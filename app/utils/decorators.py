@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import request
-from flask_jwt_extended import get_jwt_identity, jwt_required, verify_jwt_in_request
+from flask_jwt_extended import get_current_user, get_jwt_identity, jwt_required, verify_jwt_in_request
+from werkzeug.exceptions import HTTPException
 from ..models.user import User
 from ..extensions import db
 
@@ -29,18 +30,10 @@ def role_required(roles):
         @wraps(fn)
         @jwt_required()
         def wrapper(*args, **kwargs):
-            try:
-                user_id = get_jwt_identity()
-                user = db.session.get(User, user_id)
-                if not user:
-                    return {"message": "User not found"}, 404
-                if not user.is_active:
-                    return {"message": "Account is deactivated"}, 403
-                if user.role not in roles:
-                    return {"message": "Insufficient permissions"}, 403
-                return fn(user, *args, **kwargs)
-            except Exception as e:
-                return {"message": "Authorization failed"}, 401
+            # Missing, deactivated and changed users were already turned away by the JWT user loader
+            if get_current_user().role not in roles:
+                return {"message": "Insufficient permissions"}, 403
+            return fn(*args, **kwargs)
         return wrapper
     return decorator
 
@@ -54,6 +47,8 @@ def handle_api_errors(fn):
             return {"message": str(e)}, 400
         except PermissionError as e:
             return {"message": str(e)}, 403
+        except HTTPException as e:
+            return {"message": e.description}, e.code
         except Exception as e:
             return {"message": "An internal error occurred"}, 500
     return wrapper
@@ -1,4 +1,8 @@
+from flask import request
 from flask_sqlalchemy import pagination
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from ..extensions import db
 
 def paginate_query(query, page: int = 1, per_page: int = 20):
     page = max(1, int(page))
@@ -20,4 +24,31 @@ def validate_password(password: str) -> bool:
         return False
     if not any(c.isdigit() for c in password):
         return False
-    return True
\ No newline at end of file
+    return True
+
+def upsert_insert(model):
+    """An INSERT for ``model`` supporting on_conflict_do_update/on_conflict_do_nothing
+
+    PostgreSQL and SQLite both have INSERT ... ON CONFLICT; this picks the
+    construct for whichever one the session is bound to.
+    """
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    return dialect.insert(model)
+
+def random_uuid():
+    """A fresh UUID per row, generated by the database, for INSERT ... SELECT
+
+    gen_random_uuid() is built into PostgreSQL 13+; on SQLite, where UUID
+    columns are stored as 32 hex digits, random bytes stand in for it.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.gen_random_uuid()
+    return func.lower(func.hex(func.randomblob(16)))
+
+def wants_delta():
+    """Whether a mutation should answer with just the change (Prefer: return=minimal or ?response=delta)"""
+    return request.args.get('response') == 'delta' or 'return=minimal' in request.headers.get('Prefer', '')
+
+def delta_response(body, status):
+    """A minimal mutation response, tagged with the collection's new version"""
+    return body, status, {'ETag': f'W/"{body["version"]}"', 'Preference-Applied': 'return=minimal'}
\ No newline at end of file
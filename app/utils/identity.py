@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from ..extensions import db
+from ..models.user import User
+
+# What get_current_user() returns: enough to authorize a request, without the User row
+Identity = namedtuple('Identity', 'id role is_active')
+
+
+def identity_claims(user):
+    """Extra JWT claims for a user's access token"""
+    return {'role': user.role, 'active': bool(user.is_active)}
+
+
+class IdentityCache:
+    """Per-process, size-bounded TTL cache of user_id -> (role, is_active)
+
+    Entries are dropped in this process as soon as a user's role or active
+    flag changes; other processes see the change within the TTL.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[0], entry[1]
+
+    def put(self, user_id, role, is_active, ttl):
+        with self._lock:
+            self._entries[user_id] = (role, is_active, time.monotonic() + ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return role, is_active
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def load_identity(jwt_data):
+    """JWT user loader: the token's identity, checked against the user's current state
+
+    Returns None, which makes flask_jwt_extended reject the request, when
+    the user no longer exists, has been deactivated or has had their role
+    changed since the token was issued. Tokens issued without the role
+    claim are accepted with the user's current role.
+    """
+    user_id = jwt_data['sub']
+    current = identity_cache.get(user_id)
+    if current is None:
+        row = db.session.execute(select(User.role, User.is_active).where(User.id == user_id)).first()
+        if row is None:
+            return None
+        current = identity_cache.put(user_id, row.role, bool(row.is_active), current_app.config['IDENTITY_CACHE_TTL'])
+
+    role, is_active = current
+    if not is_active or not jwt_data.get('active', True) or jwt_data.get('role', role) != role:
+        return None
+    return Identity(user_id, role, is_active)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(_mapper, _connection, user):
+    state = inspect(user)
+    if state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes():
+        identity_cache.invalidate(user.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(_mapper, _connection, user):
+    identity_cache.invalidate(user.id)
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, or_
+from ..extensions import db
+from ..models.artwork import Artwork
+from ..models.image_asset import ImageAsset, PendingImageDeletion
+from .helpers import upsert_insert
+from .storage import get_storage
+
+
+class ImageDeletionService:
+    """Deletes stored images in batches, outside the request that released them"""
+
+    @staticmethod
+    def enqueue(public_ids):
+        """Schedule images for deletion as part of the caller's transaction
+
+        Images already queued, including by a concurrent transaction, are
+        left as they are.
+        """
+        public_ids = {public_id for public_id in public_ids if public_id}
+        if not public_ids:
+            return
+
+        statement = upsert_insert(PendingImageDeletion).values(
+            [{'public_id': public_id} for public_id in sorted(public_ids)]
+        )
+        db.session.execute(statement.on_conflict_do_nothing(index_elements=['public_id']))
+
+    @staticmethod
+    def drain(max_batches=None):
+        """Delete due images, one storage call per batch, retrying failures with backoff
+
+        Returns the number of images deleted.
+        """
+        storage = get_storage()
+        batch_size = min(current_app.config['IMAGE_DELETE_BATCH_SIZE'], storage.max_delete_batch)
+        deleted = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            now = datetime.utcnow()
+            # SKIP LOCKED lets every worker drain concurrently without double-deleting
+            pending = PendingImageDeletion.query.\
+                filter(PendingImageDeletion.next_attempt_at <= now).\
+                order_by(PendingImageDeletion.next_attempt_at).\
+                limit(batch_size).\
+                with_for_update(skip_locked=True).\
+                all()
+            if not pending:
+                db.session.commit()
+                break
+
+            try:
+                done = storage.delete_many([row.public_id for row in pending])
+                error = "Storage did not confirm deletion"
+            except Exception as e:
+                done = set()
+                error = str(e)
+
+            for row in pending:
+                if row.public_id in done:
+                    db.session.delete(row)
+                else:
+                    row.attempts += 1
+                    row.last_error = error
+                    row.next_attempt_at = now + ImageDeletionService._backoff(row.attempts)
+                    current_app.logger.warning(
+                        f"Image delete failed for {row.public_id} (attempt {row.attempts}): {error}"
+                    )
+
+            db.session.commit()
+            deleted += len(done)
+            batches += 1
+
+            if len(pending) < batch_size:
+                break
+
+        return deleted
+
+    @staticmethod
+    def _backoff(attempts):
+        base = current_app.config['IMAGE_DELETE_RETRY_DELAY']
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), current_app.config['IMAGE_DELETE_MAX_RETRY_DELAY']))
+
+    @staticmethod
+    def sweep_orphans(prefix="artworks/", chunk_size=500):
+        """Queue stored images that no artwork references
+
+        Images younger than ORPHAN_GRACE_PERIOD are skipped, since they may
+        have just been uploaded for an artwork that hasn't been saved yet.
+        An image counts as referenced through image_public_id, a live asset
+        record, or an artwork image_url containing its public ID.
+        Returns the number of images queued.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['ORPHAN_GRACE_PERIOD'])
+        queued = 0
+        chunk = []
+
+        for public_id, created_at in get_storage().iter_images(prefix):
+            if created_at < cutoff:
+                chunk.append(public_id)
+            if len(chunk) >= chunk_size:
+                queued += ImageDeletionService._queue_unreferenced(chunk)
+                chunk = []
+
+        if chunk:
+            queued += ImageDeletionService._queue_unreferenced(chunk)
+        return queued
+
+    @staticmethod
+    def _queue_unreferenced(public_ids):
+        referenced = {
+            row.image_public_id for row in
+            db.session.query(Artwork.image_public_id)
+            .filter(Artwork.image_public_id.in_(public_ids))
+        }
+        referenced.update(
+            row.public_id for row in
+            db.session.query(ImageAsset.public_id)
+            .filter(ImageAsset.public_id.in_(public_ids), ImageAsset.ref_count > 0)
+        )
+        orphans = set(public_ids) - referenced
+        if not orphans:
+            return 0
+
+        # Artworks saved with only an image_url (before image_public_id was
+        # stored, or set through PUT) still use the image if the URL names it
+        urls = [
+            row.image_url for row in
+            db.session.query(Artwork.image_url)
+            .filter(or_(*[Artwork.image_url.contains(public_id, autoescape=True) for public_id in orphans]))
+        ]
+        orphans = {public_id for public_id in orphans if not any(public_id in url for url in urls)}
+        if not orphans:
+            return 0
+
+        # Forget the asset records too, so new uploads aren't deduplicated onto them
+        db.session.execute(
+            delete(ImageAsset).where(ImageAsset.public_id.in_(orphans), ImageAsset.ref_count == 0)
+        )
+        ImageDeletionService.enqueue(orphans)
+        db.session.commit()
+        return len(orphans)
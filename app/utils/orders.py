@@ -0,0 +1,219 @@
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.orm import joinedload, selectinload
+from ..extensions import db
+from ..models.artwork import Artwork, ArtworkReservation
+from ..models.cart import CartItem
+from ..models.order import Order, OrderItem, PendingOrderEmail
+from ..models.user import User
+from .cart_totals import CartTotals
+from .carts import CartService
+from .email_service import EmailService
+from .helpers import random_uuid
+from .reservations import ReservationService
+
+SHIPPING_FIELDS = {'fullName': None, 'address': 'shipping_address', 'city': 'shipping_city',
+                   'country': 'shipping_country', 'postalCode': 'shipping_postal_code'}
+
+
+class CartUnavailableError(Exception):
+    """The cart holds artworks that are unavailable or reserved by someone else, so it can't be checked out"""
+
+    def __init__(self, items, message="Some artworks in your cart are no longer available"):
+        super().__init__(message)
+        self.items = items
+
+
+class OrderService:
+    """Turns carts into orders and sends their confirmations"""
+
+    @staticmethod
+    def shipping_error(shipping_details):
+        """The message for the first missing shipping field, or None"""
+        for field in SHIPPING_FIELDS:
+            if not shipping_details.get(field):
+                return f'Shipping {field} is required'
+        return None
+
+    @staticmethod
+    def checkout(user_id, shipping_details):
+        """Convert the user's cart into an order, in one transaction; returns the order id
+
+        Takes the same handful of statements whatever the cart's size: lock
+        and bump the cart, hold its artworks (or keep the holds taken by
+        hold_cart when checkout started), insert the order with its total
+        summed from the cart, copy the items across with INSERT ... SELECT,
+        claim the artworks as sold, empty the cart and queue the confirmation
+        email. The order is only inserted if the cart is non-empty and every
+        artwork in it is available and held by this user, and only kept if
+        no other order claimed one of them first.
+        """
+        cart = CartService.bump({'user_id': user_id})
+        if cart is None:
+            raise ValueError("Your cart is empty")
+        ReservationService.hold_cart(user_id, cart.id)
+
+        now = datetime.utcnow()
+        shipping = {
+            column: literal(shipping_details[field], getattr(Order, column).type)
+            for field, column in SHIPPING_FIELDS.items() if column
+        }
+        order = OrderService._cart_rows(
+            cart.id, literal(uuid.uuid4(), Order.id.type), literal(user_id, Order.customer_id.type),
+            func.sum(CartItem.quantity * Artwork.price), literal('pending'), *shipping.values(), literal(now), literal(now)
+        ).outerjoin(
+            ArtworkReservation,
+            (ArtworkReservation.artwork_id == CartItem.artwork_id) & (ArtworkReservation.user_id == user_id)
+        ).having(
+            func.count() > 0,
+            func.sum(case((Artwork.is_available.is_(True), 0), else_=1)) == 0,
+            func.count(ArtworkReservation.artwork_id) == func.count()
+        )
+        order_id = db.session.execute(
+            insert(Order).from_select(
+                ['id', 'customer_id', 'total_amount', 'status', *shipping, 'created_at', 'updated_at'], order
+            ).returning(Order.id)
+        ).scalar()
+        if order_id is None:
+            OrderService._refuse(user_id, cart.id)
+
+        db.session.execute(
+            insert(OrderItem).from_select(
+                ['id', 'order_id', 'artwork_id', 'quantity', 'price'],
+                OrderService._cart_rows(
+                    cart.id, random_uuid(), literal(order_id, OrderItem.order_id.type), CartItem.artwork_id,
+                    CartItem.quantity, CartItem.quantity * Artwork.price
+                )
+            )
+        )
+        sold = ReservationService.mark_sold(user_id, order_id)
+        if sold is None:
+            # Another order claimed an artwork between the checks above and now
+            db.session.rollback()
+            OrderService._refuse(user_id, cart.id)
+        db.session.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        CartTotals.refresh(cart.id)
+        db.session.execute(insert(PendingOrderEmail).values(order_id=order_id))
+        db.session.commit()
+        ReservationService.notify(sold)
+        return order_id
+
+    @staticmethod
+    def _refuse(user_id, cart_id):
+        """Roll back and raise the reason the cart can't be checked out"""
+        totals = CartTotals.refresh(cart_id)
+        unavailable = [item for item in CartTotals.changed_items(cart_id) if not item['is_available']] \
+            if totals.unavailable_count else []
+        reserved = ReservationService.held_by_others(user_id, cart_id) if totals.item_count else []
+        db.session.rollback()
+        if unavailable:
+            raise CartUnavailableError(unavailable)
+        if reserved:
+            raise CartUnavailableError(reserved, "Some artworks in your cart are reserved by another collector")
+        if totals.item_count:
+            raise CartUnavailableError([])
+        raise ValueError("Your cart is empty")
+
+    @staticmethod
+    def hold_cart(user_id):
+        """Start checking out: hold every artwork in the user's cart for RESERVATION_TTL
+
+        All or nothing; raises CartUnavailableError if another collector
+        holds any of them, or ValueError if there is nothing to hold.
+        Returns the ids held and when the holds expire.
+        """
+        cart = CartService.bump({'user_id': user_id})
+        if cart is None:
+            raise ValueError("Your cart is empty")
+        held = ReservationService.hold_cart(user_id, cart.id)
+        reserved = ReservationService.held_by_others(user_id, cart.id)
+        if reserved:
+            db.session.rollback()
+            raise CartUnavailableError(reserved, "Some artworks in your cart are reserved by another collector")
+        if not held:
+            db.session.rollback()
+            raise ValueError("Your cart has no available artworks")
+        db.session.commit()
+        expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['RESERVATION_TTL'])
+        return {
+            'held': sorted(str(artwork_id) for artwork_id in held),
+            'expires_at': expires_at.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+
+    @staticmethod
+    def _cart_rows(cart_id, *columns):
+        return select(*columns).select_from(CartItem).\
+            join(Artwork, Artwork.id == CartItem.artwork_id).\
+            where(CartItem.cart_id == cart_id)
+
+    @staticmethod
+    def get(order_id):
+        """An order with its items and their artworks, loaded in a fixed number of queries"""
+        return Order.query.options(selectinload(Order.items).joinedload(OrderItem.artwork)).\
+            filter(Order.id == order_id).one()
+
+    @staticmethod
+    def send_confirmations(max_batches=None):
+        """Send queued order confirmation emails in batches, retrying failures with backoff
+
+        Returns the number of emails sent. An email that still fails after
+        ORDER_EMAIL_MAX_ATTEMPTS is dropped from the queue and logged.
+        """
+        batch_size = current_app.config['ORDER_EMAIL_BATCH_SIZE']
+        sent = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            now = datetime.utcnow()
+            # SKIP LOCKED lets every worker send concurrently without sending twice
+            pending = PendingOrderEmail.query.\
+                options(joinedload(PendingOrderEmail.order).selectinload(Order.items).joinedload(OrderItem.artwork)).\
+                filter(PendingOrderEmail.next_attempt_at <= now).\
+                order_by(PendingOrderEmail.next_attempt_at).\
+                limit(batch_size).\
+                with_for_update(of=PendingOrderEmail, skip_locked=True).\
+                all()
+            if not pending:
+                db.session.commit()
+                break
+
+            emails = dict(db.session.execute(
+                select(User.id, User.email).where(User.id.in_({row.order.customer_id for row in pending}))
+            ).all())
+            for row in pending:
+                try:
+                    done = EmailService.send_order_confirmation(emails[row.order.customer_id], row.order)
+                    error = "Email service did not accept the message"
+                except Exception as e:
+                    done = False
+                    error = str(e)
+
+                if done:
+                    db.session.delete(row)
+                    sent += 1
+                    continue
+                row.attempts += 1
+                row.last_error = error
+                if row.attempts >= current_app.config['ORDER_EMAIL_MAX_ATTEMPTS']:
+                    current_app.logger.error(f"Giving up on confirmation email for order {row.order_id}: {error}")
+                    db.session.delete(row)
+                else:
+                    row.next_attempt_at = now + OrderService._backoff(row.attempts)
+                    current_app.logger.warning(
+                        f"Confirmation email failed for order {row.order_id} (attempt {row.attempts}): {error}"
+                    )
+
+            db.session.commit()
+            batches += 1
+
+            if len(pending) < batch_size:
+                break
+
+        return sent
+
+    @staticmethod
+    def _backoff(attempts):
+        base = current_app.config['ORDER_EMAIL_RETRY_DELAY']
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), current_app.config['ORDER_EMAIL_MAX_RETRY_DELAY']))
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are already queued; the client should retry shortly"""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small, bounded pool of threads
+
+    hashlib's scrypt and pbkdf2 release the GIL, so at most
+    PASSWORD_HASH_WORKERS hashes burn CPU at once per process however many
+    logins arrive together; the other request threads keep serving. Up to
+    PASSWORD_HASH_MAX_QUEUE more wait their turn, and beyond that (or after
+    waiting PASSWORD_HASH_TIMEOUT seconds) callers get PasswordHasherBusy.
+    """
+
+    _lock = threading.Lock()
+    _executor = None
+    _slots = None
+    _pid = None
+    _stats = None
+    _prefixes = {}
+
+    @staticmethod
+    def hash(password):
+        """Hash a password with PASSWORD_HASH_METHOD"""
+        method = current_app.config['PASSWORD_HASH_METHOD']
+        return PasswordHasher._run(generate_password_hash, password, method=method)
+
+    @staticmethod
+    def verify(password_hash, password):
+        return PasswordHasher._run(check_password_hash, password_hash, password)
+
+    @staticmethod
+    def needs_rehash(password_hash):
+        """Whether a stored hash was made with other parameters than PASSWORD_HASH_METHOD"""
+        return password_hash.split('$', 1)[0] != PasswordHasher._method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+    @staticmethod
+    def _method_prefix(method):
+        # Werkzeug fills in defaults (e.g. pbkdf2:sha256 -> pbkdf2:sha256:1000000),
+        # so compare against what it actually writes for the configured method
+        prefix = PasswordHasher._prefixes.get(method)
+        if prefix is None:
+            prefix = generate_password_hash('', method=method).split('$', 1)[0]
+            PasswordHasher._prefixes[method] = prefix
+        return prefix
+
+    @staticmethod
+    def metrics():
+        """Counters for this process since it started hashing"""
+        stats = PasswordHasher._stats
+        if stats is None:
+            return {'workers': 0, 'submitted': 0}
+        with PasswordHasher._lock:
+            completed = stats['completed'] or 1
+            return {
+                'workers': stats['workers'],
+                'submitted': stats['submitted'],
+                'completed': stats['completed'],
+                'rejected': stats['rejected'],
+                'timed_out': stats['timed_out'],
+                'in_flight': stats['in_flight'],
+                'max_in_flight': stats['max_in_flight'],
+                'avg_queue_wait_ms': round(stats['queue_wait'] / completed * 1000, 2),
+                'max_queue_wait_ms': round(stats['max_queue_wait'] * 1000, 2),
+                'avg_hash_ms': round(stats['hash_time'] / completed * 1000, 2),
+            }
+
+    @staticmethod
+    def _pool():
+        # Created per process on first use, so forked workers don't share one
+        if PasswordHasher._pid != os.getpid():
+            with PasswordHasher._lock:
+                if PasswordHasher._pid != os.getpid():
+                    workers = current_app.config['PASSWORD_HASH_WORKERS']
+                    PasswordHasher._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                    PasswordHasher._slots = threading.BoundedSemaphore(workers + current_app.config['PASSWORD_HASH_MAX_QUEUE'])
+                    PasswordHasher._stats = dict.fromkeys((
+                        'submitted', 'completed', 'rejected', 'timed_out', 'in_flight', 'max_in_flight',
+                        'queue_wait', 'max_queue_wait', 'hash_time'
+                    ), 0)
+                    PasswordHasher._stats['workers'] = workers
+                    PasswordHasher._pid = os.getpid()
+        return PasswordHasher._executor
+
+    @staticmethod
+    def _count(**changes):
+        with PasswordHasher._lock:
+            stats = PasswordHasher._stats
+            for key, value in changes.items():
+                stats[key] += value
+            stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+
+    @staticmethod
+    def _run(func, *args, **kwargs):
+        executor = PasswordHasher._pool()
+        if not PasswordHasher._slots.acquire(blocking=False):
+            PasswordHasher._count(rejected=1)
+            raise PasswordHasherBusy("Too many sign-ins in progress, please retry shortly")
+        PasswordHasher._count(submitted=1, in_flight=1)
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                waited, took = started - submitted, time.perf_counter() - started
+                with PasswordHasher._lock:
+                    stats = PasswordHasher._stats
+                    stats['queue_wait'] += waited
+                    stats['max_queue_wait'] = max(stats['max_queue_wait'], waited)
+                    stats['hash_time'] += took
+
+        future = executor.submit(task)
+        future.add_done_callback(PasswordHasher._release)
+        try:
+            return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+        except FutureTimeoutError:
+            if future.cancel():  # Still queued: give up on it
+                PasswordHasher._count(timed_out=1)
+                raise PasswordHasherBusy("Too many sign-ins in progress, please retry shortly")
+            return future.result()  # Already hashing; it won't be long
+
+    @staticmethod
+    def _release(future):
+        PasswordHasher._slots.release()
+        PasswordHasher._count(in_flight=-1, completed=0 if future.cancelled() else 1)
@@ -0,0 +1,228 @@
+import math
+import threading
+import time
+from functools import wraps
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+SHED_MESSAGE = 'Server is busy, please retry shortly'
+
+
+class RatePolicy:
+    """A token bucket per client: ``limit`` like "10/minute", refilling evenly
+
+    ``burst`` is how many requests may arrive at once (default: the whole
+    limit). ``key`` is 'ip', or 'user' to count signed-in users by user id
+    and everyone else by IP. ``applies`` optionally limits the policy to
+    some requests, e.g. only those with a search parameter.
+    """
+
+    def __init__(self, name, limit, burst=None, key='ip', applies=None):
+        count, _, period = limit.partition('/')
+        if period not in PERIODS or not count.isdigit() or int(count) < 1:
+            raise ValueError(f"Rate limit {limit!r} must look like 10/minute")
+        if key not in ('ip', 'user'):
+            raise ValueError("key must be 'ip' or 'user'")
+        self.name = name
+        self.limit = limit
+        self.rate = int(count) / PERIODS[period]  # tokens per second
+        self.burst = burst or int(count)
+        self.key = key
+        self.applies = applies
+
+    def client_key(self):
+        if self.key == 'user':
+            try:
+                verify_jwt_in_request(optional=True)
+                user_id = get_jwt_identity()
+            except Exception:
+                user_id = None  # Bad tokens are rejected by the endpoint itself
+            if user_id:
+                return f"{self.name}:user:{user_id}"
+        return f"{self.name}:ip:{client_ip()}"
+
+
+def client_ip():
+    if current_app.config['RATE_LIMIT_TRUST_PROXY'] and request.access_route:
+        return request.access_route[0]  # X-Forwarded-For, set by the load balancer
+    return request.remote_addr
+
+
+class MemoryBucketStore:
+    """Token buckets in this process only; each worker enforces the limit separately"""
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at, full_at)
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def take(self, key, rate, burst):
+        """Take a token; returns (allowed, seconds until one is available)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _full_at = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # When the bucket will have refilled at its own policy's rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+            self._calls += 1
+            if self._calls % 10000 == 0:
+                self._prune(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def _prune(self, now):
+        # A bucket that has refilled is the same as no bucket
+        for key in [key for key, (_tokens, _updated_at, full_at) in self._buckets.items() if now >= full_at]:
+            del self._buckets[key]
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis"""
+
+    SCRIPT = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens, ts = tonumber(bucket[1]) or burst, tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then tokens = tokens - 1; allowed = 1 end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL points at Redis but the redis package isn't installed")
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, burst):
+        allowed, tokens = self._script(keys=[f"ratelimit:{key}"], args=[rate, burst])
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / rate
+
+
+def get_bucket_store():
+    """Return the app's bucket store, creating it from RATE_LIMIT_STORAGE_URL on first use"""
+    store = current_app.extensions.get('rate_limit_store')
+    if store is None:
+        url = current_app.config['RATE_LIMIT_STORAGE_URL']
+        store = RedisBucketStore(url) if url.startswith(('redis://', 'rediss://')) else MemoryBucketStore()
+        current_app.extensions['rate_limit_store'] = store
+    return store
+
+
+class RateLimitStats:
+    """Per-process counts of rejected requests, for /metrics"""
+
+    _lock = threading.Lock()
+    limited = {}  # policy name -> requests turned away with 429
+    shed = {'concurrency': 0, 'queue_time': 0}
+
+    @staticmethod
+    def count(bucket, key):
+        with RateLimitStats._lock:
+            bucket[key] = bucket.get(key, 0) + 1
+
+    @staticmethod
+    def metrics():
+        with RateLimitStats._lock:
+            return {'limited': dict(RateLimitStats.limited), 'shed': dict(RateLimitStats.shed)}
+
+
+def too_many(message, retry_after, status=429):
+    return {'message': message}, status, {'Retry-After': str(max(1, math.ceil(retry_after)))}
+
+
+def rate_limited(policy):
+    """Reject a client's requests beyond ``policy`` with 429 and Retry-After"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config['RATE_LIMIT_ENABLED'] or (policy.applies and not policy.applies()):
+                return fn(*args, **kwargs)
+            try:
+                allowed, retry_after = get_bucket_store().take(policy.client_key(), policy.rate, policy.burst)
+            except Exception as e:
+                # Fail open: an unreachable shared store mustn't take the API down with it
+                current_app.logger.error(f"Rate limit check failed: {str(e)}")
+                return fn(*args, **kwargs)
+            if not allowed:
+                RateLimitStats.count(RateLimitStats.limited, policy.name)
+                return too_many(f'Too many requests; limit is {policy.limit}', retry_after)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class AdmissionControl:
+    """Sheds load with 503 before a request touches the database
+
+    A request is turned away when this process already has
+    RATE_LIMIT_MAX_CONCURRENT requests in flight (threaded workers), or
+    when the load balancer's X-Request-Start header shows it has already
+    queued for longer than RATE_LIMIT_MAX_QUEUE_MS (sync workers, where the
+    queue is the listen backlog). Exempt paths such as /health always get
+    through, so health checks keep answering under load.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['admission_control'] = self
+        if not app.config['RATE_LIMIT_ENABLED']:
+            return
+        self.max_concurrent = app.config['RATE_LIMIT_MAX_CONCURRENT']
+        self.max_queue_ms = app.config['RATE_LIMIT_MAX_QUEUE_MS']
+        self.exempt = tuple(app.config['RATE_LIMIT_EXEMPT'])
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    def _admit(self):
+        if request.path.startswith(self.exempt):
+            return None
+        queued_ms = self._queued_ms()
+        if self.max_queue_ms and queued_ms is not None and queued_ms > self.max_queue_ms:
+            RateLimitStats.count(RateLimitStats.shed, 'queue_time')
+            return too_many(SHED_MESSAGE, 1, status=503)
+
+        with self._lock:
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                RateLimitStats.count(RateLimitStats.shed, 'concurrency')
+                return too_many(SHED_MESSAGE, 1, status=503)
+            self.in_flight += 1
+        request.environ['artmarket.admitted'] = True
+        return None
+
+    def _release(self, _exc=None):
+        if request.environ.pop('artmarket.admitted', False):
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _queued_ms():
+        # "t=<microseconds>" (nginx) or milliseconds since the epoch (Heroku-style routers)
+        header = request.headers.get('X-Request-Start', '').removeprefix('t=')
+        try:
+            started = float(header)
+        except ValueError:
+            return None
+        now_ms = time.time() * 1000
+        started_ms = started / 1000 if started > now_ms * 100 else started
+        return now_ms - started_ms
@@ -0,0 +1,149 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, delete, distinct, exists, func, literal, select, update
+from ..extensions import db
+from ..models.artwork import Artwork, ArtworkReservation
+from ..models.cart import CartItem
+from ..models.order import OrderItem
+from ..signals import notify_artworks_changed
+from .helpers import upsert_insert
+
+
+class ReservationService:
+    """Holds one-of-a-kind artworks for a collector while they check out
+
+    A hold is a row in artwork_reservations keyed by artwork, so taking one
+    is a single upsert that never locks the artwork row itself, and checking
+    for one is a primary-key probe. Placing the order converts the holds
+    into a sale: the artworks are marked unavailable and the holds dropped.
+    Holds whose order is never placed count only until expires_at; expired
+    rows are taken over in place or deleted by the sweeper.
+    """
+
+    @staticmethod
+    def unreserved(user_id=None, now=None):
+        """Filter for artworks with no live hold, other than ``user_id``'s own"""
+        now = now or datetime.utcnow()
+        held = select(ArtworkReservation.artwork_id).where(
+            ArtworkReservation.artwork_id == Artwork.id, ArtworkReservation.expires_at > now
+        )
+        if user_id:
+            held = held.where(ArtworkReservation.user_id != user_id)
+        return ~exists(held)
+
+    @staticmethod
+    def hold_cart(user_id, cart_id):
+        """Hold, or extend the hold on, every available artwork in the cart; returns the ids held
+
+        Artworks that another collector holds are left alone and missing from
+        the result. Part of the caller's transaction.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=current_app.config['RESERVATION_TTL'])
+        rows = select(
+            CartItem.artwork_id, literal(user_id, ArtworkReservation.user_id.type), literal(expires_at), literal(now)
+        ).join(Artwork, Artwork.id == CartItem.artwork_id).\
+            where(CartItem.cart_id == cart_id, Artwork.is_available.is_(True))
+        statement = upsert_insert(ArtworkReservation).from_select(
+            ['artwork_id', 'user_id', 'expires_at', 'created_at'], rows
+        )
+        own = ArtworkReservation.user_id == statement.excluded.user_id
+        statement = statement.on_conflict_do_update(
+            index_elements=[ArtworkReservation.artwork_id],
+            set_={
+                'user_id': statement.excluded.user_id,
+                'expires_at': statement.excluded.expires_at,
+                'created_at': case((own, ArtworkReservation.created_at), else_=statement.excluded.created_at)
+            },
+            where=own | (ArtworkReservation.expires_at <= now)
+        )
+        return set(db.session.execute(statement.returning(ArtworkReservation.artwork_id)).scalars())
+
+    @staticmethod
+    def held_by_others(user_id, cart_id):
+        """The cart's artworks that another collector currently holds"""
+        rows = db.session.execute(
+            select(Artwork.id, Artwork.title, ArtworkReservation.expires_at).
+            join(CartItem, CartItem.artwork_id == Artwork.id).
+            join(ArtworkReservation, ArtworkReservation.artwork_id == Artwork.id).
+            where(CartItem.cart_id == cart_id, ArtworkReservation.user_id != user_id,
+                  ArtworkReservation.expires_at > datetime.utcnow())
+        )
+        return [{
+            'artwork_id': str(row.id),
+            'title': row.title,
+            'reserved_until': row.expires_at.strftime('%Y-%m-%dT%H:%M:%S'),
+        } for row in rows]
+
+    @staticmethod
+    def mark_sold(user_id, order_id):
+        """Claim the order's artworks: take them off sale and drop the buyer's holds on them
+
+        The claim is one conditional UPDATE, so of two orders racing for the
+        same artwork only one gets it. Part of the caller's transaction;
+        returns (artwork id, artist id) rows to pass to notify() once it
+        commits, or None if any artwork was already sold or is held by
+        another collector, in which case the caller must roll back.
+        """
+        ordered = select(OrderItem.artwork_id).where(OrderItem.order_id == order_id)
+        wanted = db.session.execute(
+            select(func.count(distinct(OrderItem.artwork_id))).where(OrderItem.order_id == order_id)
+        ).scalar()
+        sold = db.session.execute(
+            update(Artwork).
+            where(Artwork.id.in_(ordered), Artwork.is_available.is_(True), ReservationService.unreserved(user_id)).
+            values(is_available=False).
+            returning(Artwork.id, Artwork.artist_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        if len(sold) < wanted:
+            return None
+        db.session.execute(delete(ArtworkReservation).where(
+            ArtworkReservation.user_id == user_id, ArtworkReservation.artwork_id.in_(ordered)
+        ))
+        return sold
+
+    @staticmethod
+    def mark_unsold(order_id):
+        """Put a cancelled order's artworks back on sale; returns rows for notify()"""
+        ordered = select(OrderItem.artwork_id).where(OrderItem.order_id == order_id)
+        return db.session.execute(
+            update(Artwork).where(Artwork.id.in_(ordered), Artwork.is_available.is_(False)).
+            values(is_available=True).returning(Artwork.id, Artwork.artist_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+
+    @staticmethod
+    def notify(rows):
+        """Send artworks_changed for (artwork id, artist id) rows, once per artist"""
+        by_artist = defaultdict(list)
+        for artwork_id, artist_id in rows:
+            by_artist[artist_id].append(artwork_id)
+        for artist_id, artwork_ids in by_artist.items():
+            notify_artworks_changed(artist_id, artwork_ids)
+
+    @staticmethod
+    def release_expired(batch_size=1000):
+        """Delete expired holds in batches; returns the number removed"""
+        removed = 0
+        while True:
+            now = datetime.utcnow()
+            expired = db.session.execute(
+                select(ArtworkReservation.artwork_id).
+                where(ArtworkReservation.expires_at <= now).
+                limit(batch_size).
+                with_for_update(skip_locked=True)
+            ).scalars().all()
+            if expired:
+                db.session.execute(delete(ArtworkReservation).where(
+                    ArtworkReservation.artwork_id.in_(expired), ArtworkReservation.expires_at <= now
+                ))
+            db.session.commit()
+            removed += len(expired)
+            if len(expired) < batch_size:
+                break
+
+        if removed:
+            current_app.logger.info(f"Released {removed} expired artwork reservations")
+        return removed
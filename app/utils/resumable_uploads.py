@@ -0,0 +1,187 @@
+import base64
+import fcntl
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from ..extensions import db
+from ..models.upload import ResumableUpload
+from .cloudinary_service import CloudinaryService
+from .uploads import SNIFF_BYTES, sniff_image_type
+
+TUS_VERSION = '1.0.0'
+
+
+def parse_upload_metadata(header):
+    """Decode a tus Upload-Metadata header into a dict of strings
+
+    The header is a comma separated list of ``key base64(value)`` pairs;
+    values that don't decode are dropped.
+    """
+    metadata = {}
+    for pair in (header or '').split(','):
+        key, _, value = pair.strip().partition(' ')
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode('utf-8')
+        except ValueError:
+            continue
+    return metadata
+
+
+class ResumableUploadService:
+    """Tus-style chunked uploads, assembled in a part file on local disk
+
+    Each chunk is appended at the recorded offset, so a client whose
+    connection drops can ask for the offset and carry on from there.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    @staticmethod
+    def _part_path(upload):
+        return os.path.join(current_app.config['RESUMABLE_UPLOAD_DIR'], f"{upload.id}.part")
+
+    @staticmethod
+    def _expiry(now=None):
+        return (now or datetime.utcnow()) + timedelta(seconds=current_app.config['RESUMABLE_UPLOAD_TTL'])
+
+    @staticmethod
+    def create(owner_id, upload_length, filename=None):
+        """Register a new upload and create its empty part file"""
+        upload = ResumableUpload(
+            owner_id=owner_id,
+            upload_length=upload_length,
+            upload_offset=0,
+            filename=filename,
+            expires_at=ResumableUploadService._expiry()
+        )
+        db.session.add(upload)
+        db.session.flush()
+
+        os.makedirs(current_app.config['RESUMABLE_UPLOAD_DIR'], exist_ok=True)
+        open(ResumableUploadService._part_path(upload), 'wb').close()
+        db.session.commit()
+        return upload
+
+    @staticmethod
+    def get(upload_id, owner_id):
+        """Return the owner's upload if it hasn't expired, else None"""
+        return ResumableUpload.query.filter(
+            ResumableUpload.id == upload_id,
+            ResumableUpload.owner_id == owner_id,
+            ResumableUpload.expires_at > datetime.utcnow()
+        ).first()
+
+    @staticmethod
+    @contextmanager
+    def locked(upload):
+        """Lock the upload's part file for writing
+
+        Yields the open file, or None if another request is already writing
+        to it or the part file is gone because the upload completed. The
+        upload row is refreshed once the lock is held (or the file found
+        missing) so its offset and completed_at can be trusted.
+        """
+        try:
+            part = open(ResumableUploadService._part_path(upload), 'r+b')
+        except FileNotFoundError:
+            db.session.refresh(upload)
+            yield None
+            return
+        with part:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield None
+                return
+            db.session.refresh(upload)
+            yield part
+
+    @staticmethod
+    def append(upload, part, stream):
+        """Write a chunk from ``stream`` at the upload's offset
+
+        Whatever arrived is kept even if the client disconnects part way,
+        so the next attempt resumes after it. Returns the new offset.
+        """
+        part.seek(upload.upload_offset)
+        written = 0
+        try:
+            for chunk in iter(lambda: stream.read(ResumableUploadService.CHUNK_SIZE), b''):
+                part.write(chunk)
+                written += len(chunk)
+        finally:
+            part.truncate()
+            part.flush()
+            os.fsync(part.fileno())
+            upload.upload_offset += written
+            upload.expires_at = ResumableUploadService._expiry()
+            db.session.commit()
+        return upload.upload_offset
+
+    @staticmethod
+    def complete(upload, part, folder="artworks"):
+        """Hand an assembled upload to the image pipeline
+
+        Raises ValueError if the file isn't a supported image.
+        """
+        part.seek(0)
+        if sniff_image_type(part.read(SNIFF_BYTES)) is None:
+            raise ValueError("File is not a supported image (JPEG, PNG, GIF or WebP)")
+        part.seek(0)
+
+        upload_result = CloudinaryService.upload_image(part, upload.owner_id, folder=folder)
+
+        now = datetime.utcnow()
+        upload.public_id = upload_result['public_id']
+        upload.completed_at = now
+        # Keep the record around so a client that missed the response can still HEAD it
+        upload.expires_at = ResumableUploadService._expiry(now)
+        db.session.commit()
+
+        ResumableUploadService._remove_part(upload)
+        return upload_result
+
+    @staticmethod
+    def terminate(upload):
+        """Discard an upload and its part file"""
+        ResumableUploadService._remove_part(upload)
+        db.session.delete(upload)
+        db.session.commit()
+
+    @staticmethod
+    def _remove_part(upload):
+        try:
+            os.remove(ResumableUploadService._part_path(upload))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def expire(batch_size=500):
+        """Delete expired uploads and their part files
+
+        Returns the number of uploads removed.
+        """
+        removed = 0
+        while True:
+            expired = ResumableUpload.query.\
+                filter(ResumableUpload.expires_at <= datetime.utcnow()).\
+                limit(batch_size).\
+                with_for_update(skip_locked=True).\
+                all()
+            if not expired:
+                db.session.commit()
+                break
+
+            for upload in expired:
+                ResumableUploadService._remove_part(upload)
+                db.session.delete(upload)
+            db.session.commit()
+            removed += len(expired)
+
+            if len(expired) < batch_size:
+                break
+
+        return removed
@@ -0,0 +1,386 @@
+import cloudinary
+import cloudinary.uploader
+import cloudinary.api
+import cloudinary.utils
+from cloudinary.exceptions import NotFound
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, url_for
+from itsdangerous import Signer, BadSignature
+from werkzeug.security import safe_join
+from PIL import Image
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+
+
+class StorageBackend:
+    """Where image files live
+
+    The upload pipeline in CloudinaryService optimizes and deduplicates images;
+    a backend only stores, describes and deletes the resulting files.
+    """
+    name = None
+    max_delete_batch = 100
+
+    def save(self, image_file, public_id, folder=None):
+        """Store an optimized image and return its public_id, url, format, width, height and etag"""
+        raise NotImplementedError
+
+    def describe(self, public_id):
+        """Return the same fields as save() for a stored image, or None if it doesn't exist"""
+        raise NotImplementedError
+
+    def delete(self, public_id):
+        """Delete a stored image, returning True on success"""
+        raise NotImplementedError
+
+    def delete_many(self, public_ids):
+        """Delete up to max_delete_batch images
+
+        Returns the set of public IDs that are gone (deleted or already missing);
+        anything else should be retried.
+        """
+        raise NotImplementedError
+
+    def iter_images(self, prefix):
+        """Yield (public_id, created_at) for every stored image under prefix"""
+        raise NotImplementedError
+
+    def open_preview(self, public_id):
+        """Return a binary file object with a small (about 64px) copy of a stored image"""
+        raise NotImplementedError
+
+    def create_signed_upload(self, public_id, expires_at):
+        """Return the URL and signed form fields a client uses to upload directly"""
+        raise NotImplementedError
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def __init__(self, config):
+        cloudinary.config(
+            cloud_name=config.get('CLOUDINARY_CLOUD_NAME'),
+            api_key=config.get('CLOUDINARY_API_KEY'),
+            api_secret=config.get('CLOUDINARY_API_SECRET'),
+            secure=True
+        )
+        self.api_key = config.get('CLOUDINARY_API_KEY')
+        self.api_secret = config.get('CLOUDINARY_API_SECRET')
+
+    def save(self, image_file, public_id, folder=None):
+        upload_result = cloudinary.uploader.upload(
+            image_file,
+            public_id=public_id,
+            folder=folder,
+            transformation=[
+                {"width": 1200, "height": 1200, "crop": "limit"},
+                {"quality": "auto:good"},
+                {"format": "jpg"}
+            ]
+        )
+        return self._result(upload_result)
+
+    def describe(self, public_id):
+        try:
+            return self._result(cloudinary.api.resource(public_id))
+        except NotFound:
+            return None
+
+    def delete(self, public_id):
+        result = cloudinary.uploader.destroy(public_id)
+        return result.get("result") == "ok"
+
+    def delete_many(self, public_ids):
+        result = cloudinary.api.delete_resources(list(public_ids))
+        return {
+            public_id for public_id, status in result.get("deleted", {}).items()
+            if status in ("deleted", "not_found")
+        }
+
+    def iter_images(self, prefix):
+        cursor = None
+        while True:
+            options = {"type": "upload", "prefix": prefix, "max_results": 500}
+            if cursor:
+                options["next_cursor"] = cursor
+            page = cloudinary.api.resources(**options)
+            for resource in page.get("resources", []):
+                created_at = datetime.strptime(resource["created_at"], "%Y-%m-%dT%H:%M:%SZ")
+                yield resource["public_id"], created_at
+            cursor = page.get("next_cursor")
+            if not cursor:
+                break
+
+    def open_preview(self, public_id):
+        url, _options = cloudinary.utils.cloudinary_url(public_id, width=64, height=64, crop="limit", format="jpg")
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return io.BytesIO(response.read())
+
+    def create_signed_upload(self, public_id, expires_at):
+        params = {
+            "public_id": public_id,
+            "timestamp": int(time.time()),
+            "transformation": "c_limit,h_1200,w_1200/q_auto:good/f_jpg"
+        }
+        signature = cloudinary.utils.api_sign_request(params, self.api_secret)
+        return {
+            "upload_url": cloudinary.utils.cloudinary_api_url("upload", resource_type="image"),
+            "fields": dict(params, signature=signature, api_key=self.api_key)
+        }
+
+    @staticmethod
+    def _result(resource):
+        return {
+            "public_id": resource["public_id"],
+            "url": resource["secure_url"],
+            "format": resource.get("format"),
+            "width": resource.get("width"),
+            "height": resource.get("height"),
+            "etag": resource.get("etag")
+        }
+
+
+class DiskLRUCache:
+    """Size-bounded directory of generated files, evicting least recently used first
+
+    The index is per process and rebuilt from file access times on start-up;
+    files evicted by another worker are simply regenerated on the next miss.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        found = []
+        for dirpath, _dirnames, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                found.append((stat.st_atime, path, stat.st_size))
+        for _atime, path, size in sorted(found):
+            self._entries[path] = size
+            self._size += size
+        self._evict()
+
+    def path_for(self, key):
+        return safe_join(self.directory, key)
+
+    def get(self, key):
+        """Return the cached file's path, or None on a miss"""
+        path = self.path_for(key)
+        with self._lock:
+            if path in self._entries:
+                if os.path.exists(path):
+                    self._entries.move_to_end(path)
+                    return path
+                self._size -= self._entries.pop(path)
+        return None
+
+    def put(self, key, write):
+        """Create a cache entry by calling ``write(fileobj)`` and return its path"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                write(tmp)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._size -= self._entries.pop(path, 0)
+            self._entries[path] = size
+            self._size += size
+            self._evict(keep=path)
+        return path
+
+    def discard(self, key):
+        path = self.path_for(key)
+        with self._lock:
+            self._size -= self._entries.pop(path, 0)
+        if os.path.exists(path):
+            os.unlink(path)
+
+    def _evict(self, keep=None):
+        while self._size > self.max_bytes and self._entries:
+            path, size = next(iter(self._entries.items()))
+            if path == keep:
+                break
+            self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class LocalStorage(StorageBackend):
+    """Stores originals on local disk and serves resized copies from an LRU cache"""
+    name = "local"
+
+    def __init__(self, config):
+        self.root = os.path.abspath(config['MEDIA_ROOT'])
+        self.originals_dir = os.path.join(self.root, 'originals')
+        self.widths = sorted(config['MEDIA_WIDTHS'])
+        self.quality = config['MEDIA_QUALITY']
+        self.signer = Signer(config['SECRET_KEY'], salt='local-direct-upload')
+        os.makedirs(self.originals_dir, exist_ok=True)
+        self.cache = DiskLRUCache(os.path.join(self.root, 'cache'), config['MEDIA_CACHE_MAX_BYTES'])
+
+    def original_path(self, public_id):
+        path = safe_join(self.originals_dir, f"{public_id}.jpg")
+        if path is None:
+            raise ValueError("Invalid public ID")
+        return path
+
+    def save(self, image_file, public_id, folder=None):
+        path = self.original_path(public_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Copy in chunks, computing the etag on the way through
+        digest = hashlib.md5()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: image_file.read(64 * 1024), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+        os.replace(tmp_path, path)
+
+        return self._result(public_id, path, digest.hexdigest())
+
+    def describe(self, public_id):
+        path = self.original_path(public_id)
+        if not os.path.exists(path):
+            return None
+        digest = hashlib.md5()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        return self._result(public_id, path, digest.hexdigest())
+
+    def delete(self, public_id):
+        path = self.original_path(public_id)
+        for width in self.widths:
+            self.cache.discard(self._rendition_key(public_id, width))
+        if not os.path.exists(path):
+            return False
+        os.unlink(path)
+        return True
+
+    def delete_many(self, public_ids):
+        for public_id in public_ids:
+            self.delete(public_id)
+        return set(public_ids)
+
+    def iter_images(self, prefix):
+        for dirpath, _dirnames, filenames in os.walk(self.originals_dir):
+            for filename in filenames:
+                if not filename.endswith('.jpg'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                public_id = os.path.relpath(path, self.originals_dir)[:-len('.jpg')].replace(os.sep, '/')
+                if public_id.startswith(prefix):
+                    yield public_id, datetime.utcfromtimestamp(os.path.getmtime(path))
+
+    def open_preview(self, public_id):
+        path = self.rendition_path(public_id, self.widths[0])
+        if path is None:
+            raise FileNotFoundError(public_id)
+        return open(path, 'rb')
+
+    def create_signed_upload(self, public_id, expires_at):
+        return {
+            "upload_url": url_for('media.direct_upload', _external=True),
+            "fields": {
+                "public_id": public_id,
+                "expires_at": expires_at,
+                "signature": self.signer.get_signature(f"{public_id}:{expires_at}").decode()
+            }
+        }
+
+    def verify_signed_upload(self, public_id, expires_at, signature):
+        """Check fields produced by create_signed_upload(), raising ValueError if invalid"""
+        try:
+            valid = self.signer.verify_signature(f"{public_id}:{expires_at}", signature)
+        except BadSignature:
+            valid = False
+        if not valid:
+            raise ValueError("Invalid upload signature")
+        if int(expires_at) < time.time():
+            raise ValueError("Upload signature has expired")
+
+    def rendition_width(self, requested):
+        """Snap a requested width to the configured sizes so the cache stays bounded"""
+        for width in self.widths:
+            if width >= requested:
+                return width
+        return self.widths[-1]
+
+    def rendition_path(self, public_id, width):
+        """Return the path of the image resized to ``width``, generating it on a miss"""
+        key = self._rendition_key(public_id, width)
+        path = self.cache.get(key)
+        if path:
+            return path
+
+        original = self.original_path(public_id)
+        if not os.path.exists(original):
+            return None
+
+        def write(fileobj):
+            with Image.open(original) as image:
+                image.draft('RGB', (width, width))
+                image.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+                image.convert('RGB').save(fileobj, format='JPEG', quality=self.quality, optimize=True)
+
+        return self.cache.put(key, write)
+
+    @staticmethod
+    def _rendition_key(public_id, width):
+        return f"{width}/{public_id}.jpg"
+
+    def _result(self, public_id, path, etag):
+        with Image.open(path) as image:
+            width, height = image.size
+            image_format = (image.format or 'jpeg').lower()
+        return {
+            "public_id": public_id,
+            "url": url_for('media.serve_image', public_id=public_id, _external=True),
+            "format": 'jpg' if image_format == 'jpeg' else image_format,
+            "width": width,
+            "height": height,
+            "etag": etag
+        }
+
+
+BACKENDS = {
+    CloudinaryStorage.name: CloudinaryStorage,
+    LocalStorage.name: LocalStorage,
+}
+
+
+def get_storage():
+    """Return the storage backend configured by STORAGE_BACKEND for the current app"""
+    backend = current_app.extensions.get('storage')
+    if backend is None:
+        backend_class = BACKENDS.get(current_app.config['STORAGE_BACKEND'])
+        if backend_class is None:
+            raise ValueError(f"Unknown storage backend: {current_app.config['STORAGE_BACKEND']}")
+        backend = backend_class(current_app.config)
+        current_app.extensions['storage'] = backend
+    return backend
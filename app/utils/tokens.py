@@ -0,0 +1,176 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from ..extensions import db
+from ..models.token import RevokedToken
+from .identity import identity_claims
+
+
+class TokenReuseError(Exception):
+    """A refresh token was presented after it had already been rotated"""
+
+
+class RevocationList:
+    """In-process copy of revoked_tokens, checked on every authenticated request
+
+    Lookups are a set membership test. The set is refreshed from the table
+    at most every REVOCATION_SYNC_INTERVAL seconds by whichever request
+    finds it stale, so a revocation made by another process takes at most
+    that long to apply here; revocations made by this process apply at once.
+    """
+
+    _lock = threading.Lock()
+    _revoked = {}  # jti or family id -> expires_at
+    _synced_at = None  # time.monotonic() of the last sync
+    _high_water = None  # Latest revoked_at seen
+
+    @staticmethod
+    def is_revoked(jwt_data):
+        RevocationList._maybe_sync()
+        revoked = RevocationList._revoked
+        return jwt_data.get('jti') in revoked or jwt_data.get('fam') in revoked
+
+    @staticmethod
+    def contains(key):
+        return key in RevocationList._revoked
+
+    @staticmethod
+    def add(key, expires_at):
+        with RevocationList._lock:
+            RevocationList._revoked[key] = expires_at
+
+    @staticmethod
+    def clear():
+        with RevocationList._lock:
+            RevocationList._revoked = {}
+            RevocationList._synced_at = None
+            RevocationList._high_water = None
+
+    @staticmethod
+    def _maybe_sync():
+        synced_at = RevocationList._synced_at
+        if synced_at is not None and time.monotonic() - synced_at < current_app.config['REVOCATION_SYNC_INTERVAL']:
+            return
+        # One request syncs; the others carry on with the current set
+        if not RevocationList._lock.acquire(blocking=False):
+            return
+        try:
+            RevocationList._sync()
+        except Exception as e:
+            current_app.logger.error(f"Revocation list sync failed: {str(e)}")
+        finally:
+            RevocationList._lock.release()
+
+    @staticmethod
+    def _sync():
+        now = datetime.utcnow()
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).\
+            where(RevokedToken.expires_at > now)
+        if RevocationList._high_water is not None:
+            # Re-read a margin, for rows committed late or by a server whose clock is behind
+            margin = timedelta(seconds=current_app.config['REVOCATION_SYNC_OVERLAP'])
+            query = query.where(RevokedToken.revoked_at > RevocationList._high_water - margin)
+
+        revoked = {key: expires_at for key, expires_at in RevocationList._revoked.items() if expires_at > now}
+        for row in db.session.execute(query):
+            revoked[row.jti] = row.expires_at
+            if RevocationList._high_water is None or row.revoked_at > RevocationList._high_water:
+                RevocationList._high_water = row.revoked_at
+        if RevocationList._high_water is None:
+            RevocationList._high_water = now
+        RevocationList._revoked = revoked
+        RevocationList._synced_at = time.monotonic()
+
+
+class TokenService:
+    """Issues access/refresh token pairs and revokes them
+
+    Every login starts a token family (the ``fam`` claim) shared by all the
+    tokens later refreshed from it. Refreshing rotates the refresh token:
+    the old one is revoked, and presenting it again revokes the whole
+    family, since it means the token was copied. Logging out revokes the
+    family too.
+    """
+
+    @staticmethod
+    def issue(user, family=None):
+        """Return a new access and refresh token for ``user`` (a User or Identity)"""
+        family = family or uuid.uuid4().hex
+        user_id = str(user.id)
+        return {
+            'access_token': create_access_token(identity=user_id, additional_claims=dict(identity_claims(user), fam=family)),
+            'refresh_token': create_refresh_token(identity=user_id, additional_claims={'fam': family})
+        }
+
+    @staticmethod
+    def is_revoked(jwt_data):
+        """JWT blocklist check; a rotated refresh token coming back revokes its family"""
+        if not RevocationList.is_revoked(jwt_data):
+            return False
+        family = jwt_data.get('fam')
+        if jwt_data.get('type') == 'refresh' and family and not RevocationList.contains(family):
+            current_app.logger.warning(f"Refresh token reused for user {jwt_data['sub']}; revoking its session")
+            TokenService.revoke_family(family, jwt_data['sub'])
+        return True
+
+    @staticmethod
+    def rotate(jwt_data, identity):
+        """Exchange a refresh token for a new pair, revoking it
+
+        Raises TokenReuseError, after revoking the family, if the token had
+        already been exchanged, even by another process.
+        """
+        family = jwt_data.get('fam')
+        try:
+            TokenService._revoke(jwt_data['jti'], 'refresh', identity.id, TokenService._expiry(jwt_data))
+        except IntegrityError:
+            db.session.rollback()
+            if family:
+                TokenService.revoke_family(family, identity.id)
+            raise TokenReuseError("Refresh token has already been used; please log in again")
+        return TokenService.issue(identity, family=family)
+
+    @staticmethod
+    def revoke(jwt_data):
+        """Revoke the session a token belongs to (its family), or just the token"""
+        if jwt_data.get('fam'):
+            TokenService.revoke_family(jwt_data['fam'], jwt_data['sub'])
+        else:
+            try:
+                TokenService._revoke(jwt_data['jti'], jwt_data.get('type', 'access'), jwt_data['sub'],
+                                     TokenService._expiry(jwt_data))
+            except IntegrityError:
+                db.session.rollback()  # Already revoked
+
+    @staticmethod
+    def revoke_family(family, user_id):
+        # A family lives as long as the newest refresh token it could have issued
+        expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['JWT_REFRESH_TOKEN_EXPIRES'])
+        try:
+            TokenService._revoke(family, 'family', user_id, expires_at)
+        except IntegrityError:
+            db.session.rollback()  # Already revoked
+
+    @staticmethod
+    def purge_expired():
+        """Delete revocations of tokens that have expired anyway; returns the count"""
+        result = db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        db.session.commit()
+        if result.rowcount:
+            current_app.logger.info(f"Purged {result.rowcount} expired token revocations")
+        return result.rowcount
+
+    @staticmethod
+    def _revoke(key, kind, user_id, expires_at):
+        db.session.add(RevokedToken(jti=key, kind=kind, user_id=uuid.UUID(str(user_id)), expires_at=expires_at))
+        db.session.commit()
+        RevocationList.add(key, expires_at)
+
+    @staticmethod
+    def _expiry(jwt_data):
+        return datetime.utcfromtimestamp(jwt_data['exp'])
@@ -0,0 +1,170 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from flask import g, request
+from flask_jwt_extended import get_current_user
+
+REDACTED = '[redacted]'
+# Any field whose normalized name contains one of these is redacted
+SENSITIVE_MARKERS = (
+    'password', 'token', 'secret', 'signature', 'authorization', 'email', 'phone',
+    'name', 'address', 'postal', 'card', 'cvc', 'iban',
+)
+
+
+def _is_sensitive(key):
+    normalized = str(key).lower().replace('_', '').replace('-', '')
+    return any(marker in normalized for marker in SENSITIVE_MARKERS)
+
+
+def redact(value):
+    """Copy a JSON value, replacing sensitive fields but keeping its shape"""
+    if isinstance(value, dict):
+        return {key: REDACTED if _is_sensitive(key) else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+class TrafficLog:
+    """Appends records to an NDJSON file from a background thread
+
+    Requests only enqueue; if the writer falls behind and the queue is full,
+    records are dropped rather than slowing requests down. Each batch goes
+    out as one O_APPEND write, so several workers can share a file.
+    """
+
+    def __init__(self, path, max_queue=10000, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def put(self, record):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(json.dumps(record, separators=(',', ':'), default=str) + '\n')
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_writer(self):
+        # Started lazily so each forked worker gets its own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='traffic-capture', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            lines = [self._queue.get()]
+            try:
+                self._write(lines)
+            except OSError:
+                self.dropped += len(lines)  # Keep capturing; this batch is lost
+
+    def _write(self, lines):
+        while len(lines) < self.batch_size:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, ''.join(lines).encode())
+        finally:
+            os.close(fd)
+
+    def flush(self):
+        """Write out whatever is still queued, on the calling thread"""
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self._write(lines)
+
+
+class TrafficCapture:
+    """Samples real requests into a compact, redacted NDJSON log for replay
+
+    Each record has the request time (``t``), method, matched route
+    (``r``), path, query parameters, the JSON body with secrets and personal
+    data redacted, the caller's role, the response status and the time the
+    app took in milliseconds (``ms``). Bodies that aren't JSON are recorded
+    by content type and length only. Replay a log with benchmarks/replay.py.
+    """
+
+    def __init__(self, app=None):
+        self.log = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['traffic_capture'] = self
+        if not app.config['TRAFFIC_CAPTURE_ENABLED']:
+            return
+        self.sample_rate = app.config['TRAFFIC_CAPTURE_SAMPLE_RATE']
+        self.max_body = app.config['TRAFFIC_CAPTURE_MAX_BODY_BYTES']
+        self.exclude = tuple(app.config['TRAFFIC_CAPTURE_EXCLUDE'])
+        self.log = TrafficLog(app.config['TRAFFIC_CAPTURE_PATH'])
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        if request.method == 'OPTIONS' or request.path.startswith(self.exclude):
+            return
+        if random.random() < self.sample_rate:
+            g.traffic_capture_started = (time.time(), time.perf_counter())
+
+    def _finish(self, response):
+        started = g.pop('traffic_capture_started', None)
+        if started is None:
+            return response
+        wall_clock, perf_counter = started
+        record = {
+            't': round(wall_clock, 3),
+            'm': request.method,
+            'r': request.url_rule.rule if request.url_rule else None,
+            'p': request.path,
+            'q': redact(request.args.to_dict(flat=False)) or None,
+            'a': self._role(),
+            's': response.status_code,
+            'ms': round((time.perf_counter() - perf_counter) * 1000, 2),
+        }
+        record.update(self._body())
+        self.log.put(record)
+        return response
+
+    def _body(self):
+        length = request.content_length
+        if not length:
+            return {}
+        if request.is_json and length <= self.max_body:
+            body = request.get_json(silent=True)
+            if body is not None:
+                return {'b': redact(body)}
+        return {'ct': request.mimetype, 'len': length}
+
+    @staticmethod
+    def _role():
+        try:
+            user = get_current_user()
+        except RuntimeError:
+            return None  # Not an authenticated endpoint
+        return user.role if user is not None else None
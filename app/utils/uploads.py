@@ -0,0 +1,77 @@
+import hashlib
+import tempfile
+from flask import Request, current_app, request
+
+# Leading bytes of the image formats Pillow is expected to handle
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+SNIFF_BYTES = 16
+
+
+def sniff_image_type(head):
+    """Return the MIME type of an image from its first bytes, or None"""
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+class SpooledUpload(tempfile.SpooledTemporaryFile):
+    """Upload buffer that moves to a temp file above a threshold
+
+    The multipart parser writes the body into it chunk by chunk; the content
+    hash and leading bytes are captured on the way in so nothing has to
+    re-read the file to get them.
+    """
+
+    def __init__(self, max_size):
+        super().__init__(max_size=max_size)
+        self._digest = hashlib.sha256()
+        self._head = b''
+
+    def write(self, data):
+        self._digest.update(data)
+        if len(self._head) < SNIFF_BYTES:
+            self._head += bytes(data[:SNIFF_BYTES - len(self._head)])
+        return super().write(data)
+
+    @property
+    def content_hash(self):
+        return self._digest.hexdigest()
+
+    @property
+    def sniffed_type(self):
+        return sniff_image_type(self._head)
+
+
+class UploadRequest(Request):
+    """Request class that streams multipart files into SpooledUpload buffers"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledUpload(max_size=current_app.config['UPLOAD_SPOOL_THRESHOLD'])
+
+
+def upload_limit(role):
+    """Return the largest upload in bytes allowed for a role"""
+    limits = current_app.config['UPLOAD_MAX_BYTES']
+    return limits.get(role, min(limits.values()))
+
+
+def apply_upload_limit(role):
+    """Cap the request body at the role's upload limit before any of it is read
+
+    Returns an error response if the declared Content-Length is already over
+    the cap; bodies without one are cut off by Werkzeug while streaming.
+    """
+    limit = upload_limit(role)
+    request.max_content_length = limit
+
+    if request.content_length is not None and request.content_length > limit:
+        return {'message': f'Upload exceeds the limit of {limit} bytes'}, 413
+    return None
@@ -0,0 +1,5 @@
+"""
+HTTP benchmark and load-test suite for the ArtMarket API
+
+Run it with ``python -m benchmarks.run --help``.
+"""
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark
+
+Hammers POST /api/auth/login from --concurrency threads while a probe
+thread requests GET /api/artworks/ at a steady rate, so the report shows
+both how many logins per second the server sustains and how much a login
+storm slows everything else down. Logins turned away with 503 because
+the password hashing queue is full are counted as errors.
+
+    python -m benchmarks.login --save-baseline
+    python -m benchmarks.login --concurrency 64     # exits 1 on a regression
+
+Uses the load.collector* accounts from seed.py and boots the app like
+benchmarks.run unless --base-url is given. Either way the server must
+run with RATE_LIMIT_ENABLED=false, or the login limit answers nearly
+every request from the one load-generating address with 429.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import requests
+from benchmarks import report
+from benchmarks.run import LOAD_PASSWORD, boot_server, seed
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'login_baseline.json')
+
+
+def timed(recorder, session, label, method, url, **kwargs):
+    started = time.perf_counter()
+    try:
+        ok = session.request(method, url, timeout=30, **kwargs).status_code < 400
+    except requests.RequestException:
+        ok = False
+    recorder.record(label, time.perf_counter() - started, ok)
+
+
+def run_logins(args, base_url):
+    recorder = report.Recorder()
+    stop = threading.Event()
+
+    def login_worker(index):
+        session = requests.Session()
+        email = f'load.collector{index % args.accounts}@example.com'
+        while not stop.is_set():
+            timed(recorder, session, 'POST /api/auth/login', 'POST', f'{base_url}/api/auth/login',
+                  json={'email': email, 'password': args.password})
+
+    def probe():
+        session = requests.Session()
+        while not stop.wait(1 / args.probe_rate):
+            timed(recorder, session, 'GET /api/artworks/ (probe)', 'GET', f'{base_url}/api/artworks/')
+
+    threads = [threading.Thread(target=login_worker, args=(index,)) for index in range(args.concurrency)]
+    if args.probe_rate:
+        threads.append(threading.Thread(target=probe))
+    for thread in threads:
+        thread.start()
+
+    if args.warmup:
+        recorder.enabled = False
+        print(f"🔥 Warming up for {args.warmup}s...")
+        time.sleep(args.warmup)
+        recorder.reset()
+        recorder.enabled = True
+
+    print(f"🚀 {args.concurrency} clients logging in for {args.duration}s...")
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    recorder.enabled = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    endpoints = report.summarize(recorder, elapsed)
+    return {
+        'meta': {'base_url': base_url, 'duration': round(elapsed, 2), 'concurrency': args.concurrency,
+                 'started_at': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'endpoints': endpoints,
+        'total': report.total(endpoints, elapsed),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', help='Benchmark a running server instead of booting one')
+    parser.add_argument('--database-url', help='DATABASE_URL for seeding and the booted server')
+    parser.add_argument('--seed', metavar='ARGS', help='Run seed.py with these arguments first')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers for the booted server')
+    parser.add_argument('--server-log', help="Append the booted server's output to this file")
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds (default 30)')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before that (default 5)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent login clients (default 32)')
+    parser.add_argument('--accounts', type=int, default=10, help='Spread logins over load.collector0..N-1')
+    parser.add_argument('--password', default=LOAD_PASSWORD)
+    parser.add_argument('--probe-rate', type=float, default=5, help='Probe requests per second; 0 disables (default 5)')
+    parser.add_argument('--output', help='Write the results JSON here')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    parser.add_argument('--metric', choices=[f'p{pct}' for pct in report.PERCENTILES], default='p95')
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.accounts < 1 or args.duration <= 0:
+        parser.error('--concurrency, --accounts and --duration must be positive')
+    if args.probe_rate < 0:
+        parser.error("--probe-rate can't be negative")
+
+    # All load comes from one address, which the per-IP rate limits would throttle
+    env = dict(os.environ, BACKGROUND_TASKS_ENABLED='false', RATE_LIMIT_ENABLED='false')
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    if args.seed:
+        seed(args.seed, env)
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = boot_server(args.port, args.workers, env, args.server_log)
+    try:
+        results = run_logins(args, base_url.rstrip('/'))
+        try:
+            results['meta']['password_hashing'] = requests.get(f'{base_url}/metrics', timeout=5).json().get('password_hashing')
+        except (requests.RequestException, ValueError):
+            pass
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        baseline = report.load(args.baseline)
+    print(report.format_table(results, baseline, args.metric))
+    if results['meta'].get('password_hashing'):
+        print(f"\nPassword hashing (one worker process): {results['meta']['password_hashing']}")
+
+    if args.output:
+        report.save(results, args.output)
+    if args.save_baseline:
+        report.save(results, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+    if baseline is None:
+        return 0
+
+    regressions = report.compare(results, baseline, args.threshold, args.metric)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:.0%} against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
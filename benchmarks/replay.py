@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Replay captured production traffic against another instance
+
+Reads the NDJSON log written with TRAFFIC_CAPTURE_ENABLED=true and
+re-issues each request at its original offset from the first one, divided
+by --speedup, so the real mix of routes, filters, sort orders and page
+sizes arrives with the real spacing (or a compressed version of it). The
+schedule depends only on the log, so two replays of it send the same
+requests in the same order.
+
+Requests are replayed as whoever is logged in with --login for the
+captured role; requests from roles with no login are skipped, as are the
+/api/auth/ routes, whose captured credentials are redacted.
+
+    python -m benchmarks.replay traffic/capture.ndjson \\
+        --base-url https://staging.example.com --speedup 4 \\
+        --login collector=load.collector0@example.com:Password123 \\
+        --login artist=load.artist0@example.com:Password123
+
+The report compares latency per route with the recording. Recorded
+times are measured inside the app while replayed ones are seen by this
+client, so they include the network round trip; compare two replays of
+the same log when that difference matters.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from benchmarks import report
+
+SKIPPED_PREFIXES = ('/api/auth/',)
+
+
+def load_records(path, routes=None):
+    """Read a capture log, oldest first"""
+    records = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if routes and record.get('r') not in routes:
+                continue
+            records.append(record)
+    records.sort(key=lambda record: record['t'])
+    return records
+
+
+def parse_login(value):
+    role, _, credentials = value.partition('=')
+    email, _, password = credentials.partition(':')
+    if not (role and email and password):
+        raise argparse.ArgumentTypeError('use role=email:password')
+    return role, (email, password)
+
+
+def login(base_url, email, password):
+    response = requests.post(f'{base_url}/api/auth/login', json={'email': email, 'password': password}, timeout=30)
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+class Replayer:
+    def __init__(self, base_url, tokens, concurrency, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.tokens = tokens
+        self.timeout = timeout
+        self.local = threading.local()
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)  # route -> [(original ms, replay ms or None, status matched)]
+        self.skipped = defaultdict(int)
+        self.max_lag = 0.0
+        self.started = None
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def skip_reason(self, record):
+        if record['p'].startswith(SKIPPED_PREFIXES):
+            return 'auth route'
+        if 'ct' in record:
+            return 'non-JSON body'
+        if record.get('a') and record['a'] not in self.tokens:
+            return f"no --login for {record['a']}"
+        return None
+
+    def send(self, record, due):
+        lag = time.perf_counter() - self.started - due  # Late when the pool is saturated
+        headers = {}
+        if record.get('a'):
+            headers['Authorization'] = f"Bearer {self.tokens[record['a']]}"
+        started = time.perf_counter()
+        try:
+            response = self.session().request(
+                record['m'], self.base_url + record['p'], params=record.get('q'),
+                json=record.get('b'), headers=headers, timeout=self.timeout
+            )
+            elapsed, status = (time.perf_counter() - started) * 1000, response.status_code
+        except requests.RequestException:
+            elapsed, status = None, None
+        with self.lock:
+            self.max_lag = max(self.max_lag, lag)
+            self.samples[f"{record['m']} {record['r']}"].append((record['ms'], elapsed, status == record['s']))
+
+    def run(self, records, speedup):
+        """Send every record on its schedule; returns the wall-clock seconds taken"""
+        if not records:
+            return 0.0
+        origin = records[0]['t']
+        self.started = time.perf_counter()
+        for record in records:
+            reason = self.skip_reason(record)
+            if reason:
+                self.skipped[reason] += 1
+                continue
+            due = (record['t'] - origin) / speedup
+            delay = due - (time.perf_counter() - self.started)
+            if delay > 0:
+                time.sleep(delay)
+            self.pool.submit(self.send, record, due)
+        self.pool.shutdown(wait=True)
+        return time.perf_counter() - self.started
+
+
+def summarize(samples):
+    routes = {}
+    for route, rows in sorted(samples.items()):
+        original = sorted(row[0] for row in rows)
+        replayed = sorted(row[1] for row in rows if row[1] is not None)
+        stats = {
+            'count': len(rows),
+            'failed': sum(1 for row in rows if row[1] is None),
+            'status_mismatches': sum(1 for row in rows if row[1] is not None and not row[2]),
+        }
+        for pct in report.PERCENTILES:
+            stats[f'original_p{pct}'] = report.percentile(original, pct)
+            value = report.percentile(replayed, pct)
+            stats[f'replay_p{pct}'] = round(value, 2) if value is not None else None
+        routes[route] = stats
+    return routes
+
+
+def format_table(routes, metric):
+    header = (f"{'route':<44} {'count':>6} {'status≠':>7} {'orig p50':>9} {'p50':>8} "
+              f"{'orig ' + metric:>9} {metric:>8} {'Δ ' + metric:>8}")
+    lines = [header, '-' * len(header)]
+
+    def ms(value):
+        return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+    for route, stats in routes.items():
+        before, after = stats[f'original_{metric}'], stats[f'replay_{metric}']
+        change = f"{after / before - 1:>+8.0%}" if before and after is not None else f"{'-':>8}"
+        lines.append(
+            f"{route:<44} {stats['count']:>6} {stats['status_mismatches'] + stats['failed']:>7} "
+            f"{ms(stats['original_p50'])} {ms(stats['replay_p50'])} "
+            f"{ms(before)} {ms(after)} {change}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help='Capture log (NDJSON)')
+    parser.add_argument('--base-url', required=True, help='Instance to replay against, e.g. staging')
+    parser.add_argument('--speedup', type=float, default=1.0, help='Replay this many times faster (default 1)')
+    parser.add_argument('--login', type=parse_login, action='append', default=[], metavar='ROLE=EMAIL:PASSWORD',
+                        help='Account to send a role\'s requests as; repeat per role')
+    parser.add_argument('--route', action='append', help='Only replay this route, e.g. /api/artworks/; repeatable')
+    parser.add_argument('--limit', type=int, help='Replay only the first N requests')
+    parser.add_argument('--concurrency', type=int, default=32, help='Maximum requests in flight (default 32)')
+    parser.add_argument('--metric', choices=[f'p{pct}' for pct in report.PERCENTILES], default='p95')
+    parser.add_argument('--output', help='Write the per-route comparison as JSON here')
+    args = parser.parse_args(argv)
+    if args.speedup <= 0:
+        parser.error('--speedup must be positive')
+
+    records = load_records(args.log, set(args.route) if args.route else None)
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        print("❌ Nothing to replay", file=sys.stderr)
+        return 2
+
+    base_url = args.base_url.rstrip('/')
+    tokens = {role: login(base_url, email, password) for role, (email, password) in args.login}
+    span = records[-1]['t'] - records[0]['t']
+    print(f"▶️  Replaying {len(records)} requests recorded over {span:.0f}s at {args.speedup:g}x...")
+
+    replayer = Replayer(base_url, tokens, args.concurrency)
+    elapsed = replayer.run(records, args.speedup)
+    routes = summarize(replayer.samples)
+
+    print(format_table(routes, args.metric))
+    print(f"\nSent {sum(len(rows) for rows in replayer.samples.values())} requests in {elapsed:.1f}s")
+    for reason, count in sorted(replayer.skipped.items()):
+        print(f"  skipped {count} ({reason})")
+    if replayer.max_lag > 1:
+        print(f"⚠️  Fell up to {replayer.max_lag:.1f}s behind schedule; raise --concurrency or lower --speedup")
+
+    if args.output:
+        report.save({
+            'meta': {'log': args.log, 'base_url': base_url, 'speedup': args.speedup, 'elapsed': round(elapsed, 2),
+                     'skipped': dict(replayer.skipped), 'max_lag': round(replayer.max_lag, 2)},
+            'routes': routes,
+        }, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Latency statistics and baseline comparison for benchmark runs
+
+A results file is JSON: {"meta": {...}, "endpoints": {label: stats}}, where
+stats has count, errors, throughput (requests/second) and p50/p95/p99 in
+milliseconds. A baseline is a results file saved from an earlier run.
+"""
+import json
+import math
+import threading
+from collections import defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+class Recorder:
+    """Collects (latency, ok) samples per endpoint from many threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.enabled = True
+
+    def record(self, endpoint, seconds, ok):
+        if not self.enabled:
+            return  # Warm-up
+        with self._lock:
+            if ok:
+                self.latencies[endpoint].append(seconds)
+            else:
+                self.errors[endpoint] += 1
+
+    def reset(self):
+        with self._lock:
+            self.latencies.clear()
+            self.errors.clear()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder, elapsed):
+    """Build per-endpoint stats from a recorder over ``elapsed`` seconds"""
+    endpoints = {}
+    for endpoint in sorted(set(recorder.latencies) | set(recorder.errors)):
+        latencies = sorted(recorder.latencies.get(endpoint, []))
+        errors = recorder.errors.get(endpoint, 0)
+        stats = {
+            'count': len(latencies),
+            'errors': errors,
+            'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        }
+        for pct in PERCENTILES:
+            value = percentile(latencies, pct)
+            stats[f'p{pct}'] = round(value * 1000, 2) if value is not None else None
+        endpoints[endpoint] = stats
+    return endpoints
+
+
+def total(endpoints, elapsed):
+    count = sum(stats['count'] for stats in endpoints.values())
+    errors = sum(stats['errors'] for stats in endpoints.values())
+    return {
+        'count': count,
+        'errors': errors,
+        'throughput': round(count / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(errors / (count + errors), 4) if count + errors else 0.0,
+    }
+
+
+def compare(results, baseline, threshold, metric='p95', min_count=20):
+    """Return a list of regression messages, empty if the run is within threshold
+
+    An endpoint regresses when its ``metric`` latency grows, or its
+    throughput drops, by more than ``threshold`` (0.1 = 10%) relative to
+    the baseline, or when it starts failing requests. Endpoints with fewer
+    than ``min_count`` samples in either run are too noisy to judge.
+    """
+    regressions = []
+    for endpoint, before in baseline.get('endpoints', {}).items():
+        after = results['endpoints'].get(endpoint)
+        if after is None:
+            regressions.append(f"{endpoint}: no requests in this run")
+            continue
+        if after['errors'] and not before['errors']:
+            regressions.append(f"{endpoint}: {after['errors']} errors (baseline had none)")
+        if min(before['count'], after['count']) < min_count:
+            continue
+
+        if before.get(metric) and after.get(metric) is not None:
+            change = after[metric] / before[metric] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{endpoint}: {metric} {before[metric]:.1f}ms -> {after[metric]:.1f}ms (+{change:.0%})"
+                )
+        if before['throughput']:
+            change = after['throughput'] / before['throughput'] - 1
+            if change < -threshold:
+                regressions.append(
+                    f"{endpoint}: throughput {before['throughput']:.1f}/s -> {after['throughput']:.1f}/s ({change:.0%})"
+                )
+    return regressions
+
+
+def format_table(results, baseline=None, metric='p95'):
+    """Render results as a text table, with the change against a baseline if given"""
+    header = f"{'endpoint':<32} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    lines = [header, '-' * len(header)]
+
+    def ms(value):
+        return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+    for endpoint, stats in results['endpoints'].items():
+        line = (f"{endpoint:<32} {stats['count']:>7} {stats['errors']:>6} {stats['throughput']:>8.1f} "
+                f"{ms(stats['p50'])} {ms(stats['p95'])} {ms(stats['p99'])}")
+        if baseline:
+            before = baseline.get('endpoints', {}).get(endpoint)
+            if before is None:
+                line += f" {'new':>8}"
+            elif before.get(metric) and stats.get(metric) is not None:
+                line += f" {stats[metric] / before[metric] - 1:>+8.0%}"
+            else:
+                line += f" {'-':>8}"
+        lines.append(line)
+
+    overall = results['total']
+    lines.append('-' * len(header))
+    lines.append(f"{'total':<32} {overall['count']:>7} {overall['errors']:>6} {overall['throughput']:>8.1f}")
+    return '\n'.join(lines)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
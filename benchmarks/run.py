@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Load-test the API hot paths and compare against a stored baseline
+
+By default this seeds nothing and boots the app under gunicorn against
+DATABASE_URL, then replays a weighted mix of journeys (browse gallery,
+search, view artwork, add to cart, checkout, artist dashboard) from
+--concurrency threads. Point --base-url at an already running server to
+skip the boot. The checkout journey cancels every order it places, so a
+run leaves the catalog on sale for the next one.
+
+The booted server runs with RATE_LIMIT_ENABLED=false: every virtual user
+connects from 127.0.0.1, so the per-IP limits would turn most requests
+away with 429. Start a --base-url server the same way.
+
+The accounts used are the ones seed.py generates:
+
+    python -m benchmarks.run --seed "--artists 200 --artworks 50k --orders 20k"
+    python -m benchmarks.run --save-baseline      # on main
+    python -m benchmarks.run                      # on your branch; exits 1 on a regression
+
+Results are printed as a table and can be written as JSON with --output.
+"""
+import argparse
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import requests
+from benchmarks import report
+from benchmarks.scenarios import SCENARIOS, VirtualUser, parse_mix, popularity_weights
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+LOAD_PASSWORD = 'Password123'  # seed.LOAD_PASSWORD; not imported, that would pull in the app
+
+
+def seed(seed_args, env):
+    print(f"🌱 Seeding: seed.py {seed_args}")
+    subprocess.run([sys.executable, 'seed.py', *shlex.split(seed_args)], cwd=ROOT, env=env, check=True)
+
+
+def boot_server(port, workers, env, log_path=None):
+    """Start gunicorn on main:app and wait until /health answers"""
+    log = open(log_path, 'ab') if log_path else subprocess.DEVNULL
+    server = subprocess.Popen(
+        # The same worker model as render.yaml
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--worker-class', 'gthread', '--threads', '8',
+         '--bind', f'127.0.0.1:{port}', 'main:app'],
+        cwd=ROOT, env=env, stdout=log, stderr=log
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}; see --server-log")
+        try:
+            if requests.get(f'{base_url}/health', timeout=1).ok:
+                return server, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Server didn't become healthy within 60 seconds")
+
+
+def fetch_catalog(base_url, size):
+    """Return up to ``size`` available artwork ids, newest first"""
+    ids = []
+    page = 1
+    while len(ids) < size:
+        response = requests.get(f'{base_url}/api/artworks/', params={'page': page, 'per_page': 100}, timeout=30)
+        response.raise_for_status()
+        items = response.json()['items']
+        ids.extend(item['id'] for item in items)
+        if len(items) < 100:
+            break
+        page += 1
+    return ids[:size]
+
+
+def run_load(args, base_url, catalog, mix):
+    recorder = report.Recorder()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    catalog_weights = popularity_weights(len(catalog))
+    stop = threading.Event()
+
+    def worker(index):
+        rng = random.Random(args.random_seed + index)
+        account = index % args.accounts
+        user = VirtualUser(base_url, recorder, rng, catalog, catalog_weights, {
+            'collector': (f'load.collector{account}@example.com', args.password),
+            'artist': (f'load.artist{account}@example.com', args.password),
+        })
+        while not stop.is_set():
+            name = rng.choices(names, weights=weights)[0]
+            SCENARIOS[name][0](user)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(worker, index) for index in range(args.concurrency)]
+        if args.warmup:
+            recorder.enabled = False
+            print(f"🔥 Warming up for {args.warmup}s...")
+            time.sleep(args.warmup)
+            recorder.reset()
+            recorder.enabled = True
+
+        print(f"🚀 Running {args.concurrency} virtual users for {args.duration}s...")
+        started = time.perf_counter()
+        time.sleep(args.duration)
+        recorder.enabled = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for future in futures:
+            future.result()  # Surface anything that broke a worker
+
+    endpoints = report.summarize(recorder, elapsed)
+    return {
+        'meta': {
+            'base_url': base_url,
+            'duration': round(elapsed, 2),
+            'concurrency': args.concurrency,
+            'mix': mix,
+            'catalog_size': len(catalog),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'endpoints': endpoints,
+        'total': report.total(endpoints, elapsed),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_argument_group('target')
+    target.add_argument('--base-url', help='Benchmark a running server instead of booting one')
+    target.add_argument('--database-url', help='DATABASE_URL for seeding and the booted server')
+    target.add_argument('--seed', metavar='ARGS', help='Run seed.py with these arguments first, e.g. "--artists 200 --artworks 50k"')
+    target.add_argument('--port', type=int, default=5055, help='Port for the booted server (default 5055)')
+    target.add_argument('--workers', type=int, default=4, help='gunicorn workers for the booted server (default 4)')
+    target.add_argument('--server-log', help='Append the booted server\'s output to this file')
+
+    load = parser.add_argument_group('load')
+    load.add_argument('--duration', type=float, default=60, help='Measured seconds (default 60)')
+    load.add_argument('--warmup', type=float, default=10, help='Unmeasured seconds before that (default 10)')
+    load.add_argument('--concurrency', type=int, default=16, help='Virtual users (default 16)')
+    load.add_argument('--accounts', type=int, default=10,
+                      help='Spread virtual users over load.artist0..N-1 and load.collector0..N-1 (default 10)')
+    load.add_argument('--password', default=LOAD_PASSWORD, help='Password of the seeded load accounts')
+    load.add_argument('--catalog-size', type=int, default=1000, help='Artworks to draw views and cart adds from')
+    load.add_argument('--mix', help='Scenario weights, e.g. "browse_gallery=50,checkout=10" '
+                                    f'(default: {",".join(f"{n}={w}" for n, (_f, w) in SCENARIOS.items())})')
+    load.add_argument('--random-seed', type=int, default=1, help='Seed for the request mix')
+
+    results = parser.add_argument_group('results')
+    results.add_argument('--output', help='Write the results JSON here')
+    results.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline to compare against')
+    results.add_argument('--save-baseline', action='store_true', help='Save this run as the baseline instead of comparing')
+    results.add_argument('--threshold', type=float, default=0.10,
+                         help='Allowed slowdown before failing, as a fraction (default 0.10)')
+    results.add_argument('--metric', choices=[f'p{pct}' for pct in report.PERCENTILES], default='p95',
+                         help='Latency percentile compared against the baseline (default p95)')
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else {name: weight for name, (_f, weight) in SCENARIOS.items()}
+    except ValueError as e:
+        parser.error(str(e))
+    if args.concurrency < 1 or args.accounts < 1 or args.duration <= 0:
+        parser.error('--concurrency, --accounts and --duration must be positive')
+
+    # All load comes from one address, which the per-IP rate limits would throttle
+    env = dict(os.environ, BACKGROUND_TASKS_ENABLED='false', RATE_LIMIT_ENABLED='false')
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    if args.seed:
+        seed(args.seed, env)
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = boot_server(args.port, args.workers, env, args.server_log)
+    try:
+        catalog = fetch_catalog(base_url, args.catalog_size)
+        if not catalog:
+            print("❌ No available artworks; seed some with --seed", file=sys.stderr)
+            return 2
+        results = run_load(args, base_url, catalog, mix)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        baseline = report.load(args.baseline)
+    print(report.format_table(results, baseline, args.metric))
+
+    if args.output:
+        report.save(results, args.output)
+    if args.save_baseline:
+        report.save(results, args.baseline)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"ℹ️  No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = report.compare(results, baseline, args.threshold, args.metric)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:.0%} against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Weighted user journeys replayed against the API
+
+Each scenario is a function taking a VirtualUser; every request it makes
+is timed under an endpoint label such as ``GET /api/artworks/{id}``, so
+results group by route rather than by URL.
+"""
+import itertools
+import time
+import requests
+
+SHIPPING_DETAILS = {
+    'fullName': 'Load Collector',
+    'address': '1 Benchmark Rd',
+    'city': 'Nairobi',
+    'country': 'Kenya',
+    'postalCode': '00100'
+}
+CATEGORIES = ['painting', 'sculpture', 'photography', 'digital', 'mixed-media', 'textile']
+SORTS = ['newest', 'oldest', 'price-low', 'price-high']
+SEARCH_TERMS = ['abstract', 'portrait', 'landscape', 'light', 'city', 'river', 'study', 'colour']
+
+
+class VirtualUser:
+    """One simulated client with its own HTTP session and login"""
+
+    def __init__(self, base_url, recorder, rng, catalog, catalog_weights, credentials, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.rng = rng
+        self.catalog = catalog
+        self.catalog_weights = catalog_weights
+        self.credentials = credentials  # {'collector': (email, password), 'artist': (...)}
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.tokens = {}
+
+    def request(self, method, label, path, role=None, expect=(), **kwargs):
+        """Make a timed request; returns the response, or None if it failed
+
+        Statuses in ``expect`` are outcomes of contention between virtual
+        users, such as an artwork another one just ordered; they're timed as
+        successes but still return None so the journey stops.
+        """
+        headers = kwargs.pop('headers', {})
+        if role is not None:
+            token = self.login(role)
+            if token is None:
+                return None
+            headers['Authorization'] = f'Bearer {token}'
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, headers=headers, timeout=self.timeout, **kwargs
+            )
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        expected = response is not None and response.status_code in expect
+        self.recorder.record(f'{method} {label}', time.perf_counter() - started, ok or expected)
+        return response if ok else None
+
+    def login(self, role):
+        """Log in once per role and reuse the token, like a real client would"""
+        if role not in self.tokens:
+            email, password = self.credentials[role]
+            response = self.request('POST', '/api/auth/login', '/api/auth/login',
+                                    json={'email': email, 'password': password})
+            self.tokens[role] = response.json()['access_token'] if response is not None else None
+        return self.tokens[role]
+
+    def artwork_id(self):
+        return self.rng.choices(self.catalog, cum_weights=self.catalog_weights)[0]
+
+
+def popularity_weights(n, exponent=1.1):
+    """Cumulative weights so a few artworks get most of the views, like the seeded data"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+def browse_gallery(user):
+    params = {'page': user.rng.choices([1, 2, 3, 4, 5], weights=[50, 20, 12, 10, 8])[0]}
+    if user.rng.random() < 0.4:
+        params['category'] = user.rng.choice(CATEGORIES)
+    if user.rng.random() < 0.3:
+        params['sort'] = user.rng.choice(SORTS)
+    user.request('GET', '/api/artworks/', '/api/artworks/', params=params)
+
+
+def search(user):
+    params = {'search': user.rng.choice(SEARCH_TERMS)}
+    if user.rng.random() < 0.3:
+        params['maxPrice'] = user.rng.choice([500, 1000, 5000])
+    user.request('GET', '/api/artworks/?search', '/api/artworks/', params=params)
+
+
+def view_artwork(user):
+    user.request('GET', '/api/artworks/{id}', f'/api/artworks/{user.artwork_id()}')
+
+
+def add_to_cart(user):
+    artwork_id = user.artwork_id()
+    # The artwork may be on a checkout journey's order until it's cancelled
+    if user.request('POST', '/api/cart/', '/api/cart/', role='collector', expect=(404,),
+                    json={'artworkId': artwork_id, 'quantity': 1}) is None:
+        return
+    user.request('GET', '/api/cart/', '/api/cart/', role='collector')
+    # Keep carts from growing without bound over a long run. Virtual users
+    # share accounts, so another one's checkout may have ordered it already
+    user.request('DELETE', '/api/cart/{id}', f'/api/cart/{artwork_id}', role='collector', expect=(404,))
+
+
+def checkout(user):
+    artwork_id = user.artwork_id()
+    # Likewise here, for another checkout journey's order
+    if user.request('POST', '/api/cart/', '/api/cart/', role='collector', expect=(404,),
+                    json={'artworkId': artwork_id, 'quantity': 1}) is None:
+        return
+    # Held by another virtual user (409), or a shared cart another one just emptied (400)
+    order = None
+    if user.request('POST', '/api/orders/checkout/hold', '/api/orders/checkout/hold', role='collector',
+                    expect=(400, 409)) is not None:
+        order = user.request('POST', '/api/orders/checkout', '/api/orders/checkout', role='collector',
+                             expect=(400, 409), json={'shipping_details': SHIPPING_DETAILS})
+    if order is None:
+        user.request('DELETE', '/api/cart/{id}', f'/api/cart/{artwork_id}', role='collector', expect=(404,))
+        return
+    # Placing an order sells its artworks for good; cancel it so they go back
+    # on sale, or the run sells off the popular artworks and leaves the next
+    # run a depleted catalog
+    user.request('PUT', '/api/orders/{id}', f"/api/orders/{order.json()['id']}", role='collector',
+                 json={'status': 'cancelled'})
+
+
+def artist_dashboard(user):
+    user.request('GET', '/api/artists/stats', '/api/artists/stats', role='artist')
+    user.request('GET', '/api/artists/artworks', '/api/artists/artworks', role='artist')
+    user.request('GET', '/api/orders/', '/api/orders/', role='artist')
+
+
+# Relative weights of each journey in the traffic mix
+SCENARIOS = {
+    'browse_gallery': (browse_gallery, 35),
+    'search': (search, 15),
+    'view_artwork': (view_artwork, 25),
+    'add_to_cart': (add_to_cart, 12),
+    'checkout': (checkout, 5),
+    'artist_dashboard': (artist_dashboard, 8),
+}
+
+
+def parse_mix(value):
+    """Parse ``name=weight,...`` into {name: weight}, for overriding the mix"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name}; choose from: {', '.join(SCENARIOS)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Weight for {name} must be a number")
+        if mix[name] < 0:
+            raise ValueError(f"Weight for {name} can't be negative")
+    if not any(mix.values()):
+        raise ValueError("At least one scenario needs a positive weight")
+    return mix
@@ -1,7 +1,9 @@
 from app import create_app
+from app.utils.background import start_background_tasks
 import os
 
 app = create_app()
+start_background_tasks(app)
 
 if __name__ == "__main__":
     # Seed the database on startup if it's empty
@@ -0,0 +1,82 @@
+"""Backfill artwork image public IDs and image assets from image_url
+
+Revision ID: a1f6c3e9d2b7
+Revises: e5b8d1f3a9c7
+Create Date: 2026-10-20 09:12:05.617324
+
+"""
+import re
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f6c3e9d2b7'
+down_revision = 'e5b8d1f3a9c7'
+branch_labels = None
+depends_on = None
+
+# https://res.cloudinary.com/<cloud>/image/upload/[<transformations>/]v<version>/<public_id>.<ext>
+CLOUDINARY_URL = re.compile(r'/image/upload/(?:.+/)?v\d+/(?P<public_id>.+?)(?:\.\w+)?$')
+# <host>/media/<public_id>, as served by the local storage backend
+LOCAL_URL = re.compile(r'/media/(?P<public_id>(?!upload$).+)$')
+
+artworks = sa.table('artworks',
+    sa.column('id', sa.UUID()),
+    sa.column('image_url', sa.String()),
+    sa.column('image_public_id', sa.String()),
+)
+image_assets = sa.table('image_assets',
+    sa.column('id', sa.UUID()),
+    sa.column('public_id', sa.String()),
+    sa.column('url', sa.String()),
+    sa.column('ref_count', sa.Integer()),
+    sa.column('created_at', sa.DateTime()),
+)
+
+
+def public_id_from_url(url):
+    path = url.split('?', 1)[0]
+    match = CLOUDINARY_URL.search(path) or LOCAL_URL.search(path)
+    return match.group('public_id') if match else None
+
+
+def upgrade():
+    # Artworks created before image_public_id was stored only have image_url;
+    # without a public ID and asset row their images look orphaned to the sweeper
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(artworks.c.id, artworks.c.image_url).
+        where(artworks.c.image_public_id.is_(None), artworks.c.image_url.isnot(None))
+    ).all()
+
+    referenced = defaultdict(list)  # public_id -> [(artwork id, url)]
+    for artwork_id, url in rows:
+        public_id = public_id_from_url(url)
+        if public_id:
+            referenced[public_id].append((artwork_id, url))
+
+    for public_id, refs in referenced.items():
+        bind.execute(
+            artworks.update().
+            where(artworks.c.id.in_([artwork_id for artwork_id, _url in refs])).
+            values(image_public_id=public_id)
+        )
+        updated = bind.execute(
+            image_assets.update().
+            where(image_assets.c.public_id == public_id).
+            values(ref_count=image_assets.c.ref_count + len(refs))
+        ).rowcount
+        if not updated:
+            bind.execute(image_assets.insert().values(
+                id=uuid.uuid4(), public_id=public_id, url=refs[0][1],
+                ref_count=len(refs), created_at=datetime.utcnow()
+            ))
+
+
+def downgrade():
+    # The backfilled values are indistinguishable from ones set since; leave them
+    pass
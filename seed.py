@@ -2,11 +2,24 @@
 """
 Database seeding script for ArtGallery project.
 Populates the database with initial data for artists, collectors, artworks, etc.
+
+Run without arguments for the small hand-written sample data, or with sizes
+to generate synthetic load-testing data, e.g.:
+
+    python seed.py --artists 10k --artworks 1M --orders 5M --seed 42
 """
 
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import math
 import os
+import random
 import sys
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash
 
 # Add the backend directory to the Python path
@@ -22,6 +35,7 @@ from app.models.delivery import Delivery
 from app.models.notification import Notification
 from app.models.wishlist import Wishlist, WishlistItem
 from app.models.cart import Cart, CartItem
+from app.utils.cart_totals import CartTotals
 
 def seed_database():
     """Seed the database with initial data."""
@@ -38,7 +52,7 @@ def seed_database():
             {
                 'email': 'elena.chen@example.com',
                 'full_name': 'Elena Chen',
-                'role': 'artisan',
+                'role': 'artist',
                 'address': '123 Artist Lane, Nairobi, Kenya',
                 'city': 'Nairobi',
                 'country': 'Kenya',
@@ -47,7 +61,7 @@ def seed_database():
             {
                 'email': 'marcus.rivera@example.com',
                 'full_name': 'Marcus Rivera',
-                'role': 'artisan',
+                'role': 'artist',
                 'address': '456 Sculpture St, Mombasa, Kenya',
                 'city': 'Mombasa',
                 'country': 'Kenya',
@@ -56,7 +70,7 @@ def seed_database():
             {
                 'email': 'sarah.blake@example.com',
                 'full_name': 'Sarah Blake',
-                'role': 'artisan',
+                'role': 'artist',
                 'address': '789 Photo Ave, Kisumu, Kenya',
                 'city': 'Kisumu',
                 'country': 'Kenya',
@@ -65,7 +79,7 @@ def seed_database():
             {
                 'email': 'alex.kim@example.com',
                 'full_name': 'Alex Kim',
-                'role': 'artisan',
+                'role': 'artist',
                 'address': '321 Digital Dr, Nakuru, Kenya',
                 'city': 'Nakuru',
                 'country': 'Kenya',
@@ -74,7 +88,7 @@ def seed_database():
             {
                 'email': 'maya.johnson@example.com',
                 'full_name': 'Maya Johnson',
-                'role': 'artisan',
+                'role': 'artist',
                 'address': '654 Urban Rd, Eldoret, Kenya',
                 'city': 'Eldoret',
                 'country': 'Kenya',
@@ -83,7 +97,7 @@ def seed_database():
             {
                 'email': 'david.chen@example.com',
                 'full_name': 'David Chen',
-                'role': 'artisan',
+                'role': 'artist',
                 'address': '987 Cosmic Way, Thika, Kenya',
                 'city': 'Thika',
                 'country': 'Kenya',
@@ -92,7 +106,7 @@ def seed_database():
             {
                 'email': 'jamie.wong@example.com',
                 'full_name': 'Jamie Wong',
-                'role': 'artisan',
+                'role': 'artist',
                 'address': '147 Nature Ln, Naivasha, Kenya',
                 'city': 'Naivasha',
                 'country': 'Kenya',
@@ -331,5 +345,295 @@ def seed_database():
         for collector in collectors_data:
             print(f"  - {collector['email']} (password: {collector['password']})")
 
+# Synthetic load-testing data
+
+CATEGORY_WEIGHTS = {
+    'painting': 35,
+    'photography': 20,
+    'digital': 18,
+    'mixed-media': 12,
+    'sculpture': 10,
+    'textile': 5,
+}
+# Prices are log-normal around a per-category median
+PRICE_MEDIANS = {
+    'painting': 800,
+    'photography': 350,
+    'digital': 250,
+    'mixed-media': 600,
+    'sculpture': 2500,
+    'textile': 300,
+}
+PRICE_SIGMA = 0.9
+ORDER_STATUS_WEIGHTS = {
+    'delivered': 55,
+    'shipped': 10,
+    'processing': 8,
+    'confirmed': 7,
+    'pending': 12,
+    'cancelled': 8,
+}
+ORDER_ITEM_COUNT_WEIGHTS = [70, 18, 7, 3, 2]  # 1 to 5 items
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Naivasha', 'Malindi']
+DESCRIPTION_WORDS = (
+    'abstract vibrant quiet bold layered textured luminous muted organic geometric '
+    'study portrait landscape figure light shadow colour form memory city river dusk'
+).split()
+LOAD_PASSWORD = 'Password123'
+LOAD_EPOCH = datetime(2026, 1, 1)  # Fixed so the same seed always produces the same rows
+LOAD_HISTORY_DAYS = 730
+
+
+def parse_count(value):
+    """Parse sizes such as 500, 10k, 1.5M"""
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a count: {value}")
+
+
+def zipf_cum_weights(n, exponent=1.1):
+    """Cumulative weights for picking among n items where a few are far more popular"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+class LoadDataGenerator:
+    """Generates large, realistic and reproducible data sets for load tests
+
+    Every random choice comes from one seeded generator and all timestamps
+    are relative to LOAD_EPOCH, so the same arguments always produce the
+    same rows. Rows are written in batches with COPY on PostgreSQL and with
+    executemany elsewhere, never as ORM objects.
+    """
+
+    def __init__(self, artists, collectors, artworks, orders, seed=42, batch_size=10_000):
+        self.counts = {'artists': artists, 'collectors': collectors, 'artworks': artworks, 'orders': orders}
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.artist_ids = []
+        self.collectors = []  # (id, address, city)
+        self.artwork_ids = []
+        self.artwork_prices = []
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def timestamp(self, after=None):
+        start = after or LOAD_EPOCH - timedelta(days=LOAD_HISTORY_DAYS)
+        span = (LOAD_EPOCH - start).total_seconds()
+        return start + timedelta(seconds=self.rng.random() * span)
+
+    def insert(self, model, columns, rows):
+        """Write rows (tuples in ``columns`` order) in batches"""
+        table = model.__table__
+        connection = db.session.connection()
+        for batch in iter(lambda: list(itertools.islice(rows, self.batch_size)), []):
+            if connection.dialect.name == 'postgresql':
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    ['\\N' if value is None else value for value in row] for row in batch
+                )
+                buffer.seek(0)
+                cursor = connection.connection.cursor()
+                cursor.copy_expert(
+                    f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+                )
+            else:
+                db.session.execute(table.insert(), [dict(zip(columns, row)) for row in batch])
+            db.session.commit()
+            connection = db.session.connection()
+
+    def run(self):
+        started = datetime.now()
+        for step in (self.users, self.artworks, self.carts, self.wishlists, self.orders):
+            step()
+        print(f"🎉 Load data generated in {datetime.now() - started}")
+
+    def users(self):
+        password_hash = generate_password_hash(LOAD_PASSWORD)  # One hash: hashing millions would take hours
+        columns = ('id', 'username', 'email', 'full_name', 'password_hash', 'role',
+                   'address', 'city', 'country', 'is_active', 'created_at', 'updated_at')
+
+        def rows():
+            for role, count in (('artist', self.counts['artists']), ('collector', self.counts['collectors'])):
+                for index in range(count):
+                    user_id = self.uuid()
+                    city = self.rng.choice(CITIES)
+                    address = f"{self.rng.randint(1, 999)} {self.rng.choice(DESCRIPTION_WORDS).title()} Rd, {city}, Kenya"
+                    created_at = self.timestamp()
+                    if role == 'artist':
+                        self.artist_ids.append(user_id)
+                    else:
+                        self.collectors.append((user_id, address, city))
+                    yield (user_id, f"load_{role}{index}", f"load.{role}{index}@example.com",
+                           f"Load {role.title()} {index}", password_hash, role,
+                           address, city, 'Kenya', True, created_at, created_at)
+
+        self.insert(User, columns, rows())
+        print(f"✅ Created {len(self.artist_ids)} artists and {len(self.collectors)} collectors "
+              f"(password: {LOAD_PASSWORD})")
+
+    def artworks(self):
+        categories = list(CATEGORY_WEIGHTS)
+        category_weights = list(itertools.accumulate(CATEGORY_WEIGHTS.values()))
+        # A few prolific artists make most of the work
+        artist_weights = zipf_cum_weights(len(self.artist_ids), exponent=0.9)
+        columns = ('id', 'title', 'description', 'price', 'category', 'image_url',
+                   'artist_id', 'is_available', 'created_at', 'updated_at')
+
+        def rows():
+            for index in range(self.counts['artworks']):
+                artwork_id = self.uuid()
+                category = self.rng.choices(categories, cum_weights=category_weights)[0]
+                price = PRICE_MEDIANS[category] * math.exp(self.rng.gauss(0, PRICE_SIGMA))
+                price = round(min(max(price, 10), 99_999), 0 if price >= 100 else 2)
+                words = self.rng.sample(DESCRIPTION_WORDS, 6)
+                created_at = self.timestamp()
+                self.artwork_ids.append(artwork_id)
+                self.artwork_prices.append(price)
+                yield (artwork_id, f"{words[0].title()} {words[1].title()} #{index}", ' '.join(words), price, category,
+                       f"https://picsum.photos/seed/{index}/1200/900",
+                       self.rng.choices(self.artist_ids, cum_weights=artist_weights)[0],
+                       self.rng.random() < 0.9, created_at, self.timestamp(after=created_at))
+
+        self.insert(Artwork, columns, rows())
+        self.artwork_weights = zipf_cum_weights(len(self.artwork_ids))
+        print(f"✅ Created {len(self.artwork_ids)} artworks")
+
+    def pick_artworks(self, count):
+        """Distinct popular-biased artwork indexes"""
+        count = min(count, len(self.artwork_ids))
+        total = self.artwork_weights[-1]
+        picked = set()
+        while len(picked) < count:
+            picked.add(bisect.bisect(self.artwork_weights, self.rng.random() * total))
+        return picked
+
+    def collection(self, model, item_model, share, mean_size, max_size, owner_column, item_columns, item_values=()):
+        """Give ``share`` of collectors one cart or wishlist with a geometric number of items
+
+        ``item_values`` are appended to every item row, for the item_columns after added_at.
+        """
+        parents = []
+        items = []
+        for collector_id, _address, _city in self.collectors:
+            if self.rng.random() >= share:
+                continue
+            parent_id = self.uuid()
+            created_at = self.timestamp()
+            parents.append((parent_id, collector_id, created_at, created_at))
+            size = min(max_size, 1 + int(math.log(1 - self.rng.random()) / math.log(1 - 1 / mean_size)))
+            for artwork_index in self.pick_artworks(size):
+                items.append((self.uuid(), parent_id, self.artwork_ids[artwork_index], self.timestamp(after=created_at),
+                              *item_values))
+                if len(items) >= self.batch_size:
+                    self.insert(model, ('id', owner_column, 'created_at', 'updated_at'), iter(parents))
+                    self.insert(item_model, item_columns, iter(items))
+                    parents, items = [], []
+        self.insert(model, ('id', owner_column, 'created_at', 'updated_at'), iter(parents))
+        self.insert(item_model, item_columns, iter(items))
+
+    def carts(self):
+        # Quantity is always 1: every artwork is one of a kind. COPY skips the
+        # model's Python-side default, so it has to be written explicitly
+        self.collection(Cart, CartItem, share=0.3, mean_size=2.5, max_size=10, owner_column='user_id',
+                        item_columns=('id', 'cart_id', 'artwork_id', 'added_at', 'quantity'), item_values=(1,))
+        # Items count as added at today's price; then fill in the cached totals
+        db.session.execute(db.update(CartItem).values(
+            price_at_add=db.select(Artwork.price).where(Artwork.id == CartItem.artwork_id).scalar_subquery()
+        ))
+        db.session.execute(db.update(Cart).values(**CartTotals.values()))
+        db.session.commit()
+        print("✅ Created carts")
+
+    def wishlists(self):
+        self.collection(Wishlist, WishlistItem, share=0.4, mean_size=6, max_size=50, owner_column='user_id',
+                        item_columns=('id', 'wishlist_id', 'artwork_id', 'added_at'))
+        print("✅ Created wishlists")
+
+    def orders(self):
+        statuses = list(ORDER_STATUS_WEIGHTS)
+        status_weights = list(itertools.accumulate(ORDER_STATUS_WEIGHTS.values()))
+        item_counts = list(range(1, len(ORDER_ITEM_COUNT_WEIGHTS) + 1))
+        item_count_weights = list(itertools.accumulate(ORDER_ITEM_COUNT_WEIGHTS))
+        # Repeat buyers: a minority of collectors place most orders
+        collector_weights = zipf_cum_weights(len(self.collectors), exponent=0.8)
+        tables = {
+            Order: ('id', 'customer_id', 'total_amount', 'status', 'shipping_address', 'shipping_city',
+                    'shipping_country', 'shipping_postal_code', 'created_at', 'updated_at'),
+            OrderItem: ('id', 'order_id', 'artwork_id', 'quantity', 'price'),
+            Payment: ('id', 'order_id', 'amount', 'provider', 'status', 'transaction_id', 'created_at', 'updated_at'),
+            Delivery: ('id', 'order_id', 'status', 'tracking_number', 'carrier', 'created_at', 'updated_at'),
+        }
+        pending = {model: [] for model in tables}
+
+        def flush():
+            for model, rows in pending.items():
+                self.insert(model, tables[model], iter(rows))
+                rows.clear()
+
+        for index in range(self.counts['orders']):
+            order_id = self.uuid()
+            customer_id, address, city = self.rng.choices(self.collectors, cum_weights=collector_weights)[0]
+            status = self.rng.choices(statuses, cum_weights=status_weights)[0]
+            created_at = self.timestamp()
+            count = self.rng.choices(item_counts, cum_weights=item_count_weights)[0]
+
+            total = 0
+            for artwork_index in self.pick_artworks(count):
+                price = self.artwork_prices[artwork_index]
+                total += price
+                pending[OrderItem].append((self.uuid(), order_id, self.artwork_ids[artwork_index], 1, price))
+            pending[Order].append((order_id, customer_id, round(total, 2), status, address, city, 'Kenya',
+                                   '00100', created_at, created_at))
+
+            if status not in ('pending', 'cancelled'):
+                pending[Payment].append((self.uuid(), order_id, round(total, 2), 'stripe', 'completed',
+                                         f"pi_load_{index}", created_at, created_at))
+            if status in ('shipped', 'delivered'):
+                pending[Delivery].append((self.uuid(), order_id, status, f"LOAD-{index:09d}", 'standard',
+                                          created_at, created_at))
+
+            if len(pending[OrderItem]) >= self.batch_size:
+                flush()
+        flush()
+        print(f"✅ Created {self.counts['orders']} orders")
+
+
+def generate_load_data(artists, collectors, artworks, orders, seed=42, batch_size=10_000):
+    """Generate synthetic load-testing data (see LoadDataGenerator)"""
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        print(f"🌱 Generating load data (seed {seed})...")
+        LoadDataGenerator(artists, collectors, artworks, orders, seed=seed, batch_size=batch_size).run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--artists', type=parse_count, help='Number of artists, e.g. 10k')
+    parser.add_argument('--collectors', type=parse_count, help='Number of collectors (default 10 per artist)')
+    parser.add_argument('--artworks', type=parse_count, default=0, help='Number of artworks, e.g. 1M')
+    parser.add_argument('--orders', type=parse_count, default=0, help='Number of orders, e.g. 5M')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+    parser.add_argument('--batch-size', type=parse_count, default=10_000, help='Rows per COPY/insert batch')
+    args = parser.parse_args(argv)
+
+    if args.artists is None:
+        seed_database()
+        return
+
+    collectors = args.collectors if args.collectors is not None else args.artists * 10
+    if args.artworks and not args.artists:
+        parser.error('--artworks needs at least one artist')
+    if args.orders and not (collectors and args.artworks):
+        parser.error('--orders needs collectors and artworks')
+    generate_load_data(args.artists, collectors, args.artworks, args.orders, seed=args.seed, batch_size=args.batch_size)
+
+
 if __name__ == '__main__':
-    seed_database()
\ No newline at end of file
+    main()
\ No newline at end of file
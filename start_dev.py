@@ -6,6 +6,7 @@ import os
 import sys
 from app import create_app
 from app.extensions import db
+from app.utils.background import start_background_tasks
 
 def setup_environment():
     """Setup development environment variables"""
@@ -55,6 +56,7 @@ def main():
     print("=" * 50)
     
     # Start the server
+    start_background_tasks(app)
     app.run(host='0.0.0.0', port=5000, debug=True)
 
 if __name__ == "__main__":
@@ -0,0 +1,27 @@
+import pytest
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        STORAGE_BACKEND = "local"
+        MEDIA_ROOT = str(tmp_path / "media")
+        RATE_LIMIT_ENABLED = False
+        TRAFFIC_CAPTURE_ENABLED = False
+        BACKGROUND_TASKS_ENABLED = False
+
+    app = create_app(Config())
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
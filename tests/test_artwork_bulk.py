@@ -0,0 +1,43 @@
+import pytest
+from marshmallow import ValidationError
+from app.extensions import db
+from app.models.artwork import Artwork
+from app.models.user import User
+from app.utils.artwork_bulk import ArtworkBulkService
+
+
+@pytest.fixture
+def artworks(app):
+    user = User(username='artist', email='artist@example.com', full_name='An Artist',
+                password_hash='x', role='artist')
+    db.session.add(user)
+    db.session.flush()
+    works = [Artwork(title=f'Work {i}', price=100, category='painting', artist_id=user.id, is_available=i % 2 == 0)
+             for i in range(4)]
+    db.session.add_all(works)
+    db.session.commit()
+    return works
+
+
+@pytest.mark.parametrize('changes', [
+    {'image_url': 'https://example.com/' + 'x' * 1024},
+    {'image_url': ['https://example.com/a.jpg']},
+    {'description': {'text': 'nested'}},
+])
+def test_rejects_values_the_columns_cant_hold(app, changes):
+    with pytest.raises(ValidationError):
+        ArtworkBulkService.validate_changes(changes)
+
+
+def test_image_url_can_be_set_or_cleared(app):
+    assert ArtworkBulkService.validate_changes({'image_url': None}) == {'image_url': None}
+    assert ArtworkBulkService.validate_changes({'image_url': '/media/a.jpg'}) == {'image_url': '/media/a.jpg'}
+
+
+def test_is_available_filter_must_be_a_boolean(app, artworks):
+    artist_id = artworks[0].artist_id
+    with pytest.raises(ValidationError, match='is_available'):
+        ArtworkBulkService.update_matching(artist_id, {'is_available': 'false'}, {'title': 'Renamed'})
+
+    result = ArtworkBulkService.update_matching(artist_id, {'is_available': False}, {'title': 'Renamed'})
+    assert sorted(result['updated']) == sorted(str(work.id) for work in artworks if not work.is_available)
@@ -0,0 +1,55 @@
+import io
+import json
+import pytest
+from app.extensions import db
+from app.models.artwork import Artwork
+from app.models.user import User
+from app.utils.artwork_import import ArtworkImportService
+
+
+@pytest.fixture
+def artist(app):
+    user = User(username='artist', email='artist@example.com', full_name='An Artist',
+                password_hash='x', role='artist')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def ndjson(records):
+    return io.BytesIO('\n'.join(json.dumps(record) for record in records).encode())
+
+
+def record(i, **overrides):
+    return dict({'title': f'Work {i}', 'description': 'Oil on canvas', 'price': 100 + i, 'category': 'painting'},
+                **overrides)
+
+
+def test_description_must_be_a_short_string(app, artist):
+    records = [record(1), record(2, description={'text': 'nested'}), record(3, description='x' * 10001), record(4)]
+
+    summary = ArtworkImportService.import_stream(ndjson(records), 'ndjson', artist.id)
+
+    assert summary['imported'] == 2
+    assert [error['line'] for error in summary['errors']] == [2, 3]
+    assert all('description' in error['message'] for error in summary['errors'])
+
+
+def test_rows_the_database_refuses_dont_sink_their_batch(app, artist, monkeypatch):
+    validate = ArtworkImportService.validate_record
+
+    def validate_then_corrupt(values):
+        values = validate(values)
+        if values['title'] in ('Work 3', 'Work 7'):
+            values['title'] = None  # NOT NULL, so the insert fails
+        return values
+
+    monkeypatch.setattr(ArtworkImportService, 'validate_record', staticmethod(validate_then_corrupt))
+
+    summary = ArtworkImportService.import_stream(ndjson([record(i) for i in range(1, 11)]), 'ndjson', artist.id,
+                                                 batch_size=8)
+
+    assert summary['imported'] == 8
+    assert summary['errors'] == [{'line': 3, 'message': 'Could not be saved'},
+                                 {'line': 7, 'message': 'Could not be saved'}]
+    assert Artwork.query.count() == 8
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+import pytest
+from app.extensions import db
+from app.models.artwork import Artwork, ArtworkReservation
+from app.models.cart import Cart, CartItem
+from app.models.order import Order, OrderItem
+from app.models.user import User
+from app.utils.orders import CartUnavailableError, OrderService
+from app.utils.reservations import ReservationService
+
+SHIPPING = {'fullName': 'A Collector', 'address': '1 Gallery Rd', 'city': 'Nairobi',
+            'country': 'Kenya', 'postalCode': '00100'}
+
+
+def user(name, role='collector'):
+    account = User(username=name, email=f'{name}@example.com', full_name=name, password_hash='x', role=role)
+    db.session.add(account)
+    db.session.commit()
+    return account
+
+
+def add_to_cart(collector, *artworks):
+    cart = Cart.query.filter_by(user_id=collector.id).first()
+    if cart is None:
+        cart = Cart(user_id=collector.id)
+        db.session.add(cart)
+        db.session.flush()
+    for artwork in artworks:
+        db.session.add(CartItem(cart_id=cart.id, artwork_id=artwork.id, quantity=1, price_at_add=artwork.price))
+    db.session.commit()
+
+
+@pytest.fixture
+def artworks(app):
+    artist = user('artist', role='artist')
+    works = [Artwork(title=f'Work {i}', price=100 + i, category='painting', artist_id=artist.id) for i in range(3)]
+    db.session.add_all(works)
+    db.session.commit()
+    return works
+
+
+def is_available(artwork):
+    return db.session.get(Artwork, artwork.id).is_available
+
+
+def test_placing_the_order_marks_its_artworks_sold(app, artworks):
+    first, second = user('first'), user('second')
+    add_to_cart(first, artworks[0], artworks[1])
+    add_to_cart(second, artworks[0])
+
+    order_id = OrderService.checkout(first.id, SHIPPING)
+
+    assert float(db.session.get(Order, order_id).total_amount) == 201.0
+    assert not is_available(artworks[0]) and not is_available(artworks[1])
+    # The holds became the sale, so there is nothing left to time out
+    assert ArtworkReservation.query.count() == 0
+
+    with pytest.raises(CartUnavailableError):
+        OrderService.checkout(second.id, SHIPPING)
+
+
+def test_sold_artworks_stay_sold_after_the_hold_would_have_expired(app, artworks):
+    first, second = user('first'), user('second')
+    add_to_cart(first, artworks[0])
+    OrderService.checkout(first.id, SHIPPING)
+    app.config['RESERVATION_TTL'] = -1
+    ReservationService.release_expired()
+
+    add_to_cart(second, artworks[0])
+    with pytest.raises(CartUnavailableError):
+        OrderService.checkout(second.id, SHIPPING)
+    assert Order.query.count() == 1
+
+
+def test_cancelling_puts_artworks_back_on_sale(app, artworks):
+    first = user('first')
+    add_to_cart(first, artworks[0])
+    order = db.session.get(Order, OrderService.checkout(first.id, SHIPPING))
+
+    assert [row.id for row in ReservationService.mark_unsold(order.id)] == [artworks[0].id]
+    db.session.commit()
+    assert is_available(artworks[0])
+
+
+def test_started_checkout_holds_until_it_expires(app, artworks):
+    first, second = user('first'), user('second')
+    add_to_cart(first, artworks[2])
+    add_to_cart(second, artworks[2])
+
+    held = OrderService.hold_cart(first.id)
+    assert held['held'] == [str(artworks[2].id)]
+    with pytest.raises(CartUnavailableError, match='reserved'):
+        OrderService.checkout(second.id, SHIPPING)
+
+    # The first collector never placed the order, so their hold lapses
+    db.session.execute(db.update(ArtworkReservation).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    assert ReservationService.release_expired() == 1
+    OrderService.checkout(second.id, SHIPPING)
+    assert not is_available(artworks[2])
+
+
+def test_only_one_order_can_claim_an_artwork(app, artworks):
+    first, second = user('first'), user('second')
+    orders = []
+    for collector in (first, second):
+        order = Order(customer_id=collector.id, total_amount=100, shipping_address='1 Gallery Rd',
+                      shipping_city='Nairobi', shipping_country='Kenya', shipping_postal_code='00100',
+                      items=[OrderItem(artwork_id=artworks[0].id, quantity=1, price=100),
+                             OrderItem(artwork_id=artworks[1].id, quantity=1, price=101)])
+        db.session.add(order)
+        db.session.flush()
+        orders.append(order)
+
+    # Both orders passed their availability checks; the first claim wins
+    assert len(ReservationService.mark_sold(first.id, orders[0].id)) == 2
+    assert ReservationService.mark_sold(second.id, orders[1].id) is None
+
+
+def test_checkout_refuses_artworks_held_by_another_collector(app, artworks):
+    first, second = user('first'), user('second')
+    add_to_cart(first, artworks[0])
+    add_to_cart(second, artworks[0])
+    OrderService.hold_cart(first.id)
+
+    order = Order(customer_id=second.id, total_amount=100, shipping_address='1 Gallery Rd',
+                  shipping_city='Nairobi', shipping_country='Kenya', shipping_postal_code='00100',
+                  items=[OrderItem(artwork_id=artworks[0].id, quantity=1, price=100)])
+    db.session.add(order)
+    db.session.flush()
+    assert ReservationService.mark_sold(second.id, order.id) is None
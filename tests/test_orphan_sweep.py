@@ -0,0 +1,71 @@
+import importlib.util
+import io
+import os
+import pytest
+from PIL import Image
+from app.extensions import db
+from app.models.artwork import Artwork
+from app.models.image_asset import PendingImageDeletion
+from app.models.user import User
+from app.utils.image_deletion import ImageDeletionService
+from app.utils.storage import get_storage
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), '..', 'migrations', 'versions', 'a1f6c3e9d2b7_backfill_artwork_image_public_ids.py'
+)
+
+
+def store(app, public_id):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, format='JPEG')
+    buffer.seek(0)
+    with app.test_request_context():
+        return get_storage().save(buffer, public_id)
+
+
+@pytest.fixture
+def artist(app):
+    user = User(username='artist', email='artist@example.com', full_name='An Artist',
+                password_hash='x', role='artist')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_image_named_only_by_image_url_is_kept(app, artist):
+    app.config['ORPHAN_GRACE_PERIOD'] = -60
+    legacy = store(app, 'artworks/legacy_image-1')
+    store(app, 'artworks/orphan')
+    db.session.add(Artwork(title='Old', price=10, category='painting', artist_id=artist.id,
+                           image_url=legacy['url'], image_public_id=None))
+    db.session.commit()
+
+    assert ImageDeletionService.sweep_orphans() == 1
+    assert [row.public_id for row in PendingImageDeletion.query] == ['artworks/orphan']
+
+
+def test_backfill_parses_public_ids_from_urls():
+    spec = importlib.util.spec_from_file_location('backfill', MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    parse = migration.public_id_from_url
+    assert parse('https://res.cloudinary.com/demo/image/upload/v1712345678/artworks/abc_D-1.jpg') == 'artworks/abc_D-1'
+    assert parse('https://res.cloudinary.com/demo/image/upload/c_fill,w_300/v1/artworks/abc.png?x=1') == 'artworks/abc'
+    assert parse('http://localhost:5000/media/artworks/abc') == 'artworks/abc'
+    assert parse('https://example.com/some/picture.jpg') is None
+
+
+def test_enqueue_skips_images_already_queued(app):
+    ImageDeletionService.enqueue(['artworks/a'])
+    db.session.commit()
+    queued_at = PendingImageDeletion.query.filter_by(public_id='artworks/a').one().next_attempt_at
+
+    # As when two artworks sharing an image are deleted at once
+    ImageDeletionService.enqueue(['artworks/a', 'artworks/b', None])
+    db.session.commit()
+
+    rows = {row.public_id: row for row in PendingImageDeletion.query}
+    assert set(rows) == {'artworks/a', 'artworks/b'}
+    assert rows['artworks/a'].next_attempt_at == queued_at
+    assert rows['artworks/b'].id is not None and rows['artworks/b'].attempts == 0
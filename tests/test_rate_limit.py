@@ -0,0 +1,24 @@
+from app.utils import rate_limit
+from app.utils.rate_limit import MemoryBucketStore
+
+
+def test_prune_keeps_buckets_still_refilling_under_their_own_policy(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: clock[0])
+    store = MemoryBucketStore()
+
+    # A slow policy (5/hour) and a fast one (30/minute) in the same store
+    signup_rate, signup_burst = 5 / 3600, 5
+    search_rate, search_burst = 30 / 60, 10
+    for _ in range(signup_burst):
+        assert store.take('signup:ip:1.2.3.4', signup_rate, signup_burst)[0]
+    store.take('search:ip:5.6.7.8', search_rate, search_burst)
+
+    # Long enough for the search bucket to refill, far too short for signup
+    clock[0] += 60
+    store._prune(clock[0])
+
+    assert 'search:ip:5.6.7.8' not in store._buckets
+    allowed, retry_after = store.take('signup:ip:1.2.3.4', signup_rate, signup_burst)
+    assert not allowed
+    assert retry_after > 0
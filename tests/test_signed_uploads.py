@@ -0,0 +1,130 @@
+import io
+import time
+import uuid
+import pytest
+from PIL import Image
+from app.models.image_asset import ImageAsset, PendingImageDeletion
+from app.utils.cloudinary_service import CloudinaryService
+
+OWNER_ID = uuid.UUID("6f1c2a9e-0b4d-4c1e-9a7f-3d2b8e5c1a40")
+
+
+def jpeg_bytes(color=(200, 40, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def sign(app, owner_id=OWNER_ID):
+    with app.test_request_context():
+        return CloudinaryService.create_signed_upload(owner_id)
+
+
+def upload(client, signed, data):
+    fields = dict(signed['fields'], file=(io.BytesIO(data), 'art.jpg'))
+    return client.post('/media/upload', data=fields, content_type='multipart/form-data')
+
+
+def complete(app, token, owner_id=OWNER_ID):
+    with app.test_request_context():
+        return CloudinaryService.complete_signed_upload(token, owner_id)
+
+
+def test_valid_token_registers_the_upload(app, client):
+    signed = sign(app)
+    assert upload(client, signed, jpeg_bytes()).status_code == 201
+
+    result = complete(app, signed['upload_token'])
+
+    assert result['public_id'] == signed['public_id']
+    assert (result['width'], result['height']) == (64, 48)
+    assert result['deduplicated'] is False
+    assert ImageAsset.query.filter_by(public_id=signed['public_id']).count() == 1
+
+    # A retried completion returns the same asset rather than a second one
+    assert complete(app, signed['upload_token'])['public_id'] == signed['public_id']
+    assert ImageAsset.query.count() == 1
+
+
+def test_tampered_token_is_rejected(app, client):
+    signed = sign(app)
+    upload(client, signed, jpeg_bytes())
+    token = signed['upload_token']
+    tampered = token[:-4] + ('AAAA' if not token.endswith('AAAA') else 'BBBB')
+
+    with pytest.raises(ValueError, match="Invalid upload token"):
+        complete(app, tampered)
+    with pytest.raises(ValueError, match="another user"):
+        complete(app, token, owner_id="00000000-0000-0000-0000-000000000000")
+    assert ImageAsset.query.count() == 0
+
+
+def test_tampered_upload_signature_is_rejected(app, client):
+    signed = sign(app)
+    signed['fields']['public_id'] = 'artworks/someone-elses-image'
+
+    response = upload(client, signed, jpeg_bytes())
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Invalid upload signature"
+
+
+def test_expired_token_is_rejected(app, client):
+    signed = sign(app)
+    upload(client, signed, jpeg_bytes())
+    app.config['DIRECT_UPLOAD_TTL'] = -1
+
+    with pytest.raises(ValueError, match="expired"):
+        complete(app, signed['upload_token'])
+    assert ImageAsset.query.count() == 0
+
+
+def test_expired_upload_signature_is_rejected(app, client, monkeypatch):
+    signed = sign(app)
+    real_time = time.time
+    monkeypatch.setattr(time, 'time', lambda: real_time() + app.config['DIRECT_UPLOAD_TTL'] + 1)
+
+    response = upload(client, signed, jpeg_bytes())
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Upload signature has expired"
+
+
+def test_same_file_is_deduplicated_by_etag(app, client):
+    data = jpeg_bytes()
+    first, second = sign(app), sign(app)
+    upload(client, first, data)
+    upload(client, second, data)
+
+    original = complete(app, first['upload_token'])
+    duplicate = complete(app, second['upload_token'])
+
+    assert duplicate['deduplicated'] is True
+    assert duplicate['public_id'] == original['public_id']
+    assert ImageAsset.query.count() == 1
+    # The second copy is queued for deletion rather than kept
+    assert PendingImageDeletion.query.filter_by(public_id=second['public_id']).count() == 1
+
+
+def test_missing_upload_is_rejected(app):
+    signed = sign(app)
+
+    with pytest.raises(ValueError, match="not found"):
+        complete(app, signed['upload_token'])
+
+
+def test_uploads_are_only_shared_with_their_uploader(app, client):
+    other_id = uuid.UUID("0d4e8b2f-7a61-4c39-b5e0-92f3a6c7d18e")
+    data = jpeg_bytes()
+    mine, theirs = sign(app), sign(app, other_id)
+    upload(client, mine, data)
+    upload(client, theirs, data)
+
+    original = complete(app, mine['upload_token'])
+    # Another user's copy of the same bytes is not deduplicated onto mine
+    assert complete(app, theirs['upload_token'], other_id)['public_id'] == theirs['public_id']
+
+    with pytest.raises(PermissionError):
+        CloudinaryService.retain_image(original['public_id'], other_id)
+    assert CloudinaryService.retain_image(original['public_id'], OWNER_ID) is not None
+    assert ImageAsset.query.filter_by(public_id=original['public_id']).one().ref_count == 1